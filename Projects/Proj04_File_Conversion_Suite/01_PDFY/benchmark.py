@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+PDFY Benchmark - throughput and regression harness for PDFY
+Synthesizes a mixed corpus (JPEG, PNG RGB/RGBA/palette, multi-page TIFF, WebP, PDF),
+times process_directory end-to-end and per pipeline stage for several worker
+counts, records peak RSS and bytes written, and compares against a stored baseline.
+
+Usage:
+    python benchmark.py                        # run and compare against the baseline
+    python benchmark.py --save-baseline        # record the current numbers as baseline
+    python benchmark.py --workers 1 2 4 --scale 2
+A baseline only compares against runs with the same corpus scale and CPU count
+(use --baseline to keep one file per machine or scale).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import importlib.util
+from pathlib import Path
+from typing import Dict, List, Optional
+from PIL import Image, ImageDraw
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = SCRIPT_DIR / 'benchmark_baseline.json'
+DEFAULT_CORPUS = Path(tempfile.gettempdir()) / 'pdfy_benchmark_corpus'
+
+# The tool lives in "main(1.0).py", which is not importable by name. Loading it at
+# module level also registers it for worker processes started with spawn.
+_spec = importlib.util.spec_from_file_location('pdfy', SCRIPT_DIR / 'main(1.0).py')
+pdfy = importlib.util.module_from_spec(_spec)
+sys.modules['pdfy'] = pdfy
+_spec.loader.exec_module(pdfy)
+
+# Peak memory is measured the same way by every benchmark in the suite
+_spec = importlib.util.spec_from_file_location('benchmark_rss', SCRIPT_DIR.parent / 'benchmark_rss.py')
+benchmark_rss = importlib.util.module_from_spec(_spec)
+sys.modules['benchmark_rss'] = benchmark_rss
+_spec.loader.exec_module(benchmark_rss)
+peak_rss_mb = benchmark_rss.peak_rss_mb
+
+# Image sizes per corpus tier (width, height)
+SIZES = {
+    'small': (640, 480),
+    'medium': (1920, 1080),
+    'large': (4032, 3024),
+}
+
+# Files generated per (format, size) at scale 1
+FILES_PER_KIND = 2
+
+def make_image(size: tuple[int, int], rng: random.Random) -> Image.Image:
+    """
+    Draw a deterministic photo-like RGB image (gradient plus random shapes)
+    """
+    width, height = size
+    gradient = Image.linear_gradient('L').resize(size)
+    img = Image.merge('RGB', (gradient, gradient.transpose(Image.FLIP_LEFT_RIGHT),
+                              gradient.transpose(Image.FLIP_TOP_BOTTOM)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(5, max(6, width // 6))
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    return img
+
+def generate_corpus(corpus_dir: Path, scale: int = 1, seed: int = 66) -> Dict[str, int]:
+    """
+    Write the synthetic corpus, returning a count per format
+    """
+    rng = random.Random(seed)
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    counts: Dict[str, int] = {}
+
+    def save(kind: str, name: str, img: Image.Image, fmt: str, **options) -> None:
+        img.save(corpus_dir / name, fmt, **options)
+        counts[kind] = counts.get(kind, 0) + 1
+
+    for tier, size in SIZES.items():
+        for i in range(FILES_PER_KIND * scale):
+            base = make_image(size, rng)
+            stem = f"{tier}_{i:03d}"
+            save('jpeg', f"{stem}_photo.jpg", base, 'JPEG', quality=92, dpi=(72, 72))
+            save('png', f"{stem}_rgb.png", base, 'PNG')
+
+            rgba = base.convert('RGBA')
+            rgba.putalpha(Image.linear_gradient('L').resize(size))
+            save('png_rgba', f"{stem}_rgba.png", rgba, 'PNG')
+            save('png_palette', f"{stem}_palette.png", base.quantize(64), 'PNG')
+            save('webp', f"{stem}_photo.webp", base, 'WEBP', quality=85)
+
+            pages = [base, base.rotate(90, expand=True), base.convert('L')]
+            save('tiff', f"{stem}_pages.tif", pages[0], 'TIFF', save_all=True,
+                 append_images=pages[1:], compression='tiff_lzw')
+            save('pdf', f"{stem}_doc.pdf", base, 'PDF', resolution=150)
+
+    (corpus_dir / 'corpus.json').write_text(json.dumps({'scale': scale, 'seed': seed, 'counts': counts}))
+    return counts
+
+def ensure_corpus(corpus_dir: Path, scale: int) -> Dict[str, int]:
+    """
+    Reuse an existing corpus of the same scale, otherwise regenerate it
+    """
+    manifest = corpus_dir / 'corpus.json'
+    if manifest.exists():
+        info = json.loads(manifest.read_text())
+        if info.get('scale') == scale:
+            return info['counts']
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    print(f"Generating corpus in {corpus_dir} (scale {scale})...")
+    return generate_corpus(corpus_dir, scale)
+
+def run_single(corpus_dir: Path, workers: int, profile: str) -> dict:
+    """
+    Time one process_directory run (called in a fresh process so RSS peaks are per run)
+    """
+    with tempfile.TemporaryDirectory(prefix='pdfy_bench_') as output_dir:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            result = pdfy.process_directory(str(corpus_dir), output_dir, workers=workers,
+                                            profile=pdfy.OUTPUT_PROFILES[profile])
+            wall_time = time.perf_counter() - start
+
+        bytes_on_disk = sum(f.stat().st_size for f in Path(output_dir).rglob('*') if f.is_file())
+
+    files = result.processed + result.errors
+    return {
+        'workers': workers,
+        'profile': profile,
+        'files': files,
+        'errors': result.errors,
+        'wall_time': round(wall_time, 3),
+        'files_per_sec': round(files / wall_time, 2) if wall_time else 0.0,
+        'bytes_written': bytes_on_disk,
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': {stage.name: {'busy': round(stage.busy, 3),
+                                'waiting': round(stage.waiting, 3),
+                                'utilization': round(stage.utilization(result.wall_time), 3)}
+                   for stage in result.stages},
+    }
+
+def run_in_subprocess(corpus_dir: Path, workers: int, profile: str) -> dict:
+    """
+    Run run_single in a child interpreter and collect its JSON result
+    """
+    command = [sys.executable, str(Path(__file__).resolve()), '--single',
+               '--corpus', str(corpus_dir), '--profile', profile, '--workers', str(workers)]
+    completed = subprocess.run(command, capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def baseline_mismatch(baseline: dict, scale: int) -> Optional[str]:
+    """
+    Why the baseline cannot be compared with this run, or None when it can
+    Bytes written and throughput both depend on the corpus scale and CPU count.
+    """
+    recorded = (baseline.get('corpus_scale'), baseline.get('cpu_count'))
+    current = (scale, os.cpu_count())
+    if recorded == current:
+        return None
+    return (f"baseline was recorded at corpus scale {recorded[0]} on {recorded[1]} CPUs, "
+            f"this run is scale {current[0]} on {current[1]} CPUs")
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    """
+    Compare results against a baseline, returning a list of regressions
+    Throughput may not drop, and peak RSS may not rise, by more than tolerance.
+    """
+    regressions = []
+    for result in results:
+        key = f"{result['profile']}/w{result['workers']}"
+        base = baseline.get('runs', {}).get(key)
+        if base is None:
+            continue
+        if result['files_per_sec'] < base['files_per_sec'] * (1 - tolerance):
+            regressions.append(f"{key}: {result['files_per_sec']} files/s vs baseline {base['files_per_sec']}")
+        if (result['peak_rss_mb'] and base.get('peak_rss_mb') and
+                result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance)):
+            regressions.append(f"{key}: peak RSS {result['peak_rss_mb']} MB vs baseline {base['peak_rss_mb']} MB")
+        if result['bytes_written'] > base['bytes_written'] * (1 + tolerance):
+            regressions.append(f"{key}: wrote {result['bytes_written']} bytes vs baseline {base['bytes_written']}")
+    return regressions
+
+def print_results(results: List[dict], baseline: dict) -> None:
+    """
+    Print a results table with the change against the baseline
+    """
+    print(f"\n{'run':<16}{'files':>7}{'time s':>9}{'files/s':>9}{'vs base':>9}{'RSS MB*':>9}{'written MB':>12}  bottleneck")
+    for result in results:
+        key = f"{result['profile']}/w{result['workers']}"
+        base = baseline.get('runs', {}).get(key)
+        change = ''
+        if base and base['files_per_sec']:
+            change = f"{(result['files_per_sec'] / base['files_per_sec'] - 1) * 100:+.1f}%"
+        bottleneck = max(result['stages'], key=lambda name: result['stages'][name]['utilization'])
+        rss = result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-'
+        print(f"{key:<16}{result['files']:>7}{result['wall_time']:>9.2f}{result['files_per_sec']:>9.2f}"
+              f"{change:>9}{rss:>9}{result['bytes_written'] / (1024 * 1024):>12.2f}  {bottleneck}")
+    print("* peak of the largest single process; worker processes running at once add up to more")
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="PDFY throughput benchmark")
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS, help="Corpus directory (generated if missing)")
+    parser.add_argument('--scale', type=int, default=1, help="Corpus size multiplier")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help="Worker counts to test")
+    parser.add_argument('--profile', nargs='+', default=['archival', 'screen'],
+                        choices=sorted(pdfy.OUTPUT_PROFILES), help="Output profiles to test")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per configuration (best is kept)")
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Allowed regression (0.10 = 10%%)")
+    parser.add_argument('--single', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - runs every configuration and reports regressions
+    Exit code is 1 when a regression against the baseline is found,
+    2 when the baseline was recorded at another scale or CPU count
+    """
+    args = parse_arguments()
+
+    if args.single:
+        print(json.dumps(run_single(args.corpus, args.workers[0], args.profile[0])))
+        return 0
+
+    counts = ensure_corpus(args.corpus, args.scale)
+    print(f"Corpus: {sum(counts.values())} files ({', '.join(f'{k}={v}' for k, v in sorted(counts.items()))})")
+
+    results = []
+    for profile in args.profile:
+        for workers in args.workers:
+            runs = [run_in_subprocess(args.corpus, workers, profile) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run['wall_time'])
+            best['peak_rss_mb'] = max((run['peak_rss_mb'] or 0) for run in runs) or None
+            results.append(best)
+            print(f"  {profile}/w{workers}: {best['wall_time']:.2f}s")
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    mismatch = baseline_mismatch(baseline, args.scale) if baseline else None
+    print_results(results, {} if mismatch else baseline)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'cpu_count': os.cpu_count(),
+            'corpus_scale': args.scale,
+            'runs': {f"{r['profile']}/w{r['workers']}": r for r in results},
+        }, indent=2))
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("\nNo baseline found - run with --save-baseline to create one")
+        return 0
+    if mismatch:
+        print(f"\nNot compared: {mismatch} (record one with --save-baseline, or pick another with --baseline)")
+        return 2
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for regression in regressions:
+            print(f"  ✗ {regression}")
+        return 1
+
+    print(f"\n✓ No regressions (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
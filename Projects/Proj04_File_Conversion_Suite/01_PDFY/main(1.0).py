@@ -6,16 +6,56 @@ Maintains chronological order based on filename sorting
 """
 
 import os
-import sys
+import io
+import time
+import queue
+import argparse
+import fnmatch
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageSequence, PdfParser
 import shutil
-from typing import List, Set
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set
 
 # Supported image formats
 SUPPORTED_IMAGE_FORMATS = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.gif', '.webp'}
 PDF_FORMAT = '.pdf'
 
+# Pillow formats whose extra frames are expanded into extra pages
+MULTI_FRAME_FORMATS = {'TIFF', 'GIF', 'WEBP'}
+
+class OutputProfile(NamedTuple):
+    """
+    Controls how converted images are resampled and encoded
+    """
+    name: str
+    dpi: Optional[int]  # Target resolution, None keeps the original pixels
+    jpeg_quality: Optional[int]  # None keeps Pillow's default encoding
+    max_page_bytes: Optional[int] = None  # Per-page size budget
+
+OUTPUT_PROFILES = {
+    'archival': OutputProfile('archival', None, None),
+    'print': OutputProfile('print', 300, 90),
+    'screen': OutputProfile('screen', 150, 75),
+    'budget': OutputProfile('budget', 150, 85, 500 * 1024),
+}
+
+# Largest page a resampled image may occupy (A4 short and long side, inches)
+REFERENCE_PAGE_INCHES = (8.27, 11.69)
+
+# Limits for the max-bytes-per-page search
+BUDGET_MIN_QUALITY = 25
+BUDGET_MAX_DOWNSCALES = 4
+
+# Pipeline tuning
+READ_AHEAD_PER_WORKER = 2  # Files prefetched / in flight per conversion worker
+LARGE_FILE_BYTES = 64 * 1024 * 1024  # Files above this are not prefetched into memory
+FSYNC_BATCH_SIZE = 32  # Written files per fsync batch
+
+_DONE = None  # Queue sentinel
+
 def get_supported_files(directory: Path) -> tuple[List[Path], List[Path]]:
     """
     Get lists of PDF files and image files from directory
@@ -38,49 +78,390 @@ def get_supported_files(directory: Path) -> tuple[List[Path], List[Path]]:
     
     return pdf_files, image_files
 
-def convert_image_to_pdf(image_path: Path, output_path: Path) -> bool:
+class WorkItem(NamedTuple):
     """
-    Convert an image to PDF format maintaining original resolution
+    A single supported file found while walking the input tree
     """
-    try:
-        with Image.open(image_path) as img:
-            # Convert RGBA to RGB if necessary (for PNG with transparency)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                # Create white background
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Handle DPI information more robustly
+    source: Path
+    relative_dir: Path  # Sub-directory of the input root the file lives in
+    size: int
+    is_pdf: bool
+
+def matches_patterns(relative_path: str, patterns: Sequence[str]) -> bool:
+    """
+    Check a POSIX-style relative path against glob patterns
+    A pattern matches either the full relative path or just the final name
+    """
+    name = relative_path.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatch(relative_path, pattern) or fnmatch.fnmatch(name, pattern)
+               for pattern in patterns)
+
+def iter_supported_files(directory: Path,
+                         include: Optional[Sequence[str]] = None,
+                         exclude: Optional[Sequence[str]] = None,
+                         skip_dir: Optional[Path] = None) -> Iterator[WorkItem]:
+    """
+    Recursively walk directory with os.scandir and yield work items as they are found
+    Files of each folder are yielded in filename order before its sub-folders are
+    visited, so nothing waits for the whole tree to be listed. Type checks use the
+    DirEntry cache, and the size comes from DirEntry.stat() instead of a second lookup.
+    Excluded folders (and skip_dir, e.g. an output folder inside the input) are pruned.
+    """
+    skip_dir = skip_dir.resolve() if skip_dir is not None else None
+    stack = [Path()]
+    
+    while stack:
+        relative_dir = stack.pop()
+        current = directory / relative_dir
+        
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Error reading {current}: {e}")
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            relative_path = (relative_dir / entry.name).as_posix()
             try:
-                dpi = img.info.get('dpi')
-                if dpi is None:
-                    # No DPI info, use default
-                    resolution = 300
-                elif isinstance(dpi, (tuple, list)) and len(dpi) >= 2:
-                    # DPI is a tuple/list, use first value or average
-                    resolution = int(dpi[0]) if isinstance(dpi[0], (int, float)) else 300
-                elif isinstance(dpi, (int, float)):
-                    # DPI is a single number
-                    resolution = int(dpi)
-                else:
-                    # Fallback to default
-                    resolution = 300
-            except:
-                resolution = 300
-            
-            # Save as PDF with proper resolution handling
-            img.save(output_path, 'PDF', resolution=resolution)
+                if entry.is_dir(follow_symlinks=False):
+                    if exclude and matches_patterns(relative_path, exclude):
+                        continue
+                    if skip_dir is not None and Path(entry.path).resolve() == skip_dir:
+                        continue
+                    subdirs.append(relative_dir / entry.name)
+                    continue
+                
+                if not entry.is_file():
+                    continue
+                
+                suffix = os.path.splitext(entry.name)[1].lower()
+                if suffix != PDF_FORMAT and suffix not in SUPPORTED_IMAGE_FORMATS:
+                    continue
+                if include and not matches_patterns(relative_path, include):
+                    continue
+                if exclude and matches_patterns(relative_path, exclude):
+                    continue
+                
+                yield WorkItem(Path(entry.path), relative_dir, entry.stat().st_size,
+                               suffix == PDF_FORMAT)
+            except OSError as e:
+                print(f"Error reading {entry.path}: {e}")
+        
+        # Reverse so the stack pops sub-folders in sorted order
+        stack.extend(reversed(subdirs))
+
+def get_output_file(item: WorkItem, output_path: Path) -> Path:
+    """
+    Build the output PDF path for a work item, mirroring its sub-directory
+    """
+    # Change this line to: output_name = item.source.name + '.pdf'
+    # if you want to keep original extension (e.g., image.jpg.pdf)
+    output_name = item.source.name if item.is_pdf else item.source.stem + '.pdf'
+    return output_path / item.relative_dir / output_name
+
+def flatten_to_rgb(img: Image.Image) -> Image.Image:
+    """
+    Convert an image to RGB, compositing any transparency onto white
+    """
+    # Convert RGBA to RGB if necessary (for PNG with transparency)
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Create white background
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        return background
+    elif img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+def get_image_resolution(img: Image.Image) -> int:
+    """
+    Read the DPI an image was stored at, falling back to 300
+    """
+    # Handle DPI information more robustly
+    try:
+        dpi = img.info.get('dpi')
+        if dpi is None:
+            # No DPI info, use default
+            return 300
+        elif isinstance(dpi, (tuple, list)) and len(dpi) >= 2:
+            # DPI is a tuple/list, use first value or average
+            return int(dpi[0]) if isinstance(dpi[0], (int, float)) and dpi[0] > 0 else 300
+        elif isinstance(dpi, (int, float)) and dpi > 0:
+            # DPI is a single number
+            return int(dpi)
+        else:
+            # Fallback to default
+            return 300
+    except:
+        return 300
+
+def get_target_size(size: tuple[int, int], resolution: int, dpi: int) -> tuple[tuple[int, int], float]:
+    """
+    Work out the pixel size and page resolution for rendering an image at a target DPI
+    The page keeps the image's physical size, except that pages larger than A4 (phone
+    photos tagged 72 DPI come out several feet wide) are shrunk to fit A4.
+    Images are never upscaled.
+    Returns: ((width, height), page_resolution)
+    """
+    width_in = size[0] / resolution
+    height_in = size[1] / resolution
+    
+    short_side, long_side = REFERENCE_PAGE_INCHES
+    page_width, page_height = (long_side, short_side) if width_in > height_in else (short_side, long_side)
+    fit = min(1.0, page_width / width_in, page_height / height_in)
+    
+    target = (max(1, round(width_in * fit * dpi)), max(1, round(height_in * fit * dpi)))
+    if target[0] >= size[0] or target[1] >= size[1]:
+        target = size
+    
+    return target, target[0] / (width_in * fit)
+
+def encode_pdf_page(img: Image.Image, resolution: float, quality: Optional[int] = None,
+                    title: Optional[str] = None) -> bytes:
+    """
+    Encode a single image as a one-page PDF in memory
+    """
+    buffer = io.BytesIO()
+    options = {'resolution': resolution}
+    if quality is not None:
+        options['quality'] = quality
+    if title:
+        options['title'] = title
+    img.save(buffer, 'PDF', **options)
+    return buffer.getvalue()
+
+def is_black_and_white(colors: Optional[list]) -> bool:
+    """
+    Check a getcolors() result for an image containing only pure black and white
+    """
+    return colors is not None and {color for _, color in colors} <= {(0, 0, 0), (255, 255, 255)}
+
+def resample(img: Image.Image, size: tuple[int, int], bilevel: bool) -> Image.Image:
+    """
+    Resize an RGB image, re-thresholding black and white pages so they stay bilevel
+    """
+    img = img.resize(size, Image.LANCZOS)
+    if bilevel:
+        img = img.convert('L').point(lambda v: 255 if v >= 128 else 0).convert('RGB')
+    return img
+
+def encode_smallest(img: Image.Image, resolution: float, quality: int,
+                    title: Optional[str] = None) -> bytes:
+    """
+    Encode a page with the smallest of JPEG, palette and bilevel encoding
+    Palette quantization is only tried for images with at most 256 colours
+    (screenshots, scans of line art), where it is lossless.
+    """
+    best = encode_pdf_page(img, resolution, quality, title)
+    
+    colors = img.getcolors(256)
+    if colors is not None:
+        palette_img = img.quantize(colors=len(colors))
+        candidates = [encode_pdf_page(palette_img, resolution, title=title)]
+        if is_black_and_white(colors):
+            # Pure black and white (e.g. fax pages) - bilevel is stored as CCITT G4
+            candidates.append(encode_pdf_page(img.convert('1', dither=Image.Dither.NONE),
+                                              resolution, title=title))
+        best = min(candidates + [best], key=len)
+    
+    return best
+
+def render_page(img: Image.Image, resolution: int, profile: OutputProfile,
+                title: Optional[str] = None) -> bytes:
+    """
+    Resample and encode an RGB image according to an output profile
+    With a page budget, JPEG quality is searched downwards first; if even the
+    lowest quality is too big the image is downscaled and the search repeated.
+    """
+    # Checked before resampling, which introduces grey edge pixels
+    bilevel = is_black_and_white(img.getcolors(2))
+    
+    if profile.dpi is not None:
+        target, resolution = get_target_size(img.size, resolution, profile.dpi)
+        if target != img.size:
+            img = resample(img, target, bilevel)
+    
+    quality = profile.jpeg_quality or 75
+    data = encode_smallest(img, resolution, quality, title)
+    if profile.max_page_bytes is None or len(data) <= profile.max_page_bytes:
+        return data
+    
+    for _ in range(BUDGET_MAX_DOWNSCALES + 1):
+        # Binary search for the highest quality that fits the budget
+        low, high = BUDGET_MIN_QUALITY, quality
+        fitting = None
+        while low <= high:
+            mid = (low + high) // 2
+            candidate = encode_smallest(img, resolution, mid, title)
+            if len(candidate) <= profile.max_page_bytes:
+                fitting = candidate
+                low = mid + 1
+            else:
+                data = candidate
+                high = mid - 1
+        if fitting is not None:
+            return fitting
+        
+        # Still too big at minimum quality - shrink pixels, keep page size
+        scale = max(0.25, (profile.max_page_bytes / len(data)) ** 0.5 * 0.9)
+        new_size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+        resolution *= new_size[0] / img.width
+        img = resample(img, new_size, bilevel)
+    
+    print(f"  Warning: page is {format_size(len(data))}, over the {format_size(profile.max_page_bytes)} budget")
+    return data
+
+def render_image(img: Image.Image, profile: OutputProfile, title: Optional[str] = None) -> bytes:
+    """
+    Render the current frame of an opened image as single-page PDF bytes
+    The archival profile keeps the original resolution and Pillow's default encoding,
+    other profiles resample and recompress the page (see render_page)
+    """
+    resolution = get_image_resolution(img)
+    archival = profile.dpi is None and profile.jpeg_quality is None and profile.max_page_bytes is None
+    
+    # Bilevel scans (fax TIFFs) are stored as CCITT G4 rather than blown up to RGB
+    if archival and img.mode == '1':
+        return encode_pdf_page(img, resolution, title=title)
+    
+    img = flatten_to_rgb(img)
+    if archival:
+        # Save as PDF with proper resolution handling
+        return encode_pdf_page(img, resolution, title=title)
+    return render_page(img, resolution, profile, title)
+
+def _copy_stream(out: PdfParser.PdfParser, stream: PdfParser.PdfStream,
+                 src: PdfParser.PdfParser) -> PdfParser.IndirectReference:
+    """
+    Copy a stream object (and any streams it references, e.g. an SMask) between PDFs
+    """
+    dictionary = {}
+    for key, value in stream.dictionary.items():
+        if isinstance(value, PdfParser.IndirectReference):
+            value = _copy_stream(out, src.read_indirect(value), src)
+        dictionary[PdfParser.PdfName(key).name_as_str()] = value
+    return out.write_obj(None, stream=stream.buf, **dictionary)
+
+def _append_page(out: PdfParser.PdfParser, page_pdf: bytes) -> None:
+    """
+    Append the single page of a Pillow-rendered PDF to a PDF being written
+    """
+    src = PdfParser.PdfParser(buf=page_pdf)
+    try:
+        page = src.read_indirect(src.pages[0])
+        resources = PdfParser.PdfDict(page[b'Resources'])
+        resources[b'XObject'] = PdfParser.PdfDict({
+            name: _copy_stream(out, src.read_indirect(ref), src)
+            for name, ref in page[b'Resources'][b'XObject'].items()
+        })
+        contents = _copy_stream(out, src.read_indirect(page[b'Contents']), src)
+        
+        page_ref = out.next_object_id(0)
+        out.pages.append(page_ref)
+        out.write_page(page_ref, Resources=resources, MediaBox=page[b'MediaBox'], Contents=contents)
+    finally:
+        src.close()
+
+def write_frames(img: Image.Image, fp, profile: OutputProfile, title: Optional[str] = None) -> int:
+    """
+    Stream every frame of a multi-frame image into fp, one PDF page per frame
+    Frames are decoded and rendered one at a time and only the finished page objects
+    are copied to the output, so memory stays at one frame however long the file is.
+    Returns: number of pages written
+    """
+    out = PdfParser.PdfParser(f=fp, mode='w+b')
+    out.start_writing()
+    out.write_header()
+    out.write_comment("created by PDFY")
+    out.pages_ref = out.next_object_id(0)
+    
+    for frame in ImageSequence.Iterator(img):
+        _append_page(out, render_image(frame, profile))
+    
+    out.write_obj(out.pages_ref, Type=PdfParser.PdfName(b'Pages'),
+                  Count=len(out.pages), Kids=out.pages)
+    out.root_ref = out.write_obj(None, Type=PdfParser.PdfName(b'Catalog'), Pages=out.pages_ref)
+    if title:
+        out.info.Title = title
+    out.write_xref_and_trailer()
+    fp.flush()
+    return len(out.pages)
+
+def write_image_pdf(img: Image.Image, fp, profile: OutputProfile, title: Optional[str] = None) -> int:
+    """
+    Write an opened image to fp as PDF, expanding multi-page TIFFs and animated GIF/WebP
+    Returns: number of pages written
+    """
+    if img.format in MULTI_FRAME_FORMATS and getattr(img, 'n_frames', 1) > 1:
+        return write_frames(img, fp, profile, title)
+    fp.write(render_image(img, profile, title))
+    return 1
+
+def convert_image_bytes(data: bytes, profile: OutputProfile, title: Optional[str] = None) -> tuple[bytes, float]:
+    """
+    Decode and convert image bytes to PDF bytes (runs inside the worker processes)
+    Returns: (pdf_bytes, seconds_spent)
+    """
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    with Image.open(io.BytesIO(data)) as img:
+        write_image_pdf(img, buffer, profile, title)
+    return buffer.getvalue(), time.perf_counter() - start
+
+def convert_image_file(source: Path, temp_output: Path, profile: OutputProfile,
+                       title: Optional[str] = None) -> tuple[Path, float]:
+    """
+    Convert a large image file straight to a synced temporary file (runs inside the workers)
+    Used for files too big to prefetch, such as long multi-page fax TIFFs.
+    Returns: (temp_output, seconds_spent)
+    """
+    start = time.perf_counter()
+    try:
+        with Image.open(source) as img, open(temp_output, 'w+b') as fp:
+            write_image_pdf(img, fp, profile, title)
+            os.fsync(fp.fileno())
+    except Exception:
+        temp_output.unlink(missing_ok=True)
+        raise
+    return temp_output, time.perf_counter() - start
+
+def convert_image_to_pdf(image_path: Path, output_path: Path,
+                         profile: OutputProfile = OUTPUT_PROFILES['archival']) -> bool:
+    """
+    Convert a single image file to PDF format
+    """
+    try:
+        with Image.open(image_path) as img, open(output_path, 'w+b') as fp:
+            write_image_pdf(img, fp, profile, output_path.stem)
             return True
             
     except Exception as e:
         print(f"Error converting {image_path.name}: {e}")
         return False
 
+def format_size(num_bytes: float) -> str:
+    """
+    Format a byte count for display
+    """
+    for unit in ('B', 'KB', 'MB'):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}" if unit != 'B' else f"{int(num_bytes)} B"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f} GB"
+
+def print_size_report(input_bytes: int, output_bytes: int) -> None:
+    """
+    Print how much the converted images grew or shrank
+    """
+    if input_bytes <= 0:
+        return
+    change = (output_bytes - input_bytes) / input_bytes * 100
+    print(f"Converted images: {format_size(input_bytes)} → {format_size(output_bytes)} ({change:+.1f}%)")
+
 def copy_existing_pdf(src_path: Path, dest_path: Path) -> bool:
     """
     Copy existing PDF to output directory
@@ -93,19 +474,273 @@ def copy_existing_pdf(src_path: Path, dest_path: Path) -> bool:
         print(f"Error copying {src_path}: {e}")
         return False
 
-def process_directory(input_dir: str, output_dir: str = None) -> None:
+class StageMetrics:
+    """
+    Time accounting for one pipeline stage
+    busy is time spent working, waiting is time blocked on a queue or on a free slot
+    """
+    def __init__(self, name: str, workers: int = 1):
+        self.name = name
+        self.workers = workers
+        self.busy = 0.0
+        self.waiting = 0.0
+        self.items = 0
+    
+    def utilization(self, wall_time: float) -> float:
+        if wall_time <= 0:
+            return 0.0
+        return min(1.0, self.busy / (wall_time * self.workers))
+
+class PipelineResult(NamedTuple):
+    """
+    Outcome of a pipeline run
+    """
+    processed: int
+    errors: int
+    input_bytes: int  # Source size of converted images
+    output_bytes: int  # PDF size of converted images
+    written_bytes: int  # Everything written, including kept PDFs
+    wall_time: float
+    stages: List[StageMetrics]
+
+class _WriteStats:
+    """
+    Counters owned by the writer thread
+    """
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.written_bytes = 0
+
+def _display_name(item: WorkItem) -> str:
+    return (item.relative_dir / item.source.name).as_posix()
+
+def _read_stage(items: Iterable[WorkItem], output_path: Path, read_queue: queue.Queue,
+                metrics: StageMetrics) -> None:
+    """
+    Reader thread: walk the work items and prefetch file bytes into read_queue
+    Large files and PDFs that would be copied onto themselves are passed on without data.
+    """
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            break
+        except Exception as e:
+            print(f"Error walking input: {e}")
+            break
+        
+        output_file = get_output_file(item, output_path)
+        data, error = None, None
+        skip_read = item.size > LARGE_FILE_BYTES or (item.is_pdf and item.source == output_file)
+        if not skip_read:
+            try:
+                data = item.source.read_bytes()
+            except OSError as e:
+                error = e
+        metrics.busy += time.perf_counter() - start
+        metrics.items += 1
+        
+        start = time.perf_counter()
+        read_queue.put((item, output_file, data, error))
+        metrics.waiting += time.perf_counter() - start
+    
+    read_queue.put(_DONE)
+
+def _flush_batch(pending: List, metrics: StageMetrics) -> None:
+    """
+    fsync and close a batch of written files
+    """
+    start = time.perf_counter()
+    for handle in pending:
+        try:
+            handle.flush()
+            os.fsync(handle.fileno())
+        except OSError as e:
+            print(f"Error syncing {handle.name}: {e}")
+        finally:
+            handle.close()
+    pending.clear()
+    metrics.busy += time.perf_counter() - start
+
+def _write_stage(write_queue: queue.Queue, in_flight: threading.Semaphore,
+                 metrics: StageMetrics, stats: _WriteStats) -> None:
+    """
+    Writer thread: write finished PDFs, fsyncing them in batches
+    Files stay open until their batch is synced, so one fsync pass covers many files.
+    """
+    pending: List = []
+    created_dirs: Set[Path] = set()
+    
+    while True:
+        start = time.perf_counter()
+        entry = write_queue.get()
+        metrics.waiting += time.perf_counter() - start
+        if entry is _DONE:
+            break
+        
+        item, output_file, data, error = entry
+        start = time.perf_counter()
+        try:
+            if error is not None:
+                raise error
+            
+            if output_file.parent not in created_dirs:
+                output_file.parent.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(output_file.parent)
+            
+            if isinstance(data, Path):
+                # Large image the worker already converted and synced to a temp file
+                os.replace(data, output_file)
+                data = output_file.stat().st_size
+                stats.written_bytes += data
+            elif data is None:
+                # Large or in-place PDF - let the OS copy it
+                if item.source != output_file:
+                    shutil.copy2(item.source, output_file)
+                    stats.written_bytes += item.size
+            else:
+                handle = open(output_file, 'wb')
+                handle.write(data)
+                pending.append(handle)
+                if item.is_pdf:
+                    handle.flush()
+                    shutil.copystat(item.source, output_file)
+                stats.written_bytes += len(data)
+            
+            if item.is_pdf:
+                print(f"✓ Kept: {_display_name(item)}")
+            else:
+                print(f"✓ Converted: {_display_name(item)} → {output_file.name}")
+                stats.input_bytes += item.size
+                stats.output_bytes += data if isinstance(data, int) else len(data)
+            stats.processed += 1
+        except Exception as e:
+            print(f"✗ Failed: {_display_name(item)} ({e})")
+            stats.errors += 1
+        finally:
+            in_flight.release()
+        
+        metrics.busy += time.perf_counter() - start
+        metrics.items += 1
+        if len(pending) >= FSYNC_BATCH_SIZE:
+            _flush_batch(pending, metrics)
+    
+    _flush_batch(pending, metrics)
+
+def run_pipeline(items: Iterable[WorkItem], output_path: Path,
+                 profile: OutputProfile = OUTPUT_PROFILES['archival'],
+                 workers: Optional[int] = None) -> PipelineResult:
+    """
+    Convert and copy work items through a staged pipeline
+    reader thread (walk + prefetch) -> process pool (decode/encode) -> writer thread
+    Existing PDFs skip the pool and go straight to the writer, so both kinds of
+    file flow through the same pass. The number of files held in memory is bounded
+    by the read queue size and the in-flight limit, which covers PDFs and images alike.
+    """
+    workers = workers or os.cpu_count() or 1
+    window = workers * READ_AHEAD_PER_WORKER
+    
+    read_queue: queue.Queue = queue.Queue(maxsize=window)
+    write_queue: queue.Queue = queue.Queue()  # Bounded by in_flight below
+    in_flight = threading.Semaphore(window)  # Files dispatched but not yet written, PDFs included
+    
+    reader_metrics = StageMetrics('reader')
+    dispatch_metrics = StageMetrics('dispatch')
+    convert_metrics = StageMetrics('convert', workers)
+    writer_metrics = StageMetrics('writer')
+    stats = _WriteStats()
+    
+    def on_converted(item: WorkItem, output_file: Path, future) -> None:
+        try:
+            pdf_data, seconds = future.result()
+            convert_metrics.busy += seconds
+            convert_metrics.items += 1
+            write_queue.put((item, output_file, pdf_data, None))
+        except Exception as e:
+            write_queue.put((item, output_file, None, e))
+    
+    wall_start = time.perf_counter()
+    reader = threading.Thread(target=_read_stage, name='pdfy-reader', daemon=True,
+                              args=(items, output_path, read_queue, reader_metrics))
+    writer = threading.Thread(target=_write_stage, name='pdfy-writer', daemon=True,
+                              args=(write_queue, in_flight, writer_metrics, stats))
+    reader.start()
+    writer.start()
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            start = time.perf_counter()
+            entry = read_queue.get()
+            dispatch_metrics.waiting += time.perf_counter() - start
+            if entry is _DONE:
+                break
+            
+            item, output_file, data, error = entry
+            dispatch_metrics.items += 1
+            # Every file holds a slot until the writer is done with it, so prefetched
+            # PDF bytes cannot pile up in write_queue when the writer falls behind
+            start = time.perf_counter()
+            in_flight.acquire()
+            dispatch_metrics.waiting += time.perf_counter() - start
+            if item.is_pdf or error is not None:
+                write_queue.put(entry)
+                continue
+            
+            if data is None:
+                # Too large to prefetch - the worker reads the file and writes a temp file
+                output_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_output = output_file.with_name(f".{item.source.name}.pdfy.part")
+                future = pool.submit(convert_image_file, item.source, temp_output, profile, output_file.stem)
+            else:
+                future = pool.submit(convert_image_bytes, data, profile, output_file.stem)
+            future.add_done_callback(partial(on_converted, item, output_file))
+    
+    reader.join()
+    write_queue.put(_DONE)
+    writer.join()
+    
+    return PipelineResult(stats.processed, stats.errors, stats.input_bytes, stats.output_bytes,
+                          stats.written_bytes, time.perf_counter() - wall_start,
+                          [reader_metrics, convert_metrics, writer_metrics])
+
+def print_pipeline_report(result: PipelineResult) -> None:
+    """
+    Print per-stage utilization so the bottleneck stage is visible
+    """
+    print(f"\n=== Pipeline Stages ({result.wall_time:.2f}s) ===")
+    for stage in result.stages:
+        workers = f" x{stage.workers}" if stage.workers > 1 else ""
+        print(f"{stage.name + workers:<12} busy {stage.busy:7.2f}s  "
+              f"utilization {stage.utilization(result.wall_time):6.1%}  "
+              f"waiting {stage.waiting:7.2f}s  items {stage.items}")
+    
+    bottleneck = max(result.stages, key=lambda stage: stage.utilization(result.wall_time))
+    print(f"Bottleneck: {bottleneck.name}")
+
+def process_directory(input_dir: str, output_dir: str = None, recursive: bool = False,
+                      include: Optional[Sequence[str]] = None,
+                      exclude: Optional[Sequence[str]] = None,
+                      profile: OutputProfile = OUTPUT_PROFILES['archival'],
+                      workers: Optional[int] = None) -> Optional[PipelineResult]:
     """
     Process all files in directory, converting images to PDFs and copying existing PDFs
+    With recursive=True the whole tree is walked and files are processed while
+    the walk is still running; the sub-directory layout is mirrored in the output.
     """
     input_path = Path(input_dir)
     
     if not input_path.exists():
         print(f"Error: Input directory '{input_dir}' does not exist")
-        return
+        return None
     
     if not input_path.is_dir():
         print(f"Error: '{input_dir}' is not a directory")
-        return
+        return None
     
     # Set output directory (same as input if not specified)
     if output_dir is None:
@@ -116,57 +751,53 @@ def process_directory(input_dir: str, output_dir: str = None) -> None:
     
     print(f"Processing directory: {input_path}")
     print(f"Output directory: {output_path}")
+    print(f"Output profile: {profile.name}")
     
-    # Get files to process
-    pdf_files, image_files = get_supported_files(input_path)
+    if recursive:
+        print("\nWalking directory tree...")
+        skip_dir = output_path if output_path != input_path else None
+        items: Iterable[WorkItem] = iter_supported_files(input_path, include, exclude, skip_dir)
+    else:
+        # Get files to process
+        pdf_files, image_files = get_supported_files(input_path)
+        
+        # Apply glob filters to the flat listing as well
+        if include or exclude:
+            def keep(file: Path) -> bool:
+                if include and not matches_patterns(file.name, include):
+                    return False
+                return not (exclude and matches_patterns(file.name, exclude))
+            pdf_files = [f for f in pdf_files if keep(f)]
+            image_files = [f for f in image_files if keep(f)]
+        
+        print(f"\nFound {len(pdf_files)} PDF files and {len(image_files)} image files")
+        
+        if not pdf_files and not image_files:
+            print("No supported files found in directory")
+            return None
+        
+        items = ([WorkItem(f, Path(), f.stat().st_size, True) for f in pdf_files] +
+                 [WorkItem(f, Path(), f.stat().st_size, False) for f in image_files])
+        print(f"\nProcessing {len(items)} files...")
     
-    print(f"\nFound {len(pdf_files)} PDF files and {len(image_files)} image files")
+    result = run_pipeline(items, output_path, profile, workers)
     
-    if not pdf_files and not image_files:
-        print("No supported files found in directory")
-        return
-    
-    # Process statistics
-    processed_count = 0
-    error_count = 0
-    
-    # Process existing PDFs
-    if pdf_files:
-        print(f"\nProcessing {len(pdf_files)} existing PDF files...")
-        for pdf_file in pdf_files:
-            output_file = output_path / pdf_file.name
-            if copy_existing_pdf(pdf_file, output_file):
-                print(f"✓ Kept: {pdf_file.name}")
-                processed_count += 1
-            else:
-                print(f"✗ Failed: {pdf_file.name}")
-                error_count += 1
-    
-    # Process image files
-    if image_files:
-        print(f"\nProcessing {len(image_files)} image files...")
-        for image_file in image_files:
-            # Generate output filename (keep original name + .pdf extension)
-            # Change this line to: output_name = image_file.name + '.pdf' 
-            # if you want to keep original extension (e.g., image.jpg.pdf)
-            output_name = image_file.stem + '.pdf'  # Current: replaces extension
-            output_file = output_path / output_name
-            
-            if convert_image_to_pdf(image_file, output_file):
-                print(f"✓ Converted: {image_file.name} → {output_name}")
-                processed_count += 1
-            else:
-                print(f"✗ Failed: {image_file.name}")
-                error_count += 1
+    if recursive and result.processed + result.errors == 0:
+        print("No supported files found in directory tree")
+        return result
     
     # Summary
     print(f"\n=== Processing Complete ===")
-    print(f"Successfully processed: {processed_count} files")
-    print(f"Errors: {error_count} files")
-    print(f"Total files processed: {processed_count + error_count}")
+    print(f"Successfully processed: {result.processed} files")
+    print(f"Errors: {result.errors} files")
+    print(f"Total files processed: {result.processed + result.errors}")
+    print_size_report(result.input_bytes, result.output_bytes)
+    print_pipeline_report(result)
     
     if output_path != input_path:
         print(f"All PDFs saved to: {output_path}")
+    
+    return result
 
 def get_user_input() -> tuple[str, str]:
     """
@@ -215,15 +846,49 @@ def get_user_input() -> tuple[str, str]:
     
     return input_dir, output_dir
 
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments (all optional - missing paths are asked for interactively)
+    """
+    parser = argparse.ArgumentParser(description="PDFY - convert images to PDFs and keep existing PDFs")
+    parser.add_argument('input_dir', nargs='?', help="Directory containing images and PDFs")
+    parser.add_argument('output_dir', nargs='?', help="Output directory (default: same as input)")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="Walk sub-directories and mirror them in the output")
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help="Only process files matching this glob (repeatable)")
+    parser.add_argument('--exclude', action='append', metavar='GLOB',
+                        help="Skip files and folders matching this glob (repeatable)")
+    parser.add_argument('--profile', choices=sorted(OUTPUT_PROFILES), default='archival',
+                        help="Output profile: archival keeps original pixels, print/screen resample "
+                             "to 300/150 DPI, budget targets --max-page-bytes")
+    parser.add_argument('--max-page-bytes', type=int, metavar='BYTES',
+                        help="Per-page size budget (applies to any profile)")
+    parser.add_argument('-j', '--workers', type=int, metavar='N',
+                        help="Conversion worker processes (default: CPU count)")
+    return parser.parse_args()
+
+def get_profile(args: argparse.Namespace) -> OutputProfile:
+    """
+    Build the output profile selected on the command line
+    """
+    profile = OUTPUT_PROFILES[args.profile]
+    if args.max_page_bytes:
+        profile = profile._replace(max_page_bytes=args.max_page_bytes,
+                                   jpeg_quality=profile.jpeg_quality or 85)
+    return profile
+
 def main():
     """
     Main function - gets user input interactively or from command line
     """
+    args = parse_arguments()
+    
     # Check if command line arguments were provided
-    if len(sys.argv) >= 2:
+    if args.input_dir:
         # Use command line arguments
-        input_directory = sys.argv[1]
-        output_directory = sys.argv[2] if len(sys.argv) > 2 else None
+        input_directory = args.input_dir
+        output_directory = args.output_dir
         print(f"Using command line arguments:")
         print(f"Input: {input_directory}")
         print(f"Output: {output_directory if output_directory else 'Same as input'}")
@@ -236,7 +901,8 @@ def main():
     print(f"{'='*50}")
     
     try:
-        process_directory(input_directory, output_directory)
+        process_directory(input_directory, output_directory, args.recursive,
+                          args.include, args.exclude, get_profile(args), args.workers)
     except KeyboardInterrupt:
         print("\n\nProcess interrupted by user")
     except Exception as e:
@@ -245,7 +911,8 @@ def main():
     input("\nPress Enter to exit...")  # Keep terminal open
     
     try:
-        process_directory(input_directory, output_directory)
+        process_directory(input_directory, output_directory, args.recursive,
+                          args.include, args.exclude, get_profile(args), args.workers)
     except KeyboardInterrupt:
         print("\n\nProcess interrupted by user")
     except Exception as e:
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+PDMUGGY Benchmark - peak memory and wall time of the merge engines
+Generates a directory of small PDFs (each with a text page and a shared "logo"
+image, like PDFY letterhead output) and merges it with every engine in a fresh
+process, reporting wall time, peak RSS, output size and a page count check.
+Peak RSS is that of the largest single process, so it understates tree mode,
+which merges in several worker processes at once.
+
+Peak-memory test (10,000 inputs, 2 pages each):
+    python benchmark.py --files 10000 --modes classic streaming --max-rss-mb 80
+The classic engine keeps every page in one PdfWriter, so its RSS grows with the
+number of inputs (about 300 MB here); the streaming engine should stay close to
+flat (about 35 MB at 2,000 inputs, 50 MB at 10,000). --max-rss-mb fails the run
+(exit code 1) when a low-memory engine peaks above it.
+Tree mode wall time (5,000 inputs, compare on a multi-core host):
+    python benchmark.py --files 5000 --modes streaming tree
+Dedup and object streams (the shared logo is stored once):
+    python benchmark.py --files 1000 --modes streaming compact
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import importlib.util
+from pathlib import Path
+from typing import List
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_CORPUS = Path(tempfile.gettempdir()) / 'pdmuggy_benchmark_corpus'
+
+# The tool lives in "main(1.0).py", which is not importable by name. Loading it at
+# module level also registers it for worker processes started with spawn.
+_spec = importlib.util.spec_from_file_location('pdmuggy', SCRIPT_DIR / 'main(1.0).py')
+pdmuggy = importlib.util.module_from_spec(_spec)
+sys.modules['pdmuggy'] = pdmuggy
+_spec.loader.exec_module(pdmuggy)
+
+# Peak memory is measured the same way by every benchmark in the suite
+_spec = importlib.util.spec_from_file_location('benchmark_rss', SCRIPT_DIR.parent / 'benchmark_rss.py')
+benchmark_rss = importlib.util.module_from_spec(_spec)
+sys.modules['benchmark_rss'] = benchmark_rss
+_spec.loader.exec_module(benchmark_rss)
+peak_rss_mb = benchmark_rss.peak_rss_mb
+
+# Merge engines that can be benchmarked: name -> merge_pdfs keyword arguments
+MODES = {
+    'classic': {},
+    'streaming': {'streaming': True},
+    'tree': {'tree': True},
+    'compact': {'dedup': True, 'compress': True},
+}
+LOW_MEMORY_MODES = {'streaming'}  # Engines held to --max-rss-mb
+
+def make_sample_pdf(index: int, pages: int, logo: bytes) -> bytes:
+    """
+    Build a small PDF by hand: one text page per page plus a shared logo image
+    """
+    objects: List[bytes] = []
+    page_ids = [4 + i * 2 for i in range(pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), pages))
+    objects.append(b"<< /Type /XObject /Subtype /Image /Width 64 /Height 64 /ColorSpace /DeviceRGB "
+                   b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>stream\n" % len(logo)
+                   + logo + b"\nendstream")
+    for page in range(pages):
+        text = b"BT /F1 24 Tf 72 720 Td (Document %d - page %d) Tj ET q 64 0 0 64 72 600 cm /Logo Do Q" % (
+            index, page + 1)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> "
+                       b"/XObject << /Logo 3 0 R >> >> >>" % (page_ids[page] + 1))
+        objects.append(b"<< /Length %d >>stream\n" % len(text) + text + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def ensure_corpus(corpus_dir: Path, files: int, pages: int) -> None:
+    """
+    Generate the input directory unless one with the same shape already exists
+    """
+    manifest = corpus_dir / 'corpus.json'
+    if manifest.exists() and json.loads(manifest.read_text()) == {'files': files, 'pages': pages}:
+        return
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    corpus_dir.mkdir(parents=True)
+    print(f"Generating {files} PDFs in {corpus_dir}...")
+
+    rng = random.Random(66)
+    logo = zlib.compress(bytes(rng.randrange(256) for _ in range(64 * 64 * 3)))
+    for index in range(files):
+        (corpus_dir / f"doc_{index + 1}.pdf").write_bytes(make_sample_pdf(index + 1, pages, logo))
+    manifest.write_text(json.dumps({'files': files, 'pages': pages}))
+
+def run_single(corpus_dir: Path, mode: str) -> dict:
+    """
+    Merge the corpus with one engine (called in a fresh process)
+    """
+    pdf_files = pdmuggy.get_pdf_files(corpus_dir)
+    with tempfile.TemporaryDirectory(prefix='pdmuggy_bench_') as output_dir:
+        output_path = Path(output_dir) / 'merged.pdf'
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            ok = pdmuggy.merge_pdfs(pdf_files, output_path, **MODES[mode])
+            wall_time = time.perf_counter() - start
+
+        rss = peak_rss_mb()  # Before re-reading the output for the check below
+        output_bytes = output_path.stat().st_size if ok else 0
+        pages = len(pdmuggy.PdfReader(str(output_path)).pages) if ok else 0
+
+    return {'mode': mode, 'ok': ok, 'files': len(pdf_files), 'pages': pages,
+            'wall_time': round(wall_time, 2), 'peak_rss_mb': rss, 'output_bytes': output_bytes}
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="PDMUGGY merge benchmark")
+    parser.add_argument('--corpus', type=Path, default=DEFAULT_CORPUS, help="Corpus directory (generated if missing)")
+    parser.add_argument('--files', type=int, default=10000, help="Number of input PDFs")
+    parser.add_argument('--pages', type=int, default=2, help="Pages per input PDF")
+    parser.add_argument('--modes', nargs='+', default=sorted(MODES), choices=sorted(MODES),
+                        help="Merge engines to run")
+    parser.add_argument('--max-rss-mb', type=float,
+                        help=f"Fail when a low-memory engine ({', '.join(sorted(LOW_MEMORY_MODES))}) "
+                             f"peaks above this RSS")
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - runs every engine in its own process and prints a table
+    Exit code is 1 when a merge fails, loses pages or goes over --max-rss-mb
+    """
+    args = parse_arguments()
+
+    if args.single:
+        print(json.dumps(run_single(args.corpus, args.single)))
+        return 0
+
+    ensure_corpus(args.corpus, args.files, args.pages)
+    expected_pages = args.files * args.pages
+
+    print(f"\n{'mode':<12}{'files':>7}{'pages':>9}{'time s':>9}{'RSS MB*':>9}{'output MB':>11}  check")
+    failed = False
+    for mode in args.modes:
+        command = [sys.executable, str(Path(__file__).resolve()), '--single', mode, '--corpus', str(args.corpus)]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"{mode:<12} failed:\n{completed.stderr}")
+            failed = True
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        check = '✓' if result['ok'] and result['pages'] == expected_pages else '✗'
+        rss = result['peak_rss_mb'] if result['peak_rss_mb'] is not None else '-'
+        if args.max_rss_mb is not None and mode in LOW_MEMORY_MODES:
+            if result['peak_rss_mb'] is None:
+                check += ' (RSS not measurable here)'
+            elif result['peak_rss_mb'] > args.max_rss_mb:
+                check = f"✗ RSS above {args.max_rss_mb:g} MB"
+        failed |= check.startswith('✗')
+        print(f"{mode:<12}{result['files']:>7}{result['pages']:>9}{result['wall_time']:>9.2f}"
+              f"{rss:>9}{result['output_bytes'] / (1024 * 1024):>11.2f}  {check}")
+
+    print("* peak of the largest single process; tree mode runs several at once, so it uses more in total")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,13 +6,56 @@ Companion tool to PDFY
 """
 
 import os
-import sys
+import io
+import json
+import time
+import base64
+import zlib
+import hashlib
+import argparse
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from PyPDF2 import PdfReader, PdfWriter
-from typing import List
+from PyPDF2.generic import (ArrayObject, DictionaryObject, IndirectObject, NameObject,
+                            NullObject, NumberObject, PdfObject, StreamObject, TextStringObject)
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 import datetime
 import re
 
+try:
+    from PIL import Image, ImageChops  # Only needed for --optimize
+except ImportError:
+    Image = None
+
+# Binary comment after the header marks the file as binary for transfer tools
+PDF_HEADER = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n"
+
+# Inputs merged per intermediate file in tree mode
+DEFAULT_GROUP_SIZE = 64
+
+# Objects packed into each compressed object stream
+OBJECT_STREAM_SIZE = 100
+
+# Preflight results are cached here between runs, keyed by (path, size, mtime)
+PREFLIGHT_CACHE_FILE = Path.home() / '.pdmuggy' / 'preflight.json'
+PREFLIGHT_CACHE_LIMIT = 100000  # Oldest entries are dropped beyond this
+
+# Seconds between checkpoints of a streaming merge (see merge_pdfs_streaming)
+CHECKPOINT_INTERVAL = 5.0
+RESUMABLE_INPUTS = 200  # Classic merges of more inputs use the streaming engine, which can resume
+
+# Image optimization defaults (see optimize_pdf)
+DEFAULT_OPTIMIZE_DPI = 150
+DEFAULT_OPTIMIZE_QUALITY = 75
+GRAY_TOLERANCE = 8  # Largest channel difference still treated as gray
+BILEVEL_SHARE = 0.98  # Share of near-black/near-white pixels that makes an image bilevel
+BILEVEL_MIN_DPI = 300
+OPTIMIZE_AHEAD_PER_WORKER = 2  # Inputs optimized ahead of the writer per worker
+
 def natural_sort_key(text: str) -> List:
     """
     Convert a string into a list of mixed strings and integers for natural sorting
@@ -35,55 +78,1334 @@ def get_pdf_files(directory: Path) -> List[Path]:
     
     return pdf_files
 
-def merge_pdfs(pdf_files: List[Path], output_path: Path) -> bool:
+class PreflightInfo(NamedTuple):
+    """
+    What the preflight scan learned about one input PDF
+    """
+    path: Path
+    size: int
+    pages: int  # 0 when unreadable
+    encrypted: bool
+    error: Optional[str]  # None when the file can be merged
+
+def scan_pdf(path: Path, size: int) -> PreflightInfo:
+    """
+    Read only the trailer, cross-reference table and page-tree /Count of a PDF
+    Nothing else is parsed: PdfReader resolves objects lazily, and the page tree
+    root is looked up directly instead of walking every page.
+    """
+    encrypted = False
+    try:
+        with open(path, 'rb') as file:
+            reader = PdfReader(file)
+            encrypted = reader.is_encrypted
+            if encrypted and not reader.decrypt(''):
+                return PreflightInfo(path, size, 0, True, "encrypted (password required)")
+            pages = int(reader.trailer['/Root']['/Pages']['/Count'])
+        return PreflightInfo(path, size, pages, encrypted, None)
+    except Exception as e:
+        return PreflightInfo(path, size, 0, encrypted, str(e) or type(e).__name__)
+
+class PreflightIndex:
+    """
+    Cache of preflight scans keyed by (path, size, mtime)
+    A file is only scanned again after it changes. The cache is kept in memory
+    for the run and persisted to PREFLIGHT_CACHE_FILE for the next one.
+    """
+    def __init__(self, cache_file: Optional[Path] = PREFLIGHT_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries: Dict[str, list] = {}  # "path|size|mtime_ns" -> [pages, encrypted, error]
+        self.dirty = False
+        if cache_file is not None:
+            try:
+                self.entries = json.loads(cache_file.read_text())
+            except (OSError, ValueError):
+                pass  # Missing or corrupt cache starts empty
+    
+    def scan(self, pdf_files: Sequence[Path], workers: Optional[int] = None) -> List[PreflightInfo]:
+        """
+        Preflight every file, in parallel for files not already in the cache
+        Returns: one PreflightInfo per input, in input order
+        """
+        results: List[Optional[PreflightInfo]] = [None] * len(pdf_files)
+        missing = []
+        for i, pdf_file in enumerate(pdf_files):
+            try:
+                stat = pdf_file.stat()
+            except OSError as e:
+                results[i] = PreflightInfo(pdf_file, 0, 0, False, str(e))
+                continue
+            key = f"{pdf_file.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+            cached = self.entries.get(key)
+            if cached is not None:
+                results[i] = PreflightInfo(pdf_file, stat.st_size, *cached)
+            else:
+                missing.append((i, key, pdf_file, stat.st_size))
+        
+        if missing:
+            # Scans are dominated by small reads, so threads overlap the I/O well
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                scanned = pool.map(lambda job: scan_pdf(job[2], job[3]), missing)
+                for (i, key, _, _), info in zip(missing, scanned):
+                    results[i] = info
+                    self.entries[key] = [info.pages, info.encrypted, info.error]
+            self.dirty = True
+        
+        return results
+    
+    def save(self) -> None:
+        """
+        Persist the cache (best effort, a read-only home directory is not an error)
+        """
+        if self.cache_file is None or not self.dirty:
+            return
+        if len(self.entries) > PREFLIGHT_CACHE_LIMIT:
+            # Dicts keep insertion order, so the oldest scans go first
+            self.entries = dict(list(self.entries.items())[-PREFLIGHT_CACHE_LIMIT:])
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_suffix('.tmp')
+            temp_file.write_text(json.dumps(self.entries))
+            os.replace(temp_file, self.cache_file)
+            self.dirty = False
+        except OSError:
+            pass
+
+def preflight(pdf_files: Sequence[Path], index: Optional[PreflightIndex] = None) -> List[PreflightInfo]:
+    """
+    Preflight pdf_files through index (a fresh persistent index by default)
+    """
+    index = index or PreflightIndex()
+    results = index.scan(pdf_files)
+    index.save()
+    return results
+
+def remap_outline(entries: List[list], page_map: Dict[int, int]) -> List[list]:
+    """
+    Move [title, page, children] bookmark entries to new page numbers
+    page_map maps old page indices to new ones; bookmarks that point at pages
+    not in it are dropped and their children move up a level.
+    """
+    result = []
+    for title, page, children in entries:
+        if page in page_map:
+            result.append([title, page_map[page], remap_outline(children, page_map)])
+        else:
+            result.extend(remap_outline(children, page_map))
+    return result
+
+def read_outline(reader: PdfReader, page_map: Optional[Dict[int, int]] = None) -> List[list]:
+    """
+    Read the bookmarks of a document as [title, page, children] entries
+    Pages are source page indices, moved through page_map when one is given
+    (see remap_outline). A broken outline is ignored rather than failing the
+    document.
+    """
+    def convert(items: list) -> List[list]:
+        entries: List[list] = []
+        for item in items:
+            if isinstance(item, list):
+                # A nested list holds the children of the entry before it
+                children = convert(item)
+                if entries:
+                    entries[-1][2].extend(children)
+                else:
+                    entries.extend(children)
+                continue
+            try:
+                page = reader.get_destination_page_number(item)
+            except Exception:
+                page = -1
+            entries.append([str(item.title), page, []])
+        return entries
+    
+    try:
+        entries = convert(reader.outline)
+    except Exception:
+        return []
+    if page_map is None:
+        page_map = {index: index for index in range(len(reader.pages))}
+    return remap_outline(entries, page_map)
+
+def add_outline_entries(writer: PdfWriter, entries: List[list], parent: Any = None) -> None:
+    """
+    Add [title, page, children] bookmark entries to a PdfWriter (classic engine)
+    """
+    for title, page, children in entries:
+        item = writer.add_outline_item(title, page, parent)
+        add_outline_entries(writer, children, item)
+
+class StreamingPdfWriter:
+    """
+    Writes a merged PDF object by object instead of building it in memory
+    Objects of each input are copied out, renumbered, as soon as they are reached
+    from its pages. Between documents only the byte offset of every written object
+    and the list of page references are kept, so memory stays at roughly one input
+    document no matter how many are merged.
+    
+    dedup: stream objects with identical content (fonts, ICC profiles, repeated
+           logos) are written once and every later reference points at that copy
+    object_streams: non-stream objects are packed into compressed object streams,
+           the cross-reference table becomes a compressed xref stream, and
+           unfiltered streams are Flate-compressed (PDF 1.5+)
+    
+    Bookmarks are collected as [title, page, children] entries while documents
+    are added, using the running page count as the offset, and the outline tree
+    is written on close.
+    """
+    def __init__(self, output: BinaryIO, dedup: bool = False, object_streams: bool = False,
+                 state: Optional[dict] = None, incremental: bool = False):
+        """
+        state: a checkpoint from checkpoint_state() to continue from; output must
+               be the same file, which is truncated back to the checkpointed length
+        incremental: state was taken after close(); new pages are appended as an
+               incremental update that only lists new and changed objects
+        """
+        self.output = output
+        self.dedup = dedup
+        self.object_streams = object_streams
+        self.offsets: List[int] = [0]  # Index is the object number, 0 is the free-list head
+        self.compressed: Dict[int, Tuple[int, int]] = {}  # Object number -> (object stream, index)
+        self.page_ids: List[int] = []
+        self.outline: List[list] = []  # [title, output page index, children]
+        self.stream_ids: Dict[bytes, int] = {}  # Content hash -> object number (dedup)
+        self.dedup_streams = 0
+        self.dedup_bytes = 0
+        self.compression_saved = 0
+        self._batch: List[Tuple[int, bytes]] = []  # Objects waiting for the next object stream
+        self.last_xref: Optional[int] = None  # Offset of the last cross-reference section written
+        self.incremental_base: Optional[int] = None  # First object number of the update
+        self._reset_document()
+        if state is not None:
+            self._restore(state)
+            if incremental:
+                self.incremental_base = len(self.offsets)
+                self.dedup_streams = self.dedup_bytes = self.compression_saved = 0
+            return
+        self.pages_id = self._allocate()  # Page tree root, written on close
+        self.output.write(PDF_HEADER)
+    
+    def checkpoint_state(self) -> dict:
+        """
+        Everything needed to continue writing after a restart, as JSON-safe data
+        Call between documents, after flushing output to disk.
+        """
+        return {
+            'position': self.output.tell(),
+            'pages_id': self.pages_id,
+            'offsets': self.offsets,
+            'compressed': [[object_id, stream_id, index]
+                           for object_id, (stream_id, index) in self.compressed.items()],
+            'page_ids': self.page_ids,
+            'outline': self.outline,
+            'stream_ids': {key.hex(): object_id for key, object_id in self.stream_ids.items()},
+            'batch': [[object_id, base64.b64encode(data).decode()] for object_id, data in self._batch],
+            'stats': [self.dedup_streams, self.dedup_bytes, self.compression_saved],
+            'last_xref': self.last_xref,
+        }
+    
+    def _restore(self, state: dict) -> None:
+        self.pages_id = state['pages_id']
+        self.offsets = list(state['offsets'])
+        self.compressed = {object_id: (stream_id, index) for object_id, stream_id, index in state['compressed']}
+        self.page_ids = list(state['page_ids'])
+        self.outline = list(state['outline'])
+        self.stream_ids = {bytes.fromhex(key): object_id for key, object_id in state['stream_ids'].items()}
+        self._batch = [(object_id, base64.b64decode(data)) for object_id, data in state['batch']]
+        self.dedup_streams, self.dedup_bytes, self.compression_saved = state['stats']
+        self.last_xref = state.get('last_xref')
+        # Anything written after the checkpoint belongs to a document that did not finish
+        self.output.seek(state['position'])
+        self.output.truncate()
+    
+    def _reset_document(self) -> None:
+        self._id_map: Dict[Tuple[int, int], int] = {}  # Source reference -> output object number
+        self._pending: deque = deque()  # Source references allocated but not yet written
+        self._content_keys: Dict[Tuple[int, int], Optional[bytes]] = {}
+        self._new_hashes: List[bytes] = []
+    
+    def _allocate(self) -> int:
+        self.offsets.append(0)
+        return len(self.offsets) - 1
+    
+    def _write_direct(self, object_id: int, obj: PdfObject) -> None:
+        self.offsets[object_id] = self.output.tell()
+        self.output.write(f"{object_id} 0 obj\n".encode())
+        obj.write_to_stream(self.output, None)
+        self.output.write(b"\nendobj\n")
+    
+    def _write_object(self, object_id: int, obj: PdfObject) -> None:
+        if not self.object_streams:
+            self._write_direct(object_id, obj)
+            return
+        
+        if isinstance(obj, StreamObject):
+            if '/Filter' not in obj:
+                packed = zlib.compress(obj._data)
+                if len(packed) < len(obj._data):
+                    self.compression_saved += len(obj._data) - len(packed)
+                    obj._data = packed
+                    obj[NameObject('/Filter')] = NameObject('/FlateDecode')
+            self._write_direct(object_id, obj)
+            return
+        
+        buffer = io.BytesIO()
+        obj.write_to_stream(buffer, None)
+        self._write_serialized(object_id, buffer.getvalue())
+    
+    def _write_serialized(self, object_id: int, data: bytes) -> None:
+        """
+        Write a non-stream object that is already serialized
+        """
+        if not self.object_streams:
+            self.offsets[object_id] = self.output.tell()
+            self.output.write(b"%d 0 obj\n%s\nendobj\n" % (object_id, data))
+            return
+        
+        self._batch.append((object_id, data))
+        if len(self._batch) >= OBJECT_STREAM_SIZE:
+            self._flush_object_stream()
+    
+    def _flush_object_stream(self) -> None:
+        """
+        Pack the batched objects into one compressed object stream
+        """
+        if not self._batch:
+            return
+        
+        stream_id = self._allocate()
+        header, body = [], io.BytesIO()
+        for index, (object_id, data) in enumerate(self._batch):
+            header.append(f"{object_id} {body.tell()}")
+            body.write(data + b"\n")
+            self.compressed[object_id] = (stream_id, index)
+        header_bytes = (" ".join(header) + "\n").encode()
+        raw = header_bytes + body.getvalue()
+        
+        stream = StreamObject()
+        stream._data = zlib.compress(raw)
+        stream.update({
+            NameObject('/Type'): NameObject('/ObjStm'),
+            NameObject('/N'): NumberObject(len(self._batch)),
+            NameObject('/First'): NumberObject(len(header_bytes)),
+            NameObject('/Filter'): NameObject('/FlateDecode'),
+        })
+        # Each object would otherwise cost "N 0 obj"/"endobj" plus a 20-byte xref row
+        self.compression_saved += len(raw) + 36 * len(self._batch) - len(stream._data)
+        self._write_direct(stream_id, stream)
+        self._batch.clear()
+    
+    def _content_key(self, obj: PdfObject, visiting: set) -> Optional[bytes]:
+        """
+        Hash an object by content, following references, for stream deduplication
+        Returns None when the object cannot be compared by content (references to
+        pages, reference cycles).
+        """
+        if isinstance(obj, IndirectObject):
+            ref = (obj.idnum, obj.generation)
+            if ref in self._content_keys:
+                return self._content_keys[ref]
+            if ref in visiting:
+                return None
+            
+            visiting.add(ref)
+            target = obj.get_object()
+            if isinstance(target, DictionaryObject) and target.get('/Type') in ('/Pages', '/Page'):
+                key = None
+            else:
+                key = self._content_key(target, visiting)
+            visiting.discard(ref)
+            self._content_keys[ref] = key
+            return key
+        
+        digest = hashlib.sha256()
+        if isinstance(obj, DictionaryObject):
+            if isinstance(obj, StreamObject):
+                digest.update(b"S" + hashlib.sha256(obj._data).digest())
+            for name, value in sorted(obj.items(), key=lambda item: item[0]):
+                value_key = self._content_key(value, visiting)
+                if value_key is None:
+                    return None
+                digest.update(b"K" + name.encode() + value_key)
+        elif isinstance(obj, ArrayObject):
+            digest.update(b"A")
+            for value in obj:
+                value_key = self._content_key(value, visiting)
+                if value_key is None:
+                    return None
+                digest.update(value_key)
+        else:
+            buffer = io.BytesIO()
+            obj.write_to_stream(buffer, None)
+            digest.update(b"P" + buffer.getvalue())
+        return digest.digest()
+    
+    def _remap(self, obj: PdfObject) -> PdfObject:
+        """
+        Copy a direct object, renumbering indirect references into the output
+        Referenced objects are queued rather than followed, so recursion only goes
+        as deep as the nesting of direct objects.
+        """
+        if isinstance(obj, IndirectObject):
+            key = (obj.idnum, obj.generation)
+            if key not in self._id_map:
+                target = obj.get_object()
+                if isinstance(target, DictionaryObject) and target.get('/Type') in ('/Pages', '/Page'):
+                    # Page tree nodes and pages that are not being copied stay out
+                    return NullObject()
+                
+                content_key = None
+                if self.dedup and isinstance(target, StreamObject):
+                    content_key = self._content_key(obj, set())
+                    if content_key in self.stream_ids:
+                        self._id_map[key] = self.stream_ids[content_key]
+                        self.dedup_streams += 1
+                        self.dedup_bytes += len(target._data)
+                        return IndirectObject(self._id_map[key], 0, None)
+                
+                self._id_map[key] = self._allocate()
+                self._pending.append(obj)
+                if content_key is not None:
+                    self.stream_ids[content_key] = self._id_map[key]
+                    self._new_hashes.append(content_key)
+            return IndirectObject(self._id_map[key], 0, None)
+        
+        if isinstance(obj, StreamObject):
+            copy = StreamObject()
+            copy._data = obj._data
+        elif isinstance(obj, DictionaryObject):
+            copy = DictionaryObject()
+        elif isinstance(obj, ArrayObject):
+            return ArrayObject(self._remap(item) for item in obj)
+        else:
+            return obj
+        
+        for key, value in obj.items():
+            copy[NameObject(key)] = self._remap(value)
+        return copy
+    
+    def mark(self) -> tuple:
+        """
+        Snapshot of the output between documents, to pass to rollback()
+        """
+        return (self.output.tell(), len(self.offsets), len(self.page_ids), len(self.outline),
+                list(self._batch), len(self._new_hashes),
+                (self.dedup_streams, self.dedup_bytes, self.compression_saved))
+    
+    def rollback(self, mark: tuple) -> None:
+        """
+        Discard everything written since mark() was taken
+        """
+        position, objects, pages, outline, batch, hashes, stats = mark
+        self.output.seek(position)
+        self.output.truncate()
+        del self.offsets[objects:]
+        del self.page_ids[pages:]
+        del self.outline[outline:]
+        self._batch = batch
+        self.compressed = {object_id: entry for object_id, entry in self.compressed.items()
+                           if entry[0] < objects}
+        for content_key in self._new_hashes[hashes:]:
+            del self.stream_ids[content_key]
+        del self._new_hashes[hashes:]
+        self._id_map = {ref: object_id for ref, object_id in self._id_map.items() if object_id < objects}
+        self._pending.clear()
+        self.dedup_streams, self.dedup_bytes, self.compression_saved = stats
+    
+    def add_document(self, reader: PdfReader, page_indices: Optional[Sequence[int]] = None,
+                     title: Optional[str] = None, outline: bool = True,
+                     new_document: bool = True) -> int:
+        """
+        Append pages of a document (all pages by default)
+        If copying fails part-way the output is rolled back to where the document
+        started, so a broken input never leaves dangling objects behind.
+        
+        title: add a bookmark for the document's first page, with the document's
+               own bookmarks nested under it
+        outline: keep the document's bookmarks (at the top level when no title)
+        new_document: False continues the previous call's document, so objects
+               shared with pages added earlier (fonts, images) are not copied again
+        Returns: number of pages added
+        """
+        indices = range(len(reader.pages)) if page_indices is None else page_indices
+        if new_document:
+            self._reset_document()
+        start = self.mark()
+        start_pages = len(self.page_ids)
+        
+        try:
+            pages = [reader.pages[i] for i in indices]
+            
+            # Number the selected pages first so links between them resolve to the copies
+            page_ids = []
+            for page in pages:
+                page_id = self._allocate()
+                if page.indirect_reference is not None:
+                    ref = page.indirect_reference
+                    self._id_map[(ref.idnum, ref.generation)] = page_id
+                page_ids.append(page_id)
+            
+            for page, page_id in zip(pages, page_ids):
+                copy = DictionaryObject()
+                for key, value in page.items():
+                    if key != '/Parent':
+                        copy[NameObject(key)] = self._remap(value)
+                copy[NameObject('/Parent')] = IndirectObject(self.pages_id, 0, None)
+                self._write_object(page_id, copy)
+                
+                # Drain everything this page references before moving on
+                while self._pending:
+                    ref = self._pending.popleft()
+                    self._write_object(self._id_map[(ref.idnum, ref.generation)],
+                                       self._remap(ref.get_object()))
+            
+            if outline or title is not None:
+                entries = []
+                if outline:
+                    page_map = {index: start_pages + position for position, index in enumerate(indices)}
+                    entries = read_outline(reader, page_map)
+                if title is not None and page_ids:
+                    entries = [[title, start_pages, entries]]
+                self.outline.extend(entries)
+            
+            self.page_ids.extend(page_ids)
+            return len(page_ids)
+        
+        except Exception:
+            self.rollback(start)
+            raise
+    
+    def _xref_sections(self) -> List[Tuple[int, int]]:
+        """
+        (first object number, count) runs the cross-reference section must list
+        A full file lists every object; an incremental update only the rewritten
+        page tree root and the objects added since the last close.
+        """
+        if self.incremental_base is None:
+            return [(0, len(self.offsets))]
+        sections = [(self.pages_id, 1)]
+        if self.incremental_base < len(self.offsets):
+            sections.append((self.incremental_base, len(self.offsets) - self.incremental_base))
+        return sections
+    
+    def _write_xref_table(self, trailer: DictionaryObject) -> int:
+        xref_offset = self.output.tell()
+        lines = ["xref\n"]
+        for first, count in self._xref_sections():
+            lines.append(f"{first} {count}\n")
+            for object_id in range(first, first + count):
+                if object_id == 0:
+                    lines.append("0000000000 65535 f \n")
+                else:
+                    lines.append(f"{self.offsets[object_id]:010d} 00000 n \n")
+        self.output.write("".join(lines).encode())
+        self.output.write(b"trailer\n")
+        trailer.write_to_stream(self.output, None)
+        return xref_offset
+    
+    def _write_xref_stream(self, trailer: DictionaryObject) -> int:
+        xref_id = self._allocate()
+        xref_offset = self.output.tell()
+        self.offsets[xref_id] = xref_offset
+        width = max(4, (xref_offset.bit_length() + 7) // 8)
+        
+        rows = []
+        sections = self._xref_sections()
+        object_ids = [object_id for first, count in sections for object_id in range(first, first + count)]
+        for object_id in object_ids:
+            if object_id == 0:
+                rows.append(b"\x00" + bytes(width) + b"\xff\xff")
+            elif object_id in self.compressed:
+                stream_id, index = self.compressed[object_id]
+                rows.append(b"\x02" + stream_id.to_bytes(width, 'big') + index.to_bytes(2, 'big'))
+            else:
+                rows.append(b"\x01" + self.offsets[object_id].to_bytes(width, 'big') + b"\x00\x00")
+        
+        stream = StreamObject()
+        stream._data = zlib.compress(b"".join(rows))
+        stream.update(trailer)
+        stream.update({
+            NameObject('/Type'): NameObject('/XRef'),
+            NameObject('/Size'): NumberObject(len(self.offsets)),
+            NameObject('/W'): ArrayObject([NumberObject(1), NumberObject(width), NumberObject(2)]),
+            NameObject('/Index'): ArrayObject(NumberObject(number) for section in sections for number in section),
+            NameObject('/Filter'): NameObject('/FlateDecode'),
+        })
+        self._write_direct(xref_id, stream)
+        return xref_offset
+    
+    def _write_outline_items(self, entries: List[list], parent_id: int) -> Tuple[int, int]:
+        """
+        Write one level of bookmarks (and, recursively, their children)
+        Entries start collapsed, so a file's own bookmarks show when it is opened.
+        Items are formatted directly: a merge of thousands of files has as many
+        bookmarks, and building a DictionaryObject for each costs more than the
+        rest of close().
+        Returns: (first_id, last_id) of the level
+        """
+        item_ids = [self._allocate() for _ in entries]
+        for i, (title, page, children) in enumerate(entries):
+            buffer = io.BytesIO()
+            TextStringObject(title).write_to_stream(buffer, None)
+            parts = [b"<< /Title %s /Parent %d 0 R /Dest [%d 0 R /Fit]" % (
+                buffer.getvalue(), parent_id, self.page_ids[page])]
+            if i > 0:
+                parts.append(b"/Prev %d 0 R" % item_ids[i - 1])
+            if i + 1 < len(item_ids):
+                parts.append(b"/Next %d 0 R" % item_ids[i + 1])
+            if children:
+                first, last = self._write_outline_items(children, item_ids[i])
+                parts.append(b"/First %d 0 R /Last %d 0 R /Count %d" % (first, last, -len(children)))
+            parts.append(b">>")
+            self._write_serialized(item_ids[i], b" ".join(parts))
+        return item_ids[0], item_ids[-1]
+    
+    def close(self, metadata: Optional[Dict[str, str]] = None) -> None:
+        """
+        Write the page tree, catalog, document info, cross-reference table and trailer
+        """
+        kids = ArrayObject(IndirectObject(page_id, 0, None) for page_id in self.page_ids)
+        pages = DictionaryObject({
+            NameObject('/Type'): NameObject('/Pages'),
+            NameObject('/Kids'): kids,
+            NameObject('/Count'): NumberObject(len(self.page_ids)),
+        })
+        self._write_object(self.pages_id, pages)
+        
+        catalog = DictionaryObject({
+            NameObject('/Type'): NameObject('/Catalog'),
+            NameObject('/Pages'): IndirectObject(self.pages_id, 0, None),
+        })
+        if self.outline:
+            outlines_id = self._allocate()
+            first, last = self._write_outline_items(self.outline, outlines_id)
+            self._write_object(outlines_id, DictionaryObject({
+                NameObject('/Type'): NameObject('/Outlines'),
+                NameObject('/First'): IndirectObject(first, 0, None),
+                NameObject('/Last'): IndirectObject(last, 0, None),
+                NameObject('/Count'): NumberObject(len(self.outline)),
+            }))
+            catalog[NameObject('/Outlines')] = IndirectObject(outlines_id, 0, None)
+            catalog[NameObject('/PageMode')] = NameObject('/UseOutlines')
+        
+        catalog_id = self._allocate()
+        self._write_object(catalog_id, catalog)
+        
+        trailer = DictionaryObject({NameObject('/Root'): IndirectObject(catalog_id, 0, None)})
+        if metadata:
+            info_id = self._allocate()
+            self._write_object(info_id, DictionaryObject({
+                NameObject(key): TextStringObject(value) for key, value in metadata.items()
+            }))
+            trailer[NameObject('/Info')] = IndirectObject(info_id, 0, None)
+        if self.incremental_base is not None:
+            trailer[NameObject('/Prev')] = NumberObject(self.last_xref)
+        
+        if self.object_streams:
+            self._flush_object_stream()
+            xref_offset = self._write_xref_stream(trailer)
+        else:
+            trailer[NameObject('/Size')] = NumberObject(len(self.offsets))
+            xref_offset = self._write_xref_table(trailer)
+        
+        self.output.write(f"\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        self.output.flush()
+        self.last_xref = xref_offset
+    
+    def savings(self) -> Dict[str, int]:
+        """
+        Bytes saved by deduplication and compression so far
+        """
+        return {'dedup_streams': self.dedup_streams, 'dedup_bytes': self.dedup_bytes,
+                'compression_bytes': self.compression_saved}
+
+def print_savings(savings: Dict[str, int]) -> None:
+    """
+    Print the bytes saved by deduplication, object stream compression and image optimization
+    """
+    if savings.get('dedup_streams'):
+        print(f"Deduplicated {savings['dedup_streams']} shared streams, "
+              f"saved {savings['dedup_bytes'] / (1024 * 1024):.2f} MB")
+    if savings.get('compression_bytes'):
+        print(f"Object stream compression saved {savings['compression_bytes'] / (1024 * 1024):.2f} MB")
+    if savings.get('optimized_images'):
+        print(f"Image optimization recompressed {savings['optimized_images']} images, "
+              f"saved {savings['optimized_bytes'] / (1024 * 1024):.2f} MB")
+
+def get_merge_metadata(output_path: Path) -> Dict[str, str]:
+    """
+    Document info written into merged PDFs
+    """
+    return {
+        '/Title': output_path.stem,
+        '/Creator': 'PDMUGGY',
+        '/Producer': 'PDMUGGY',
+        '/CreationDate': datetime.datetime.now().strftime("D:%Y%m%d%H%M%S")
+    }
+
+def open_reader(file: BinaryIO) -> PdfReader:
+    """
+    Open a PDF for reading, unlocking files encrypted with an empty user password
+    """
+    reader = PdfReader(file)
+    if reader.is_encrypted:
+        reader.decrypt('')
+    return reader
+
+class OptimizeSettings(NamedTuple):
+    """
+    Image recompression applied to inputs before they are merged
+    """
+    dpi: int = DEFAULT_OPTIMIZE_DPI
+    quality: int = DEFAULT_OPTIMIZE_QUALITY
+
+class OptimizeResult(NamedTuple):
+    """
+    An optimized input: the rewritten PDF (None when nothing got smaller)
+    """
+    data: Optional[bytes]
+    images: int
+    bytes_before: int
+    bytes_after: int
+
+def classify_image(img: 'Image.Image') -> str:
+    """
+    Return 'bilevel', 'gray' or 'color' for an RGB or L image
+    Judged on a nearest-neighbour sample, which keeps the original pixel
+    values (a smoothed thumbnail would turn thin black text into gray).
+    """
+    step = max(1, max(img.size) // 512)
+    sample = img.resize((max(1, img.width // step), max(1, img.height // step)), Image.NEAREST)
+    if sample.mode == 'RGB':
+        r, g, b = sample.split()
+        spread = ImageChops.lighter(ImageChops.difference(r, g), ImageChops.difference(g, b))
+        if spread.getextrema()[1] > GRAY_TOLERANCE:
+            return 'color'
+        sample = sample.convert('L')
+    
+    histogram = sample.histogram()
+    extremes = sum(histogram[:32]) + sum(histogram[224:])
+    return 'bilevel' if extremes >= BILEVEL_SHARE * sum(histogram) else 'gray'
+
+def decode_image(image: StreamObject) -> Optional['Image.Image']:
+    """
+    Decode an image XObject that can be safely re-encoded, or return None
+    Only 8-bit DeviceRGB/DeviceGray images in JPEG or Flate are handled; masks,
+    decode arrays, colour-keyed and other colour spaces are left alone.
+    """
+    if image.get('/ImageMask') or '/Mask' in image or '/Decode' in image:
+        return None
+    if image.get('/BitsPerComponent') != 8:
+        return None
+    color_space = image.get('/ColorSpace')
+    mode = {'/DeviceRGB': 'RGB', '/DeviceGray': 'L'}.get(color_space if isinstance(color_space, str) else None)
+    if mode is None:
+        return None
+    
+    filters = image.get('/Filter')
+    if isinstance(filters, ArrayObject):
+        filters = filters[0] if len(filters) == 1 else None
+    size = (int(image['/Width']), int(image['/Height']))
+    
+    if filters == '/DCTDecode':
+        img = Image.open(io.BytesIO(image._data))
+        img.load()
+        return img if img.mode == mode else None
+    if filters == '/FlateDecode':
+        return Image.frombytes(mode, size, image.get_data())
+    return None
+
+def recompress_image(image: StreamObject, image_dpi: float, settings: OptimizeSettings) -> int:
+    """
+    Downsample and re-encode one image XObject in place
+    image_dpi is the image's estimated resolution on the page. Bilevel images
+    keep at least BILEVEL_MIN_DPI, since thin strokes of text vanish below it.
+    Returns: bytes saved (0 when the image was left unchanged)
+    """
+    img = decode_image(image)
+    if img is None:
+        return 0
+    
+    kind = classify_image(img)
+    target_dpi = max(settings.dpi, BILEVEL_MIN_DPI) if kind == 'bilevel' else settings.dpi
+    if image_dpi > target_dpi:
+        scale = target_dpi / image_dpi
+        img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.LANCZOS)
+    
+    if kind == 'bilevel':
+        img = img.convert('L').point(lambda v: 255 if v >= 128 else 0).convert('1')
+        data = zlib.compress(img.tobytes(), 9)
+        updates = {'/Filter': NameObject('/FlateDecode'), '/ColorSpace': NameObject('/DeviceGray'),
+                   '/BitsPerComponent': NumberObject(1)}
+    else:
+        if kind == 'gray':
+            img = img.convert('L')
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=settings.quality, optimize=True)
+        data = buffer.getvalue()
+        updates = {'/Filter': NameObject('/DCTDecode'), '/BitsPerComponent': NumberObject(8),
+                   '/ColorSpace': NameObject('/DeviceGray' if img.mode == 'L' else '/DeviceRGB')}
+    
+    saved = len(image._data) - len(data)
+    if saved <= 0:
+        return 0
+    
+    image._data = data
+    image.pop('/DecodeParms', None)
+    image[NameObject('/Width')] = NumberObject(img.width)
+    image[NameObject('/Height')] = NumberObject(img.height)
+    for key, value in updates.items():
+        image[NameObject(key)] = value
+    return saved
+
+def iter_images(resources: Any, seen: set) -> Iterator[StreamObject]:
+    """
+    Yield the image XObjects reachable from a resource dictionary, once each
+    Form XObjects are searched recursively.
+    """
+    resources = resources.get_object() if resources is not None else None
+    if not isinstance(resources, DictionaryObject):
+        return
+    xobjects = resources.get('/XObject')
+    if not isinstance(xobjects, DictionaryObject):
+        return
+    for ref in xobjects.values():
+        key = (ref.idnum, ref.generation) if isinstance(ref, IndirectObject) else id(ref)
+        if key in seen:
+            continue
+        seen.add(key)
+        xobject = ref.get_object()
+        if not isinstance(xobject, StreamObject):
+            continue
+        if xobject.get('/Subtype') == '/Image':
+            yield xobject
+        elif xobject.get('/Subtype') == '/Form':
+            yield from iter_images(xobject.get('/Resources'), seen)
+
+def optimize_pdf(pdf_file: str, settings: OptimizeSettings) -> OptimizeResult:
+    """
+    Recompress the images of one PDF (runs inside the worker processes)
+    An image's resolution is judged against the page it is on, as if it
+    covered the whole page; a smaller placement means a higher real DPI, so
+    this never downsamples below the target.
+    """
+    if Image is None:
+        raise RuntimeError("image optimization needs Pillow (pip install pillow)")
+    
+    bytes_before = os.path.getsize(pdf_file)
+    images = 0
+    with open(pdf_file, 'rb') as file:
+        reader = open_reader(file)
+        seen: set = set()
+        for page in reader.pages:
+            box = page.mediabox
+            page_inches = max(float(box.width) / 72, float(box.height) / 72, 1 / 72)
+            for image in iter_images(page.get('/Resources'), seen):
+                try:
+                    pixels = max(int(image['/Width']), int(image['/Height']))
+                    if recompress_image(image, pixels / page_inches, settings):
+                        images += 1
+                except Exception:
+                    continue  # Unusual encodings are copied unchanged
+        
+        if not images:
+            return OptimizeResult(None, 0, bytes_before, bytes_before)
+        
+        # The modified images live in the reader's object cache, so copying the
+        # document picks them up
+        output = io.BytesIO()
+        writer = StreamingPdfWriter(output)
+        writer.add_document(reader)
+        writer.close()
+    
+    data = output.getvalue()
+    if len(data) >= bytes_before:
+        return OptimizeResult(None, 0, bytes_before, bytes_before)
+    return OptimizeResult(data, images, bytes_before, len(data))
+
+def open_optimized(pdf_file: Path, result: Callable[[], OptimizeResult], report: Dict[str, int]) -> BinaryIO:
+    """
+    Open an input through its optimization result, reporting the bytes saved
+    """
+    optimized = result()
+    if optimized.data is None:
+        return open(pdf_file, 'rb')
+    saved = optimized.bytes_before - optimized.bytes_after
+    report['optimized_images'] = report.get('optimized_images', 0) + optimized.images
+    report['optimized_bytes'] = report.get('optimized_bytes', 0) + saved
+    print(f"      Optimized {optimized.images} images: {optimized.bytes_before / 1024:.0f} KB → "
+          f"{optimized.bytes_after / 1024:.0f} KB (-{saved / optimized.bytes_before:.0%})")
+    return io.BytesIO(optimized.data)
+
+def iter_inputs(pdf_files: Sequence[Path], optimize: Optional[OptimizeSettings] = None,
+                workers: Optional[int] = None,
+                report: Optional[Dict[str, int]] = None) -> Iterator[Tuple[Path, Callable[[], BinaryIO]]]:
+    """
+    Yield (pdf_file, open_input) for each input, in order
+    Without optimize, open_input just opens the file. With it, inputs are
+    optimized in a process pool a few files ahead of the caller (workers=0
+    optimizes inline, for callers that already run in a worker), and
+    open_input returns the optimized PDF from memory.
+    Errors surface when open_input is called, so they are per-file.
+    """
+    report = {} if report is None else report
+    if optimize is None:
+        for pdf_file in pdf_files:
+            yield pdf_file, partial(open, pdf_file, 'rb')
+        return
+    
+    if workers == 0:
+        for pdf_file in pdf_files:
+            yield pdf_file, partial(open_optimized, pdf_file, partial(optimize_pdf, str(pdf_file), optimize), report)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ahead = OPTIMIZE_AHEAD_PER_WORKER * (workers or os.cpu_count() or 1)
+        remaining = iter(pdf_files)
+        queued: deque = deque()
+        for pdf_file in remaining:
+            queued.append((pdf_file, pool.submit(optimize_pdf, str(pdf_file), optimize)))
+            if len(queued) >= ahead:
+                break
+        while queued:
+            pdf_file, future = queued.popleft()
+            next_file = next(remaining, None)
+            if next_file is not None:
+                queued.append((next_file, pool.submit(optimize_pdf, str(next_file), optimize)))
+            yield pdf_file, partial(open_optimized, pdf_file, future.result, report)
+
+def get_temp_path(output_path: Path) -> Path:
+    """
+    Hidden file next to the output that is written first and renamed into place
+    """
+    return output_path.with_name(f".{output_path.name}.part")
+
+def get_checkpoint_path(output_path: Path) -> Path:
+    return output_path.with_name(f".{output_path.name}.checkpoint.json")
+
+def finish_output(temp_path: Path, output_path: Path) -> None:
+    """
+    Make the written temp file durable and atomically rename it to the output
+    A crash therefore leaves either the old output or the complete new one.
+    """
+    with open(temp_path, 'rb+') as file:
+        os.fsync(file.fileno())
+    os.replace(temp_path, output_path)
+
+def get_state_path(output_path: Path) -> Path:
+    return output_path.with_name(f".{output_path.name}.pdmuggy.json")
+
+def get_fingerprint(pdf_file: Path) -> str:
+    """
+    Identity of an input file: resolved path, size and modification time
+    """
+    stat = pdf_file.stat()
+    return f"{pdf_file.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+
+def input_fingerprint(digest, pdf_file: Path) -> None:
+    """
+    Add the identity of an input to a running hash
+    """
+    digest.update(f"{get_fingerprint(pdf_file)}\n".encode())
+
+def load_checkpoint(checkpoint_path: Path, temp_path: Path, pdf_files: List[Path],
+                    options: dict) -> Optional[dict]:
+    """
+    Return a checkpoint that can be resumed for this merge, or None
+    It is only used when the options match and the inputs it completed are
+    still the first inputs of pdf_files, unchanged.
+    """
+    try:
+        checkpoint = json.loads(checkpoint_path.read_text())
+        if checkpoint['options'] != options or 'failed' not in checkpoint or not temp_path.exists():
+            return None
+        if checkpoint['done'] > len(pdf_files):
+            return None
+        if temp_path.stat().st_size < checkpoint['writer']['position']:
+            return None
+        
+        digest = hashlib.sha256()
+        for pdf_file in pdf_files[:checkpoint['done']]:
+            input_fingerprint(digest, pdf_file)
+        if digest.hexdigest() != checkpoint['inputs_sha256']:
+            return None
+        return checkpoint
+    except (OSError, ValueError, KeyError):
+        return None
+
+def save_checkpoint(checkpoint_path: Path, writer: StreamingPdfWriter, done: int,
+                    digest, options: dict, failed: List[str]) -> None:
+    """
+    Flush the partial output to disk, then record how far the merge got
+    The output is synced first, so a checkpoint never points past durable data.
+    """
+    writer.output.flush()
+    os.fsync(writer.output.fileno())
+    temp_checkpoint = checkpoint_path.with_suffix('.tmp')
+    temp_checkpoint.write_text(json.dumps({
+        'options': options,
+        'done': done,
+        'inputs_sha256': digest.hexdigest(),
+        'failed': failed,
+        'writer': writer.checkpoint_state(),
+    }))
+    os.replace(temp_checkpoint, checkpoint_path)
+
+def save_merge_state(state_path: Path, output_path: Path, writer_state: dict,
+                     fingerprints: List[str], options: dict, failed: Sequence[str] = ()) -> None:
+    """
+    Record what output_path was built from, for the next incremental merge
+    failed lists the fingerprints of inputs that could not be added; while
+    there are any, the next incremental merge rebuilds instead of appending.
+    """
+    stat = output_path.stat()
+    temp_state = state_path.with_suffix('.tmp')
+    temp_state.write_text(json.dumps({
+        'options': options,
+        'inputs': fingerprints,
+        'size': writer_state['position'],
+        'mtime_ns': stat.st_mtime_ns,
+        'failed': list(failed),
+        'writer': writer_state,
+    }))
+    os.replace(temp_state, state_path)
+
+def load_merge_state(state_path: Path, output_path: Path, options: dict) -> Optional[dict]:
+    """
+    Return the recorded state of output_path if it can be appended to, or None
+    The output must be exactly as the last merge left it.
+    """
+    try:
+        state = json.loads(state_path.read_text())
+        stat = output_path.stat()
+    except (OSError, ValueError):
+        return None
+    if state.get('options') != options or 'failed' not in state:
+        return None
+    if stat.st_size != state['size'] or stat.st_mtime_ns != state['mtime_ns']:
+        return None
+    return state
+
+def merge_pdfs_streaming(pdf_files: List[Path], output_path: Path, dedup: bool = False,
+                         compress: bool = False, bookmarks: bool = True,
+                         state_path: Optional[Path] = None, optimize: Optional[OptimizeSettings] = None,
+                         workers: Optional[int] = None) -> bool:
+    """
+    Merge multiple PDF files with bounded memory (see StreamingPdfWriter)
+    Each input stays open only while its objects are being copied out.
+    dedup and compress enable shared-stream deduplication and object streams,
+    bookmarks adds an outline entry per input with its own bookmarks nested.
+    optimize recompresses images in worker processes ahead of the writer.
+    
+    The merge is written to a hidden .part file and checkpointed every
+    CHECKPOINT_INTERVAL seconds. If it is interrupted, running the same merge
+    again resumes after the last checkpointed input; the finished file is
+    renamed to output_path only once it is complete.
+    With state_path, the inputs and writer state are recorded afterwards so
+    the next run can append to the output (see merge_pdfs_incremental).
+    """
+    temp_path = get_temp_path(output_path)
+    checkpoint_path = get_checkpoint_path(output_path)
+    options = {'dedup': dedup, 'compress': compress, 'bookmarks': bookmarks,
+               'optimize': list(optimize) if optimize else None}
+    report: Dict[str, int] = {}
+    
+    try:
+        checkpoint = load_checkpoint(checkpoint_path, temp_path, pdf_files, options)
+        digest = hashlib.sha256()
+        if checkpoint:
+            done, failed = checkpoint['done'], checkpoint['failed']
+            for pdf_file in pdf_files[:done]:
+                input_fingerprint(digest, pdf_file)
+            print(f"Resuming merge after {done} of {len(pdf_files)} files (streaming)...")
+        else:
+            done, failed = 0, []
+            print(f"Merging {len(pdf_files)} PDF files (streaming)...")
+        
+        with open(temp_path, 'r+b' if checkpoint else 'wb') as output_file:
+            if checkpoint:
+                writer = StreamingPdfWriter(output_file, dedup, compress, checkpoint['writer'])
+            else:
+                writer = StreamingPdfWriter(output_file, dedup, compress)
+            last_checkpoint = time.monotonic()
+            
+            inputs = iter_inputs(pdf_files[done:], optimize, workers, report)
+            for i, (pdf_file, open_input) in enumerate(inputs, done + 1):
+                try:
+                    print(f"  [{i}/{len(pdf_files)}] Adding: {pdf_file.name}")
+                    with open_input() as file:
+                        writer.add_document(open_reader(file), title=pdf_file.stem if bookmarks else None,
+                                            outline=bookmarks)
+                except Exception as e:
+                    print(f"  ⚠️  Warning: Could not process {pdf_file.name}: {e}")
+                    failed.append(get_fingerprint(pdf_file))
+                
+                input_fingerprint(digest, pdf_file)
+                if time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+                    save_checkpoint(checkpoint_path, writer, i, digest, options, failed)
+                    last_checkpoint = time.monotonic()
+            
+            writer.close(get_merge_metadata(output_path))
+            final_state = writer.checkpoint_state()
+        
+        finish_output(temp_path, output_path)
+        checkpoint_path.unlink(missing_ok=True)
+        if state_path is not None:
+            save_merge_state(state_path, output_path, final_state,
+                             [get_fingerprint(pdf_file) for pdf_file in pdf_files], options, failed)
+        print_savings({**writer.savings(), **report})
+        return True
+        
+    except Exception as e:
+        print(f"Error during merge: {e}")
+        if checkpoint_path.exists():
+            print("Progress was checkpointed - run the same merge again to resume")
+        return False
+
+def merge_pdfs_incremental(pdf_files: List[Path], output_path: Path, dedup: bool = False,
+                           compress: bool = False, bookmarks: bool = True,
+                           optimize: Optional[OptimizeSettings] = None, workers: Optional[int] = None) -> bool:
+    """
+    Append new inputs to the output of the previous merge instead of rebuilding it
+    When the inputs are the previous inputs (unchanged) plus new files at the
+    end, only the new pages, the rewritten page tree, outline and catalog are
+    appended as a PDF incremental update section. Otherwise, or when an input
+    of the previous merge could not be added, the output is rebuilt with the
+    streaming engine and its state recorded for next time.
+    
+    The update is appended to a copy of the output in the hidden .part file,
+    which replaces the output once complete, so an interrupted update leaves
+    the previous output untouched.
+    """
+    state_path = get_state_path(output_path)
+    options = {'dedup': dedup, 'compress': compress, 'bookmarks': bookmarks,
+               'optimize': list(optimize) if optimize else None}
+    report: Dict[str, int] = {}
+    fingerprints = [get_fingerprint(pdf_file) for pdf_file in pdf_files]
+    
+    state = load_merge_state(state_path, output_path, options)
+    if state is None or fingerprints[:len(state['inputs'])] != state['inputs'] or state['failed']:
+        if state is not None and state['failed']:
+            print(f"{len(state['failed'])} inputs could not be added last time - rebuilding the output")
+        elif state_path.exists():
+            print("Earlier inputs or options changed - rebuilding the output")
+        else:
+            print("No previous incremental merge found - building the output")
+        return merge_pdfs_streaming(pdf_files, output_path, dedup, compress, bookmarks, state_path,
+                                    optimize, workers)
+    
+    new_files = pdf_files[len(state['inputs']):]
+    if not new_files:
+        print(f"Output is up to date ({len(pdf_files)} files already merged)")
+        return True
+    
+    temp_path = get_temp_path(output_path)
+    failed = []
+    try:
+        print(f"Appending {len(new_files)} new PDF files as an incremental update...")
+        shutil.copyfile(output_path, temp_path)
+        
+        with open(temp_path, 'r+b') as output_file:
+            writer = StreamingPdfWriter(output_file, dedup, compress, state['writer'], incremental=True)
+            inputs = iter_inputs(new_files, optimize, workers, report)
+            for i, (pdf_file, open_input) in enumerate(inputs, len(state['inputs']) + 1):
+                try:
+                    print(f"  [{i}/{len(pdf_files)}] Adding: {pdf_file.name}")
+                    with open_input() as file:
+                        writer.add_document(open_reader(file), title=pdf_file.stem if bookmarks else None,
+                                            outline=bookmarks)
+                except Exception as e:
+                    print(f"  ⚠️  Warning: Could not process {pdf_file.name}: {e}")
+                    failed.append(get_fingerprint(pdf_file))
+            
+            writer.close(get_merge_metadata(output_path))
+            final_state = writer.checkpoint_state()
+        
+        finish_output(temp_path, output_path)
+        save_merge_state(state_path, output_path, final_state, fingerprints, options, failed)
+        print_savings({**writer.savings(), **report})
+        return True
+        
+    except Exception as e:
+        print(f"Error during merge: {e}")
+        temp_path.unlink(missing_ok=True)
+        return False
+
+def merge_group(pdf_files: List[str], output_path: str,
+                metadata: Optional[Dict[str, str]] = None, dedup: bool = False,
+                compress: bool = False, bookmarks: bool = True, titled: bool = True,
+                optimize: Optional[OptimizeSettings] = None) -> Tuple[int, List[str], Dict[str, int]]:
+    """
+    Streaming-merge one group of PDFs into output_path (runs inside the worker processes)
+    Unreadable inputs are skipped, as in the serial merge.
+    With bookmarks, each input gets an outline entry if titled, otherwise only
+    its existing outline is carried over (intermediates already have entries).
+    optimize recompresses images inline (this already runs in a worker).
+    Returns: (pages_written, failure_messages, savings)
+    """
+    failures = []
+    report: Dict[str, int] = {}
+    with open(output_path, 'wb') as output_file:
+        writer = StreamingPdfWriter(output_file, dedup, compress)
+        for pdf_file, open_input in iter_inputs([Path(pdf_file) for pdf_file in pdf_files], optimize, 0, report):
+            try:
+                with open_input() as file:
+                    title = Path(pdf_file).stem if bookmarks and titled else None
+                    writer.add_document(open_reader(file), title=title, outline=bookmarks)
+            except Exception as e:
+                failures.append(f"{Path(pdf_file).name}: {e}")
+        writer.close(metadata)
+    return len(writer.page_ids), failures, {**writer.savings(), **report}
+
+def merge_pdfs_tree(pdf_files: List[Path], output_path: Path,
+                    group_size: int = DEFAULT_GROUP_SIZE, workers: Optional[int] = None,
+                    dedup: bool = False, compress: bool = False, bookmarks: bool = True,
+                    optimize: Optional[OptimizeSettings] = None) -> bool:
+    """
+    Merge PDFs by divide and conquer across worker processes
+    Consecutive groups of group_size files are merged into numbered intermediate
+    files in parallel, then the intermediates are grouped and merged again until
+    one level fits in a single group, which is merged into the output. Groups are
+    always consecutive runs of the sorted list, so page order is exactly the
+    natural_sort_key order of the inputs.
+    Deduplication runs at every level, so streams shared across groups are
+    collapsed by the merges above them; intermediates are never compressed.
+    Images are optimized by the first level only.
+    """
+    group_size = max(2, group_size)
+    savings: Dict[str, int] = {}
+    
+    try:
+        print(f"Merging {len(pdf_files)} PDF files (tree, groups of {group_size})...")
+        current = [str(pdf_file) for pdf_file in pdf_files]
+        
+        with tempfile.TemporaryDirectory(prefix='.pdmuggy_', dir=output_path.parent) as temp_dir, \
+                ProcessPoolExecutor(max_workers=workers) as pool:
+            level = 0
+            while len(current) > group_size:
+                level += 1
+                groups = [current[i:i + group_size] for i in range(0, len(current), group_size)]
+                outputs = [str(Path(temp_dir) / f"level{level}_{i:06d}.pdf") for i in range(len(groups))]
+                print(f"  Level {level}: {len(current)} files → {len(groups)} intermediates")
+                
+                merge = partial(merge_group, metadata=None, dedup=dedup, bookmarks=bookmarks,
+                                titled=level == 1, optimize=optimize if level == 1 else None)
+                for _, failures, group_savings in pool.map(merge, groups, outputs):
+                    for failure in failures:
+                        print(f"  ⚠️  Warning: Could not process {failure}")
+                    for key, value in group_savings.items():
+                        savings[key] = savings.get(key, 0) + value
+                
+                # Intermediates of the previous level are no longer needed
+                if level > 1:
+                    for intermediate in current:
+                        os.remove(intermediate)
+                current = outputs
+            
+            print(f"  Final: {len(current)} files → {output_path.name}")
+            temp_path = get_temp_path(output_path)
+            _, failures, final_savings = merge_group(current, str(temp_path), get_merge_metadata(output_path),
+                                                     dedup, compress, bookmarks, titled=level == 0,
+                                                     optimize=optimize if level == 0 else None)
+            finish_output(temp_path, output_path)
+            for failure in failures:
+                print(f"  ⚠️  Warning: Could not process {failure}")
+            for key, value in final_savings.items():
+                savings[key] = savings.get(key, 0) + value
+        
+        print_savings(savings)
+        return True
+        
+    except Exception as e:
+        print(f"Error during merge: {e}")
+        get_temp_path(output_path).unlink(missing_ok=True)
+        return False
+
+def merge_pdfs(pdf_files: List[Path], output_path: Path, streaming: bool = False,
+               tree: bool = False, group_size: int = DEFAULT_GROUP_SIZE,
+               workers: Optional[int] = None, dedup: bool = False, compress: bool = False,
+               bookmarks: bool = True, incremental: bool = False,
+               optimize: Optional[OptimizeSettings] = None) -> bool:
     """
     Merge multiple PDF files into a single PDF
+    With streaming=True the low-memory engine is used (see merge_pdfs_streaming),
+    with tree=True groups are merged in parallel processes (see merge_pdfs_tree).
+    dedup and compress are streaming-engine features and imply streaming=True.
+    bookmarks adds an outline entry per input file, keeping the file's own outline.
+    incremental appends new inputs to the previous output (see merge_pdfs_incremental).
+    optimize recompresses embedded images first (see optimize_pdf).
+    Only the streaming engine can resume an interrupted merge, so a classic merge
+    of more than RESUMABLE_INPUTS files, or of an output with a checkpoint left by
+    an interrupted streaming run, is streamed too.
     """
+    if incremental:
+        return merge_pdfs_incremental(pdf_files, output_path, dedup, compress, bookmarks, optimize, workers)
+    checkpointed = get_checkpoint_path(output_path).exists()
+    if tree:
+        if checkpointed or len(pdf_files) > RESUMABLE_INPUTS:
+            print("Note: a tree merge starts over if interrupted - use --streaming for a resumable merge")
+        return merge_pdfs_tree(pdf_files, output_path, group_size, workers, dedup, compress, bookmarks,
+                               optimize)
+    if not streaming and (checkpointed or len(pdf_files) > RESUMABLE_INPUTS):
+        streaming = True
+        print("Using the streaming engine so the merge can be resumed if interrupted")
+    if streaming or dedup or compress:
+        return merge_pdfs_streaming(pdf_files, output_path, dedup, compress, bookmarks,
+                                    optimize=optimize, workers=workers)
+    
     try:
         writer = PdfWriter()
+        report: Dict[str, int] = {}
         
         print(f"Merging {len(pdf_files)} PDF files...")
         
-        for i, pdf_file in enumerate(pdf_files, 1):
+        for i, (pdf_file, open_input) in enumerate(iter_inputs(pdf_files, optimize, workers, report), 1):
             try:
                 print(f"  [{i}/{len(pdf_files)}] Adding: {pdf_file.name}")
                 
-                with open(pdf_file, 'rb') as file:
+                with open_input() as file:
                     reader = PdfReader(file)
+                    start_page = len(writer.pages)
                     
                     # Add all pages from this PDF
                     for page_num in range(len(reader.pages)):
                         page = reader.pages[page_num]
                         writer.add_page(page)
+                    
+                    # Bookmark the file, with its own bookmarks shifted to the new pages
+                    if bookmarks and len(reader.pages):
+                        page_map = {n: start_page + n for n in range(len(reader.pages))}
+                        add_outline_entries(writer, [[pdf_file.stem, start_page, read_outline(reader, page_map)]])
                         
             except Exception as e:
                 print(f"  ⚠️  Warning: Could not process {pdf_file.name}: {e}")
                 continue
         
-        # Write the merged PDF
-        with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
-        
         # Add metadata
         try:
-            writer.add_metadata({
-                '/Title': output_path.stem,
-                '/Creator': 'PDMUGGY',
-                '/Producer': 'PDMUGGY',
-                '/CreationDate': datetime.datetime.now().strftime("D:%Y%m%d%H%M%S")
-            })
+            writer.add_metadata(get_merge_metadata(output_path))
         except:
             pass  # Metadata is optional
         
+        # Write the merged PDF next to the output, then rename it into place
+        temp_path = get_temp_path(output_path)
+        with open(temp_path, 'wb') as output_file:
+            writer.write(output_file)
+        finish_output(temp_path, output_path)
+        
+        print_savings(report)
         return True
         
     except Exception as e:
         print(f"Error during merge: {e}")
+        get_temp_path(output_path).unlink(missing_ok=True)
         return False
 
-def get_user_input() -> tuple[str, str, str]:
+def get_user_input() -> tuple[str, str, str, List[Path]]:
     """
     Get input directory, output directory, and filename from user
+    The PDF list found while validating the input directory is returned too,
+    so the directory is not listed again.
     """
     print("=== PDMUGGY ===")
     print("This tool merges all PDFs in a directory into a single PDF file\n")
@@ -149,26 +1471,47 @@ def get_user_input() -> tuple[str, str, str]:
         
         break
     
-    return input_dir, output_dir, filename
+    return input_dir, output_dir, filename, pdf_files
 
-def preview_merge_operation(input_dir: str, output_dir: str, filename: str) -> bool:
+def preview_merge_operation(input_dir: str, output_dir: str, filename: str,
+                            pdf_files: Optional[List[Path]] = None,
+                            scan: Optional[List[PreflightInfo]] = None) -> bool:
     """
     Show user what will be merged and ask for confirmation
+    pdf_files and its preflight scan are computed here when not passed in.
     """
     input_path = Path(input_dir)
     output_path = Path(output_dir) / f"{filename}.pdf"
-    pdf_files = get_pdf_files(input_path)
+    if pdf_files is None:
+        pdf_files = get_pdf_files(input_path)
+    if scan is None:
+        scan = preflight(pdf_files)
+    
+    readable = [info for info in scan if info.error is None]
+    unreadable = [info for info in scan if info.error is not None]
+    total_pages = sum(info.pages for info in readable)
+    # Merging copies the objects of every readable input, so their sizes add up
+    estimated_mb = sum(info.size for info in readable) / (1024 * 1024)
     
     print(f"\n{'='*60}")
     print("MERGE PREVIEW")
     print(f"{'='*60}")
     print(f"Input Directory:  {input_dir}")
     print(f"Output File:      {output_path}")
-    print(f"Files to merge:   {len(pdf_files)} PDFs")
+    print(f"Files to merge:   {len(readable)} PDFs")
+    print(f"Total pages:      {total_pages}")
+    print(f"Estimated size:   {estimated_mb:.2f} MB")
     print(f"\nFiles will be merged in this order:")
     
-    for i, pdf_file in enumerate(pdf_files, 1):
-        print(f"  {i:2d}. {pdf_file.name}")
+    for i, info in enumerate(scan, 1):
+        status = f"{info.pages} pages" if info.error is None else "UNREADABLE"
+        encrypted = ", encrypted" if info.encrypted else ""
+        print(f"  {i:2d}. {info.path.name} ({status}{encrypted})")
+    
+    if unreadable:
+        print(f"\n⚠️  {len(unreadable)} unreadable files will be skipped:")
+        for info in unreadable:
+            print(f"  - {info.path.name}: {info.error}")
     
     print(f"\n{'='*60}")
     
@@ -182,35 +1525,82 @@ def preview_merge_operation(input_dir: str, output_dir: str, filename: str) -> b
         else:
             print("Please enter 'y' for yes or 'n' for no")
 
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments (missing paths are asked for interactively)
+    """
+    parser = argparse.ArgumentParser(description="PDMUGGY - merge all PDFs in a directory into one PDF")
+    parser.add_argument('input_dir', nargs='?', help="Directory containing the PDFs to merge")
+    parser.add_argument('output_dir', nargs='?', help="Directory to save the merged PDF in")
+    parser.add_argument('filename', nargs='?', help="Name of the merged PDF (without .pdf)")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Low-memory merge that writes objects out as it goes and resumes if interrupted "
+                             f"(used automatically above {RESUMABLE_INPUTS} files)")
+    parser.add_argument('--tree', action='store_true',
+                        help="Merge groups of files in parallel processes, then merge the results "
+                             "(starts over if interrupted)")
+    parser.add_argument('--group-size', type=int, default=DEFAULT_GROUP_SIZE, metavar='N',
+                        help=f"Files per intermediate merge in --tree mode (default: {DEFAULT_GROUP_SIZE})")
+    parser.add_argument('-j', '--workers', type=int, metavar='N',
+                        help="Worker processes for --tree and --optimize (default: CPU count)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Append files added since the last --incremental run instead of rebuilding "
+                             "(the update is written to a copy that replaces the output when done)")
+    parser.add_argument('--no-bookmarks', dest='bookmarks', action='store_false',
+                        help="Do not add a bookmark per merged file")
+    parser.add_argument('--optimize', action='store_true',
+                        help="Downsample and recompress embedded images before merging")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_OPTIMIZE_DPI, metavar='N',
+                        help=f"Target image resolution for --optimize (default: {DEFAULT_OPTIMIZE_DPI})")
+    parser.add_argument('--quality', type=int, default=DEFAULT_OPTIMIZE_QUALITY, metavar='N',
+                        help=f"JPEG quality for --optimize (default: {DEFAULT_OPTIMIZE_QUALITY})")
+    parser.add_argument('--dedup', action='store_true',
+                        help="Store identical streams (fonts, images) once (implies --streaming)")
+    parser.add_argument('--compress', action='store_true',
+                        help="Pack objects into compressed object streams with an xref stream (implies --streaming)")
+    return parser.parse_args()
+
 def main():
     """
     Main function - handles the PDF merging process
     """
+    args = parse_arguments()
+    
     try:
         # Check if command line arguments were provided
-        if len(sys.argv) >= 4:
+        if args.filename:
             # Use command line arguments: input_dir output_dir filename
-            input_directory = sys.argv[1]
-            output_directory = sys.argv[2] 
-            output_filename = sys.argv[3]
+            input_directory = args.input_dir
+            output_directory = args.output_dir
+            output_filename = args.filename
             print(f"Using command line arguments:")
             print(f"Input: {input_directory}")
             print(f"Output: {output_directory}/{output_filename}.pdf")
         else:
             # Get input interactively
-            input_directory, output_directory, output_filename = get_user_input()
+            input_directory, output_directory, output_filename, pdf_files = get_user_input()
+        
+        # Get PDF files (listed once, then shared by the preview and the merge)
+        if args.filename:
+            pdf_files = get_pdf_files(Path(input_directory))
+        
+        if not pdf_files:
+            print("No PDF files found in the specified directory.")
+            return
+        
+        # Preflight the inputs so the preview can show pages and broken files
+        scan = preflight(pdf_files)
         
         # Preview the operation
-        if not preview_merge_operation(input_directory, output_directory, output_filename):
+        if not preview_merge_operation(input_directory, output_directory, output_filename,
+                                       pdf_files, scan):
             print("Operation cancelled by user.")
             return
         
-        # Get PDF files
-        input_path = Path(input_directory)
-        pdf_files = get_pdf_files(input_path)
-        
+        # Unreadable inputs were reported in the preview and are left out
+        pdf_files = [info.path for info in scan if info.error is None]
         if not pdf_files:
-            print("No PDF files found in the specified directory.")
+            print("None of the PDF files could be read.")
             return
         
         # Create output path
@@ -221,7 +1611,9 @@ def main():
         print(f"{'='*60}")
         
         # Perform the merge
-        if merge_pdfs(pdf_files, output_path):
+        if merge_pdfs(pdf_files, output_path, args.streaming, args.tree,
+                      args.group_size, args.workers, args.dedup, args.compress, args.bookmarks,
+                      args.incremental, OptimizeSettings(args.dpi, args.quality) if args.optimize else None):
             print(f"\n✅ SUCCESS!")
             print(f"Merged {len(pdf_files)} PDFs into: {output_path}")
             
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+PDSPLIT - PDF Splitter Tool
+Splits a PDF into several PDFs by page ranges, page count, target file size or bookmarks
+Companion tool to PDFY and PDMUGGY (uses the PDMUGGY streaming writer)
+"""
+
+import io
+import re
+import sys
+import argparse
+import importlib.util
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# PDMUGGY lives in "main(1.0).py", which is not importable by name
+_spec = importlib.util.spec_from_file_location('pdmuggy', SCRIPT_DIR.parent / '02_PDMUGGY' / 'main(1.0).py')
+pdmuggy = importlib.util.module_from_spec(_spec)
+sys.modules['pdmuggy'] = pdmuggy
+_spec.loader.exec_module(pdmuggy)
+
+# Open source documents kept by open_source() for repeated extraction
+SOURCE_CACHE_SIZE = 8
+
+# Rough bytes per object for the xref table and trailer of a finished chunk
+XREF_BYTES_PER_OBJECT = 20
+TRAILER_BYTES = 512
+# Upper estimates of what close() adds per page (page tree entry) and per
+# bookmark (item dictionary and xref entry, not counting the title)
+KIDS_BYTES_PER_PAGE = 12
+OUTLINE_ITEM_BYTES = 170
+OUTLINE_ROOT_BYTES = 160
+
+SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2, 'G': 1024 ** 3, 'GB': 1024 ** 3}
+
+class Chunk(NamedTuple):
+    """
+    One output file: a name and the source page indices it holds
+    """
+    name: str
+    pages: List[int]
+
+class SourceDocument:
+    """
+    An open source PDF with its page index
+    The reader resolves objects lazily from the open file, so only the pages
+    being copied are ever parsed. The page list and outline are built once and
+    reused, which makes repeated extraction from one large source cheap.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.reader = pdmuggy.open_reader(self.file)
+            self.page_count = len(self.reader.pages)  # Flattens the page tree once
+        except Exception:
+            self.file.close()
+            raise
+        self._outline: Optional[List[list]] = None
+    
+    @property
+    def outline(self) -> List[list]:
+        """
+        Bookmarks as [title, source page, children] entries (read on first use)
+        """
+        if self._outline is None:
+            self._outline = pdmuggy.read_outline(self.reader)
+        return self._outline
+    
+    def release(self) -> None:
+        """
+        Drop parsed objects cached by the reader (page dictionaries stay indexed)
+        Called after each chunk, so splitting a whole document never holds all
+        of its content at once.
+        """
+        self.reader.resolved_objects.clear()
+    
+    def close(self) -> None:
+        self.file.close()
+
+_sources: 'OrderedDict[Tuple[str, int, int], SourceDocument]' = OrderedDict()
+
+def open_source(path: Path) -> SourceDocument:
+    """
+    Return an open SourceDocument for path, reusing a cached one if the file is unchanged
+    The least recently used document is closed beyond SOURCE_CACHE_SIZE.
+    """
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key in _sources:
+        _sources.move_to_end(key)
+        return _sources[key]
+    
+    source = SourceDocument(path)
+    _sources[key] = source
+    while len(_sources) > SOURCE_CACHE_SIZE:
+        _sources.popitem(last=False)[1].close()
+    return source
+
+def parse_size(text: str) -> int:
+    """
+    Parse a size such as '5MB', '5M', '500 KB' or '1048576' into bytes
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([A-Z]*)\s*', text.upper())
+    if not match or match.group(2) not in SIZE_UNITS:
+        raise ValueError(f"invalid size '{text}' (use e.g. 500KB or 5MB)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+def parse_ranges(text: str, page_count: int) -> List[Tuple[int, int]]:
+    """
+    Parse 1-based page ranges such as '1-3,5,10-' into inclusive 0-based (first, last) pairs
+    An open end runs to the last page.
+    """
+    ranges = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r'(\d+)?\s*(-)?\s*(\d+)?', part)
+        if not match or not (match.group(1) or match.group(3)):
+            raise ValueError(f"invalid page range '{part}'")
+        first = int(match.group(1)) if match.group(1) else 1
+        if match.group(2):
+            last = int(match.group(3)) if match.group(3) else page_count
+        else:
+            last = first
+        if not 1 <= first <= last <= page_count:
+            raise ValueError(f"page range '{part}' is outside 1-{page_count}")
+        ranges.append((first - 1, last - 1))
+    return ranges
+
+def safe_filename(text: str) -> str:
+    """
+    Turn a bookmark title into something usable as a filename
+    """
+    name = re.sub(r'[<>:"/\\|?*\x00-\x1f]+', '_', text).strip(' ._')
+    return name[:80] or 'untitled'
+
+def plan_by_ranges(source: SourceDocument, ranges: str) -> List[Chunk]:
+    stem = source.path.stem
+    return [Chunk(f"{stem}_p{first + 1}-{last + 1}" if first != last else f"{stem}_p{first + 1}",
+                  list(range(first, last + 1)))
+            for first, last in parse_ranges(ranges, source.page_count)]
+
+def plan_by_page_count(source: SourceDocument, pages_per_file: int) -> List[Chunk]:
+    if pages_per_file < 1:
+        raise ValueError("pages per file must be at least 1")
+    stem = source.path.stem
+    return [Chunk(f"{stem}_part{i + 1:03d}", list(range(start, min(start + pages_per_file, source.page_count))))
+            for i, start in enumerate(range(0, source.page_count, pages_per_file))]
+
+def plan_by_bookmarks(source: SourceDocument) -> List[Chunk]:
+    """
+    One chunk per top-level bookmark, running to the page before the next one
+    Pages before the first bookmark become a 'front' chunk.
+    """
+    starts = sorted({page for _, page, _ in source.outline})
+    if not starts:
+        raise ValueError(f"{source.path.name} has no bookmarks")
+    
+    titles: Dict[int, str] = {}
+    for title, page, _ in source.outline:
+        titles.setdefault(page, title)  # First bookmark on a page names the chunk
+    
+    chunks = []
+    if starts[0] > 0:
+        chunks.append(Chunk("000_front", list(range(0, starts[0]))))
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else source.page_count
+        chunks.append(Chunk(f"{i + 1:03d}_{safe_filename(titles[start])}", list(range(start, end))))
+    return chunks
+
+def write_chunk(source: SourceDocument, chunk: Chunk, output_path: Path) -> int:
+    """
+    Stream the pages of one chunk into output_path, with the bookmarks that fall inside it
+    Returns: size of the written file in bytes
+    """
+    temp_path = pdmuggy.get_temp_path(output_path)
+    try:
+        with open(temp_path, 'wb') as output_file:
+            writer = pdmuggy.StreamingPdfWriter(output_file)
+            writer.add_document(source.reader, chunk.pages, outline=False)
+            page_map = {page: i for i, page in enumerate(chunk.pages)}
+            writer.outline.extend(pdmuggy.remap_outline(source.outline, page_map))
+            writer.close(get_split_metadata(source, output_path))
+        pdmuggy.finish_output(temp_path, output_path)
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    finally:
+        source.release()
+    return output_path.stat().st_size
+
+def outline_bytes_by_page(entries: List[list], sizes: Optional[Dict[int, int]] = None) -> Dict[int, int]:
+    """
+    Bytes the bookmarks pointing at each source page add to a chunk's outline (an upper estimate)
+    """
+    sizes = {} if sizes is None else sizes
+    for title, page, children in entries:
+        buffer = io.BytesIO()
+        pdmuggy.TextStringObject(title).write_to_stream(buffer, None)
+        sizes[page] = sizes.get(page, 0) + OUTLINE_ITEM_BYTES + len(buffer.getvalue())
+        outline_bytes_by_page(children, sizes)
+    return sizes
+
+def split_by_size(source: SourceDocument, target_bytes: int, output_dir: Path) -> List[Tuple[Path, int, int]]:
+    """
+    Split into files of at most target_bytes each (a single page larger than the
+    target still gets a file of its own)
+    Pages are appended one at a time and a page that pushes the chunk over the
+    target is rolled back and starts the next file, so page sizes are never
+    guessed. What close() writes later (page tree, the bookmarks of the pages
+    taken, xref and trailer) is reserved as an upper estimate.
+    Returns: (path, pages, bytes) per written file
+    """
+    outline_sizes = outline_bytes_by_page(source.outline)
+    results = []
+    page = 0
+    part = 0
+    while page < source.page_count:
+        part += 1
+        output_path = output_dir / f"{source.path.stem}_part{part:03d}.pdf"
+        temp_path = pdmuggy.get_temp_path(output_path)
+        first = page
+        outline_bytes = 0
+        
+        try:
+            with open(temp_path, 'wb') as output_file:
+                writer = pdmuggy.StreamingPdfWriter(output_file)
+                while page < source.page_count:
+                    mark = writer.mark()
+                    writer.add_document(source.reader, [page], outline=False, new_document=page == first)
+                    page_outline = outline_sizes.get(page, 0)
+                    estimate = (output_file.tell() + XREF_BYTES_PER_OBJECT * len(writer.offsets)
+                                + TRAILER_BYTES + KIDS_BYTES_PER_PAGE * (page - first + 1)
+                                + outline_bytes + page_outline
+                                + (OUTLINE_ROOT_BYTES if outline_bytes + page_outline else 0))
+                    if estimate > target_bytes and page > first:
+                        writer.rollback(mark)
+                        break
+                    outline_bytes += page_outline
+                    page += 1
+                
+                page_map = {source_page: i for i, source_page in enumerate(range(first, page))}
+                writer.outline.extend(pdmuggy.remap_outline(source.outline, page_map))
+                writer.close(get_split_metadata(source, output_path))
+            pdmuggy.finish_output(temp_path, output_path)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+        finally:
+            source.release()
+        
+        results.append((output_path, page - first, output_path.stat().st_size))
+    return results
+
+def get_split_metadata(source: SourceDocument, output_path: Path) -> Dict[str, str]:
+    """
+    Document info written into split PDFs
+    """
+    metadata = pdmuggy.get_merge_metadata(output_path)
+    metadata['/Creator'] = metadata['/Producer'] = 'PDSPLIT'
+    metadata['/Subject'] = f"Split from {source.path.name}"
+    return metadata
+
+def split_pdf(source_path: Path, output_dir: Path, ranges: Optional[str] = None,
+              pages_per_file: Optional[int] = None, target_size: Optional[int] = None,
+              bookmarks: bool = False) -> List[Tuple[Path, int, int]]:
+    """
+    Split source_path into output_dir using exactly one of the split modes
+    Each chunk is streamed straight to disk, so memory stays at about one chunk
+    however large the source is.
+    Returns: (path, pages, bytes) per written file
+    """
+    source = open_source(source_path)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    if target_size is not None:
+        return split_by_size(source, target_size, output_dir)
+    
+    if ranges is not None:
+        chunks = plan_by_ranges(source, ranges)
+    elif pages_per_file is not None:
+        chunks = plan_by_page_count(source, pages_per_file)
+    elif bookmarks:
+        chunks = plan_by_bookmarks(source)
+    else:
+        raise ValueError("no split mode given")
+    
+    results = []
+    for i, chunk in enumerate(chunks, 1):
+        output_path = output_dir / f"{chunk.name}.pdf"
+        print(f"  [{i}/{len(chunks)}] Writing: {output_path.name} ({len(chunk.pages)} pages)")
+        results.append((output_path, len(chunk.pages), write_chunk(source, chunk, output_path)))
+    return results
+
+def get_user_input() -> argparse.Namespace:
+    """
+    Ask for the source PDF, output directory and split mode
+    """
+    print("=== PDSPLIT ===")
+    print("This tool splits a PDF into several smaller PDF files\n")
+    
+    while True:
+        source = input("Enter the PDF file to split: ").strip().strip('"').strip("'")
+        if Path(source).is_file() and source.lower().endswith('.pdf'):
+            break
+        print(f"'{source}' is not a PDF file. Please try again.")
+    
+    while True:
+        output_dir = input("Enter the output directory: ").strip().strip('"').strip("'")
+        if output_dir:
+            break
+        print("Please enter a valid path")
+    
+    args = argparse.Namespace(source=source, output_dir=output_dir, ranges=None,
+                              pages=None, size=None, bookmarks=False)
+    print("\nSplit by:  1) page ranges  2) pages per file  3) target file size  4) bookmarks")
+    while True:
+        choice = input("Choose 1-4: ").strip()
+        if choice == '1':
+            args.ranges = input("Page ranges (e.g. 1-3,5,10-): ").strip()
+        elif choice == '2':
+            args.pages = int(input("Pages per file: ").strip() or 0)
+        elif choice == '3':
+            args.size = input("Maximum file size (e.g. 5MB): ").strip()
+        elif choice == '4':
+            args.bookmarks = True
+        else:
+            print("Please enter 1, 2, 3 or 4")
+            continue
+        return args
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments (missing arguments are asked for interactively)
+    """
+    parser = argparse.ArgumentParser(description="PDSPLIT - split a PDF into several PDFs")
+    parser.add_argument('source', nargs='?', help="PDF file to split")
+    parser.add_argument('output_dir', nargs='?', help="Directory to write the parts to")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--ranges', help="1-based page ranges, one file each (e.g. 1-3,5,10-)")
+    mode.add_argument('--pages', type=int, metavar='N', help="N pages per file")
+    mode.add_argument('--size', metavar='SIZE', help="Maximum size per file (e.g. 5MB)")
+    mode.add_argument('--bookmarks', action='store_true', help="One file per top-level bookmark")
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - handles the PDF splitting process
+    """
+    args = parse_arguments()
+    
+    try:
+        if not args.output_dir or not (args.ranges or args.pages or args.size or args.bookmarks):
+            args = get_user_input()
+        
+        source_path = Path(args.source)
+        output_dir = Path(args.output_dir)
+        target_size = parse_size(args.size) if args.size else None
+        
+        print(f"\n{'='*60}")
+        print(f"SPLITTING {source_path.name}")
+        print(f"{'='*60}")
+        
+        results = split_pdf(source_path, output_dir, args.ranges, args.pages, target_size, args.bookmarks)
+        
+        print("\n✅ SUCCESS!")
+        print(f"Wrote {len(results)} files to: {output_dir}")
+        for path, pages, size in results:
+            print(f"  {path.name}: {pages} pages, {size / (1024 * 1024):.2f} MB")
+    
+    except KeyboardInterrupt:
+        print("\n\nOperation interrupted by user")
+    except Exception as e:
+        print("\n❌ FAILED!")
+        print(f"Could not split the PDF: {e}")
+    
+    input("\nPress Enter to exit...")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+PDSUITE - PDF Suite Pipeline
+Runs PDFY, PDMUGGY and PDSPLIT as one non-interactive pipeline:
+convert images -> optimize PDFs -> merge -> split
+Converted images go from the conversion workers straight into the merged PDF,
+so no per-image PDFs are written. It never prompts, so it can run from cron or
+scripts: --json prints progress as JSON lines and the exit code tells the outcome.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+import importlib.util
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+def _load_tool(name: str, folder: str):
+    spec = importlib.util.spec_from_file_location(name, SCRIPT_DIR.parent / folder / 'main(1.0).py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+# The tools live in "main(1.0).py" files, which are not importable by name. Loading
+# them at module level also registers them for worker processes started with spawn.
+pdfy = _load_tool('pdfy', '01_PDFY')
+pdsplit = _load_tool('pdsplit', '03_PDSPLIT')
+pdmuggy = pdsplit.pdmuggy  # Loaded by PDSPLIT
+
+# Exit codes
+EXIT_OK = 0
+EXIT_PARTIAL = 1  # Output written, but some inputs were skipped
+EXIT_FAILED = 2  # Nothing written (argparse also exits with 2 on bad arguments)
+EXIT_INTERRUPTED = 130
+
+# Inputs converted or optimized ahead of the merge per worker
+PREPARE_AHEAD_PER_WORKER = 2
+
+class Progress:
+    """
+    Progress reporting: one JSON object per line with as_json, plain text otherwise
+    Plain-text errors go to stderr, and are the only thing printed when quiet.
+    """
+    def __init__(self, stream, as_json: bool = False, quiet: bool = False):
+        self.stream = stream
+        self.as_json = as_json
+        self.quiet = quiet
+    
+    def emit(self, event: str, message: str, **fields: Any) -> None:
+        if self.as_json:
+            record = {'event': event, 'time': round(time.time(), 3), **fields}
+            print(json.dumps(record, default=str), file=self.stream, flush=True)
+        elif event == 'error':
+            print(message, file=sys.stderr, flush=True)
+        elif not self.quiet:
+            print(message, file=self.stream, flush=True)
+
+def collect_inputs(input_dir: Path, recursive: bool = False,
+                   include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                   skip: Tuple[Path, ...] = ()) -> List['pdfy.WorkItem']:
+    """
+    List the images and PDFs to merge, in natural order of their relative paths
+    Images and PDFs are interleaved, so 'scan_2.jpg' lands between 'doc_1.pdf'
+    and 'doc_3.pdf'. Files and folders in skip (the output and the split folder)
+    are left out, so re-running into the input directory never merges old output.
+    """
+    skip = tuple(path.resolve() for path in skip)
+    if recursive:
+        skip_dirs = [path for path in skip if path.is_dir()]
+        items = list(pdfy.iter_supported_files(input_dir, include, exclude,
+                                               skip_dirs[0] if skip_dirs else None))
+    else:
+        pdf_files, image_files = pdfy.get_supported_files(input_dir)
+        items = []
+        for file in pdf_files + image_files:
+            if include and not pdfy.matches_patterns(file.name, include):
+                continue
+            if exclude and pdfy.matches_patterns(file.name, exclude):
+                continue
+            items.append(pdfy.WorkItem(file, Path(), file.stat().st_size, file.suffix.lower() == '.pdf'))
+    
+    items = [item for item in items
+             if item.source.resolve() not in skip and item.source.resolve().parent not in skip]
+    items.sort(key=lambda item: [pdmuggy.natural_sort_key(part)
+                                 for part in (item.relative_dir / item.source.name).parts])
+    return items
+
+class PreparedFile(io.BufferedReader):
+    """
+    A converted input written to a temporary file, deleted once it has been read
+    """
+    def __init__(self, path: Path):
+        super().__init__(io.FileIO(path, 'rb'))
+        self.path = path
+    
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self.path.unlink(missing_ok=True)
+
+def prepare_input(source: str, is_pdf: bool, profile: 'pdfy.OutputProfile',
+                  optimize: Optional['pdmuggy.OptimizeSettings']) -> Tuple[Union[bytes, Path, None], Dict[str, int]]:
+    """
+    Convert an image, or optimize a PDF, to PDF bytes (runs inside the worker processes)
+    Images larger than pdfy.LARGE_FILE_BYTES are not read into memory; like in
+    PDFY, they are converted straight into a temporary file and its path is returned.
+    Returns: (pdf_bytes or temp path, counters) - None when the source PDF is used as is
+    """
+    if not is_pdf:
+        size = os.path.getsize(source)
+        if size > pdfy.LARGE_FILE_BYTES:
+            handle, temp_name = tempfile.mkstemp(prefix='pdsuite_', suffix='.pdf')
+            os.close(handle)
+            temp_path, _ = pdfy.convert_image_file(Path(source), Path(temp_name), profile, Path(source).stem)
+            return temp_path, {'converted_images': 1, 'image_bytes': size,
+                               'converted_bytes': temp_path.stat().st_size}
+        with open(source, 'rb') as file:
+            data = file.read()
+        pdf_data, _ = pdfy.convert_image_bytes(data, profile, Path(source).stem)
+        return pdf_data, {'converted_images': 1, 'image_bytes': len(data), 'converted_bytes': len(pdf_data)}
+    
+    result = pdmuggy.optimize_pdf(source, optimize)
+    if result.data is None:
+        return None, {}
+    return result.data, {'optimized_images': result.images,
+                         'optimized_bytes': result.bytes_before - result.bytes_after}
+
+def open_prepared(item: 'pdfy.WorkItem', result: Callable[[], Tuple[Union[bytes, Path, None], Dict[str, int]]],
+                  report: Dict[str, int]) -> BinaryIO:
+    """
+    Open an input through its prepared bytes or temporary file, adding its counters to report
+    """
+    data, counters = result()
+    for key, value in counters.items():
+        report[key] = report.get(key, 0) + value
+    if isinstance(data, Path):
+        return PreparedFile(data)
+    return io.BytesIO(data) if data is not None else open(item.source, 'rb')
+
+def discard_prepared(future) -> None:
+    """
+    Delete the temporary file of a prepared input that will never be opened
+    """
+    if not future.cancelled() and future.exception() is None:
+        data, _ = future.result()
+        if isinstance(data, Path):
+            data.unlink(missing_ok=True)
+
+def iter_prepared(items: List['pdfy.WorkItem'], profile: 'pdfy.OutputProfile',
+                  optimize: Optional['pdmuggy.OptimizeSettings'] = None, workers: Optional[int] = None,
+                  report: Optional[Dict[str, int]] = None) -> Iterator[Tuple['pdfy.WorkItem', Callable[[], BinaryIO]]]:
+    """
+    Yield (item, open_input) for each input, in order
+    Images (and PDFs when optimizing) are prepared in a process pool a few
+    files ahead of the caller; workers=0 prepares them inline. Untouched PDFs
+    are opened directly. Errors surface when open_input is called, so they are
+    per-file.
+    """
+    report = {} if report is None else report
+    
+    def needs_work(item: 'pdfy.WorkItem') -> bool:
+        return not item.is_pdf or optimize is not None
+    
+    if workers == 0:
+        for item in items:
+            if needs_work(item):
+                job = partial(prepare_input, str(item.source), item.is_pdf, profile, optimize)
+                yield item, partial(open_prepared, item, job, report)
+            else:
+                yield item, partial(open, item.source, 'rb')
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ahead = PREPARE_AHEAD_PER_WORKER * (workers or os.cpu_count() or 1)
+        queued: deque = deque()
+        remaining = iter(items)
+        
+        def submit(item: 'pdfy.WorkItem') -> None:
+            future = (pool.submit(prepare_input, str(item.source), item.is_pdf, profile, optimize)
+                      if needs_work(item) else None)
+            queued.append((item, future))
+        
+        for item in remaining:
+            submit(item)
+            if len(queued) >= ahead:
+                break
+        try:
+            while queued:
+                item, future = queued.popleft()
+                next_item = next(remaining, None)
+                if next_item is not None:
+                    submit(next_item)
+                if future is None:
+                    yield item, partial(open, item.source, 'rb')
+                else:
+                    yield item, partial(open_prepared, item, future.result, report)
+        finally:
+            # The merge stopped early: inputs prepared ahead are never opened
+            for _, future in queued:
+                if future is not None and not future.cancel():
+                    future.add_done_callback(discard_prepared)
+
+def get_suite_metadata(output_path: Path) -> Dict[str, str]:
+    """
+    Document info written into the merged PDF
+    """
+    metadata = pdmuggy.get_merge_metadata(output_path)
+    metadata['/Creator'] = metadata['/Producer'] = 'PDSUITE'
+    return metadata
+
+def merge_inputs(items: List['pdfy.WorkItem'], output_path: Path, progress: Progress,
+                 profile: 'pdfy.OutputProfile', optimize: Optional['pdmuggy.OptimizeSettings'] = None,
+                 dedup: bool = False, compress: bool = False, bookmarks: bool = True,
+                 workers: Optional[int] = None) -> Tuple[int, int, Dict[str, int]]:
+    """
+    Stream every input into output_path with the PDMUGGY streaming writer
+    The output is written to a hidden .part file and renamed into place only
+    when complete, so a cron job never leaves a half-written PDF behind.
+    Returns: (pages, failures, report)
+    """
+    temp_path = pdmuggy.get_temp_path(output_path)
+    report: Dict[str, int] = {}
+    failures = 0
+    
+    try:
+        with open(temp_path, 'wb') as output_file:
+            writer = pdmuggy.StreamingPdfWriter(output_file, dedup, compress)
+            inputs = iter_prepared(items, profile, optimize, workers, report)
+            for i, (item, open_input) in enumerate(inputs, 1):
+                name = (item.relative_dir / item.source.name).as_posix()
+                kind = 'pdf' if item.is_pdf else 'image'
+                try:
+                    with open_input() as file:
+                        pages = writer.add_document(pdmuggy.open_reader(file), outline=bookmarks,
+                                                    title=item.source.stem if bookmarks else None)
+                    progress.emit('file', f"  [{i}/{len(items)}] Added: {name} ({pages} pages)",
+                                  index=i, total=len(items), name=name, kind=kind, status='ok', pages=pages)
+                except Exception as e:
+                    failures += 1
+                    progress.emit('file', f"  [{i}/{len(items)}] ⚠️  Skipped: {name}: {e}",
+                                  index=i, total=len(items), name=name, kind=kind, status='error', error=str(e))
+            
+            if not writer.page_ids:
+                raise ValueError("none of the inputs could be read")
+            writer.close(get_suite_metadata(output_path))
+        
+        pdmuggy.finish_output(temp_path, output_path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    
+    return len(writer.page_ids), failures, {**writer.savings(), **report}
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments (nothing is asked interactively)
+    """
+    parser = argparse.ArgumentParser(
+        description="PDSUITE - convert, optimize, merge and split in one non-interactive run",
+        epilog=f"Exit codes: {EXIT_OK} success, {EXIT_PARTIAL} some inputs skipped, "
+               f"{EXIT_FAILED} failed or bad arguments, {EXIT_INTERRUPTED} interrupted")
+    parser.add_argument('input_dir', help="Directory containing images and PDFs")
+    parser.add_argument('output', help="Merged PDF to write")
+    
+    convert = parser.add_argument_group("convert (PDFY)")
+    convert.add_argument('-r', '--recursive', action='store_true', help="Include sub-directories")
+    convert.add_argument('--include', action='append', metavar='GLOB',
+                         help="Only use files matching this glob (repeatable)")
+    convert.add_argument('--exclude', action='append', metavar='GLOB',
+                         help="Skip files and folders matching this glob (repeatable)")
+    convert.add_argument('--profile', choices=sorted(pdfy.OUTPUT_PROFILES), default='archival',
+                         help="Image conversion profile (default: archival)")
+    convert.add_argument('--max-page-bytes', type=int, metavar='BYTES',
+                         help="Per-page size budget for converted images")
+    
+    optimize = parser.add_argument_group("optimize and merge (PDMUGGY)")
+    optimize.add_argument('--optimize', action='store_true',
+                          help="Downsample and recompress images inside input PDFs")
+    optimize.add_argument('--dpi', type=int, default=pdmuggy.DEFAULT_OPTIMIZE_DPI, metavar='N',
+                          help=f"Target image resolution for --optimize (default: {pdmuggy.DEFAULT_OPTIMIZE_DPI})")
+    optimize.add_argument('--quality', type=int, default=pdmuggy.DEFAULT_OPTIMIZE_QUALITY, metavar='N',
+                          help=f"JPEG quality for --optimize (default: {pdmuggy.DEFAULT_OPTIMIZE_QUALITY})")
+    optimize.add_argument('--dedup', action='store_true', help="Store identical streams once")
+    optimize.add_argument('--compress', action='store_true', help="Use compressed object streams")
+    optimize.add_argument('--no-bookmarks', dest='bookmarks', action='store_false',
+                          help="Do not add a bookmark per input file")
+    
+    split = parser.add_argument_group("split (PDSPLIT)")
+    split.add_argument('--split-dir', type=Path, metavar='DIR',
+                       help="Where to write the parts (default: <output>_parts next to the output)")
+    mode = split.add_mutually_exclusive_group()
+    mode.add_argument('--split-ranges', metavar='RANGES', help="1-based page ranges, one file each")
+    mode.add_argument('--split-pages', type=int, metavar='N', help="N pages per file")
+    mode.add_argument('--split-size', metavar='SIZE', help="Maximum size per file (e.g. 5MB)")
+    mode.add_argument('--split-bookmarks', action='store_true',
+                      help="One file per top-level bookmark (one per input file)")
+    
+    parser.add_argument('-j', '--workers', type=int, metavar='N',
+                        help="Conversion and optimization worker processes (default: CPU count, 0 = inline)")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--json', action='store_true',
+                        help="Print progress as JSON lines on stdout (tool messages go to stderr)")
+    output.add_argument('-q', '--quiet', action='store_true', help="Only print errors")
+    
+    args = parser.parse_args()
+    try:
+        args.split_bytes = pdsplit.parse_size(args.split_size) if args.split_size else None
+    except (ValueError, KeyError, OverflowError) as e:
+        parser.error(f"--split-size: {e}")
+    if args.split_bytes is not None and args.split_bytes < 1:
+        parser.error("--split-size must be at least 1 byte")
+    if args.split_pages is not None and args.split_pages < 1:
+        parser.error("--split-pages must be at least 1")
+    return args
+
+def run(args: argparse.Namespace, progress: Progress) -> int:
+    """
+    Run the pipeline and return the exit code
+    """
+    start = time.perf_counter()
+    input_dir = Path(args.input_dir)
+    output_path = Path(args.output)
+    if output_path.suffix.lower() != '.pdf':
+        output_path = output_path.with_name(output_path.name + '.pdf')
+    splitting = bool(args.split_ranges or args.split_pages or args.split_bytes or args.split_bookmarks)
+    split_dir = args.split_dir or output_path.with_name(f"{output_path.stem}_parts")
+    
+    if not input_dir.is_dir():
+        progress.emit('error', f"❌ Input directory '{input_dir}' does not exist", error="input directory not found")
+        return EXIT_FAILED
+    
+    items = collect_inputs(input_dir, args.recursive, args.include, args.exclude,
+                           (output_path, split_dir) if splitting else (output_path,))
+    images = sum(1 for item in items if not item.is_pdf)
+    progress.emit('start', f"Merging {len(items) - images} PDFs and {images} images from {input_dir} "
+                           f"into {output_path}",
+                  input_dir=input_dir, output=output_path, pdfs=len(items) - images, images=images)
+    if not items:
+        progress.emit('error', "❌ No images or PDFs found", error="no inputs found")
+        return EXIT_FAILED
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    optimize = pdmuggy.OptimizeSettings(args.dpi, args.quality) if args.optimize else None
+    try:
+        pages, failures, report = merge_inputs(items, output_path, progress, pdfy.get_profile(args), optimize,
+                                               args.dedup, args.compress, args.bookmarks, args.workers)
+    except Exception as e:
+        progress.emit('error', f"❌ Merge failed: {e}", error=str(e))
+        return EXIT_FAILED
+    
+    size = output_path.stat().st_size
+    progress.emit('merged', f"Merged {pages} pages into {output_path} ({size / (1024 * 1024):.2f} MB)",
+                  path=output_path, pages=pages, bytes=size, failures=failures, report=report)
+    if not progress.as_json and not progress.quiet:
+        pdmuggy.print_savings(report)
+    
+    if splitting:
+        try:
+            parts = pdsplit.split_pdf(output_path, split_dir, args.split_ranges, args.split_pages,
+                                      args.split_bytes, args.split_bookmarks)
+        except Exception as e:
+            progress.emit('error', f"❌ Split failed: {e}", error=str(e))
+            return EXIT_FAILED
+        progress.emit('split', f"Split into {len(parts)} files in {split_dir}", directory=split_dir,
+                      files=[{'path': path, 'pages': part_pages, 'bytes': part_bytes}
+                             for path, part_pages, part_bytes in parts])
+    
+    exit_code = EXIT_PARTIAL if failures else EXIT_OK
+    progress.emit('done', f"{'⚠️  Done' if failures else '✅ Done'} in {time.perf_counter() - start:.1f}s"
+                          + (f" ({failures} inputs skipped)" if failures else ""),
+                  exit_code=exit_code, seconds=round(time.perf_counter() - start, 3))
+    return exit_code
+
+def main():
+    """
+    Main function - runs the pipeline without any prompts
+    In JSON mode stdout carries only progress records; the tools' own messages
+    go to stderr. --quiet discards them.
+    """
+    args = parse_arguments()
+    progress = Progress(sys.stdout, args.json, args.quiet)
+    
+    with contextlib.ExitStack() as stack:
+        if args.json:
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        elif args.quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+        try:
+            return run(args, progress)
+        except KeyboardInterrupt:
+            progress.emit('error', "\nInterrupted", error="interrupted")
+            return EXIT_INTERRUPTED
+        except Exception as e:
+            progress.emit('error', f"❌ Unexpected error: {e}", error=str(e))
+            return EXIT_FAILED
+
+if __name__ == "__main__":
+    sys.exit(main())
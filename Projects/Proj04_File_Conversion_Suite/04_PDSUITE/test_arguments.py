@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+PDSUITE argument tests - bad arguments must exit with 2 and a usage message
+Runs the CLI in a subprocess, the way cron or a script would, so the exit code
+checked is the real one (1 means some inputs were skipped, not a crash).
+
+Usage:
+    python -m unittest test_arguments.py
+"""
+
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+SCRIPT = Path(__file__).resolve().parent / 'main(1.0).py'
+
+def run_suite(*arguments: str) -> subprocess.CompletedProcess:
+    with tempfile.TemporaryDirectory() as directory:
+        Image.new('RGB', (64, 64), 'white').save(Path(directory) / 'page.png')
+        return subprocess.run([sys.executable, str(SCRIPT), directory, str(Path(directory) / 'out.pdf'), *arguments],
+                              capture_output=True, text=True)
+
+class SplitSizeArguments(unittest.TestCase):
+    def assert_usage_error(self, result: subprocess.CompletedProcess):
+        self.assertEqual(result.returncode, 2, result.stderr)
+        self.assertIn('usage:', result.stderr)
+        self.assertNotIn('Traceback', result.stderr)
+
+    def test_bare_unit_letter(self):
+        # '5M' is 5 MB, the same as '5MB'
+        result = run_suite('--split-size', '5M', '--quiet')
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_unknown_unit(self):
+        self.assert_usage_error(run_suite('--split-size', '5X'))
+
+    def test_missing_number(self):
+        self.assert_usage_error(run_suite('--split-size', 'MB'))
+
+    def test_zero(self):
+        self.assert_usage_error(run_suite('--split-size', '0'))
+
+if __name__ == "__main__":
+    unittest.main()
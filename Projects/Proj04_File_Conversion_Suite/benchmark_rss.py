@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Peak memory measurement shared by the PDFY and PDMUGGY benchmarks
+"""
+
+import sys
+from typing import Optional
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident set size of this process or of its largest finished child,
+    whichever is higher, in MB (None where it cannot be measured)
+    This is the peak of one process, not of the whole run: runs with several
+    worker processes alive at once (PDFY workers, PDMUGGY tree mode) use more
+    memory in total than it shows.
+    """
+    if resource is None:
+        return None
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss units
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor
+    return round(max(own, children), 1)
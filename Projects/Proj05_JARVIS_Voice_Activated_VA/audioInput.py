@@ -0,0 +1,175 @@
+# audioInput.py
+
+import math
+import threading
+import time
+from array import array
+from collections import deque
+import speech_recognition as sr
+
+try:
+    import audioop  # Removed from the standard library in Python 3.13 (audioop-lts provides it)
+except ImportError:
+    audioop = None
+
+CALIBRATION_SECONDS = 1.0
+SPEECH_RATIO = 3.0  # A frame this many times louder than the noise floor is speech
+MIN_THRESHOLD = 300  # Never treat quieter frames as speech, even in a silent room
+NOISE_WINDOW_SECONDS = 5.0  # The noise floor is the quietest 5% of this much recent audio
+DRIFT_RATIO = 0.5  # Recalibrate when the floor moves this far from the calibrated one
+PAUSE_SECONDS = 0.8  # Silence that ends a phrase
+PRE_ROLL_SECONDS = 0.3  # Audio kept from before a phrase starts
+MIN_PHRASE_SECONDS = 0.25
+PHRASE_TIME_LIMIT = 7
+
+def frame_rms(frame, sample_width):
+    if audioop is not None:
+        return audioop.rms(frame, sample_width)
+    samples = array('h', frame) if sample_width == 2 else array('b', frame)
+    if not samples:
+        return 0
+    return int(math.sqrt(sum(s * s for s in samples) / len(samples)))
+
+class Phrase:
+    # One utterance cut from the stream; started/ended are time.monotonic() values
+    def __init__(self, audio, started, ended):
+        self.audio = audio
+        self.started = started
+        self.ended = ended
+
+class MicrophoneStream:
+    # One microphone stream kept open for the whole session.
+    # A reader thread pulls fixed-size frames, cuts them into phrases with an
+    # energy threshold and hands each phrase to on_phrase. The threshold is set
+    # from the noise floor measured at startup; the floor keeps being tracked
+    # from the quietest recent frames (pauses between words count, so a noise
+    # source louder than the threshold is caught too), and the threshold is
+    # only recalibrated when the floor drifts by more than DRIFT_RATIO.
+
+    def __init__(self, on_phrase, microphone=None):
+        self.on_phrase = on_phrase
+        self.microphone = microphone or sr.Microphone()
+        self.sample_rate = None
+        self.sample_width = None
+        self.frame_seconds = None
+        self.noise_floor = None
+        self.threshold = None
+        self.recalibrations = 0
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.error = None
+        self._levels = deque()
+        self._frames_since_check = 0
+        self._thread = threading.Thread(target=self._run, name='jarvis-mic', daemon=True)
+
+    def start(self, timeout=10):
+        # Opens the microphone and calibrates; blocks until listening has started
+        self._thread.start()
+        if not self.ready.wait(timeout):
+            raise TimeoutError('microphone did not start')
+        if self.error is not None:
+            raise self.error
+        print(f"Calibrated: noise floor {self.noise_floor}, speech threshold {self.threshold}")
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run(self):
+        try:
+            with self.microphone as source:
+                self.sample_rate = source.SAMPLE_RATE
+                self.sample_width = source.SAMPLE_WIDTH
+                self.frame_seconds = source.CHUNK / source.SAMPLE_RATE
+                self._levels = deque(maxlen=max(1, int(NOISE_WINDOW_SECONDS / self.frame_seconds)))
+                self._calibrate(source)
+                self.ready.set()
+                self._listen(source)
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            if not self.stopped.is_set():
+                print("Microphone error; {0}".format(e))
+
+    def _calibrate(self, source):
+        levels = [frame_rms(source.stream.read(source.CHUNK), self.sample_width)
+                  for _ in range(max(1, int(CALIBRATION_SECONDS / self.frame_seconds)))]
+        self._set_floor(sum(levels) / len(levels))
+
+    def _set_floor(self, floor):
+        self.noise_floor = int(floor)
+        self.threshold = max(int(floor * SPEECH_RATIO), MIN_THRESHOLD)
+
+    def _track_noise(self, level):
+        # Checked about twice a second
+        self._levels.append(level)
+        self._frames_since_check += 1
+        if self._frames_since_check * self.frame_seconds < 0.5 or len(self._levels) < self._levels.maxlen:
+            return
+        self._frames_since_check = 0
+        floor = sorted(self._levels)[len(self._levels) // 20]
+        reference = max(self.noise_floor, 1)
+        if abs(floor - reference) / reference > DRIFT_RATIO:
+            old_threshold = self.threshold
+            self._set_floor(floor)
+            self.recalibrations += 1
+            if self.threshold != old_threshold:
+                print(f"Recalibrated: noise floor {self.noise_floor}, speech threshold {self.threshold}")
+
+    def _listen(self, source):
+        pre_roll = deque(maxlen=max(1, int(PRE_ROLL_SECONDS / self.frame_seconds)))
+        pause_frames = max(1, int(PAUSE_SECONDS / self.frame_seconds))
+        limit_frames = int(PHRASE_TIME_LIMIT / self.frame_seconds)
+        min_frames = int(MIN_PHRASE_SECONDS / self.frame_seconds)
+        phrase = None  # Frames of the phrase in progress
+        voiced = quiet = 0
+        started = 0.0
+
+        while not self.stopped.is_set():
+            frame = source.stream.read(source.CHUNK)
+            now = time.monotonic()
+            level = frame_rms(frame, self.sample_width)
+            speech = level > self.threshold
+            self._track_noise(level)
+
+            if phrase is None:
+                if speech:
+                    phrase = list(pre_roll)
+                    phrase.append(frame)
+                    started = now - self.frame_seconds * len(phrase)
+                    voiced, quiet = 1, 0
+                else:
+                    pre_roll.append(frame)
+                continue
+
+            phrase.append(frame)
+            if speech:
+                voiced += 1
+                quiet = 0
+            else:
+                quiet += 1
+            if quiet < pause_frames and len(phrase) < limit_frames:
+                continue
+
+            if voiced >= min_frames:
+                audio = sr.AudioData(b''.join(phrase), self.sample_rate, self.sample_width)
+                self.on_phrase(Phrase(audio, started, now - quiet * self.frame_seconds))
+            phrase = None
+            pre_roll.clear()
+
+class LatencyReport:
+    # Collects named timings (in seconds) and summarizes them
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, name, seconds):
+        self.samples.setdefault(name, []).append(seconds)
+
+    def summary(self):
+        lines = []
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            p50 = ordered[len(ordered) // 2]
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(f"{name:<24} n={len(values):<4} mean {sum(values) / len(values) * 1000:7.0f} ms"
+                         f"  p50 {p50 * 1000:7.0f} ms  p95 {p95 * 1000:7.0f} ms")
+        return '\n'.join(lines)
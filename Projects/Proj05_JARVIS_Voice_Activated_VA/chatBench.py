@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Chat streaming harness - time to first sentence of client.send_and_save
+Starts a local fake Gemini server that streams a canned reply in small chunks
+at a set generation speed, points client.py at it (GEMINI_API_ENDPOINT) and
+measures when the first sentence is handed to TTS compared with when the whole
+reply has arrived. Also checks that the sentences add up to the reply, that
+a stream cut off half way is answered with the error reply, that a repeated
+question is answered from the response cache, that a cancelled reply stops
+streaming, and that a long conversation stays within the context token budget.
+No API key needed.
+
+Usage:
+    python chatBench.py
+    python chatBench.py --chunk-delay 0.2 --chunk-chars 30
+    python chatBench.py --turns 100 --budget 1000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+from chatContext import estimate_tokens
+
+REPLY = ("Tony Stark built his first suit in a cave with a box of scraps. "
+         "It was powered by an early arc reactor, which also kept shrapnel away from his heart. "
+         "Later suits used a miniaturized reactor and a new element he synthesized himself, "
+         "e.g. the one from his father's Expo model. Dr. Banner helped with some of the physics! "
+         "Would you like to know more about the Mark II?")
+
+class FakeState:
+    def __init__(self, chunk_chars: int, chunk_delay: float):
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+        self.cut_next = False  # Drop the connection after the first chunk of the next reply
+        self.requests = 0
+        self.contents = []  # Request contents of every streamed request
+
+class FakeGemini(BaseHTTPRequestHandler):
+    # Answers streamGenerateContent the way the REST transport expects:
+    # one JSON array, sent element by element with chunked encoding
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        state = self.server.state
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        state.requests += 1
+        if ':streamGenerateContent' not in self.path:
+            body = json.dumps(self.candidate(REPLY)).encode()  # The persona message is not streamed
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        state.contents.append(body.get('contents', []))
+        cut, state.cut_next = state.cut_next, False
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        pieces = [REPLY[i:i + state.chunk_chars] for i in range(0, len(REPLY), state.chunk_chars)]
+        for i, piece in enumerate(pieces):
+            time.sleep(state.chunk_delay)
+            self.send_chunk(('[' if i == 0 else ',\r\n') + json.dumps(self.candidate(piece)))
+            if cut:
+                self.close_connection = True
+                return
+        self.send_chunk(']')
+        self.wfile.write(b'0\r\n\r\n')
+
+    @staticmethod
+    def candidate(text: str) -> dict:
+        return {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'index': 0}]}
+
+    def send_chunk(self, text: str):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass
+
+def timed_reply(client, question: str) -> Tuple[str, List[Tuple[float, str]], float]:
+    """
+    Ask one question
+    Returns: (reply, (seconds, sentence) for each sentence handed to TTS, total seconds)
+    """
+    sentences = []
+    start = time.perf_counter()
+    reply = client.send_and_save(question, on_sentence=lambda s: sentences.append((time.perf_counter() - start, s)))
+    return reply, sentences, time.perf_counter() - start
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="JARVIS streaming chat harness (local fake Gemini server)")
+    parser.add_argument('--chunk-chars', type=int, default=20, help="Characters per streamed chunk")
+    parser.add_argument('--chunk-delay', type=float, default=0.1, help="Seconds between chunks")
+    parser.add_argument('--turns', type=int, default=30, help="Exchanges in the long conversation")
+    parser.add_argument('--budget', type=int, default=800, help="Context token budget")
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - streams the canned reply and prints the timings
+    Exit code is 1 when any check fails
+    """
+    args = parse_arguments()
+    server = FakeServer(('127.0.0.1', 0), FakeGemini)
+    server.state = FakeState(args.chunk_chars, args.chunk_delay)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ['GEMINI_API_ENDPOINT'] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault('GEMINI_API_KEY', 'fake-key')
+    os.environ['CHAT_HISTORY_PATH'] = os.path.join(tempfile.mkdtemp(), 'chat_history.jsonl')
+    os.environ['CHAT_CONTEXT_TOKENS'] = str(args.budget)
+    import client
+    client.connect()  # Sends the persona to the fake server
+
+    reply, sentences, total = timed_reply(client, "How did Tony Stark build his first suit?")
+    print(f"\n{'seconds':>8}  sentence")
+    for seconds, sentence in sentences:
+        print(f"{seconds:>8.2f}  {sentence}")
+    first = sentences[0][0] if sentences else total
+    print(f"\nFirst sentence after {first:.2f}s, full reply after {total:.2f}s "
+          f"({total - first:.2f}s earlier than waiting for the whole reply)")
+
+    results = [
+        ("sentences add up to the reply", ' '.join(s for _, s in sentences) == ' '.join(reply.split())),
+        ("'e.g.' and 'Dr.' do not end a sentence", not any(s.endswith(('e.g.', 'Dr.')) for _, s in sentences)),
+        ("first sentence arrives before the reply is complete", first < total / 2),
+    ]
+    server.state.cut_next = True
+    cut_reply, cut_sentences, _ = timed_reply(client, "And the second suit?")
+    results.append(("a stream cut off half way ends with the error reply",
+                    cut_reply == client.ERROR_REPLY and cut_sentences[-1][1] == client.ERROR_REPLY))
+    after_cut, _, _ = timed_reply(client, "And the third?")
+    results.append(("the session still works after a cut stream", after_cut == REPLY))
+    results.append(("the persona is pinned as the first message",
+                    server.state.contents[-1][0]['parts'][0]['text'] == client.messages[0]['parts'][0]))
+
+    before = server.state.requests
+    cached_reply, cached_sentences, _ = timed_reply(client, "how did Tony Stark build his FIRST suit")
+    print(f"Repeated question: first sentence after {cached_sentences[0][0] * 1000:.2f} ms")
+    results.append(("a repeated question is answered from the cache",
+                    cached_reply == REPLY and server.state.requests == before))
+
+    cancelled = threading.Event()
+    start = time.perf_counter()
+    cancelled_reply = client.send_and_save("Who built the Mark II?", on_sentence=lambda s: cancelled.set(),
+                                           cancelled=cancelled)
+    cancel_s = time.perf_counter() - start
+    before = server.state.requests
+    client.send_and_save("Who built the Mark II?")
+    results.append((f"a cancelled reply stops after its first sentence ({cancel_s:.2f}s of {total:.2f}s)",
+                    len(cancelled_reply) < len(REPLY) and cancel_s < total))
+    results.append(("a cancelled reply is not cached", server.state.requests == before + 1))
+
+    server.state.chunk_delay = 0.0
+    sent_tokens = []
+    for turn in range(args.turns):
+        client.send_and_save(f"Question number {turn} about the Mark {turn} suit?")
+        client.context.wait()
+        sent_tokens.append(sum(estimate_tokens(part['text'])
+                               for content in server.state.contents[-1] for part in content['parts']))
+    context = client.context
+    unbounded = sent_tokens[0] + sum(estimate_tokens(REPLY) + 12 for _ in range(args.turns - 1))
+    print(f"{args.turns} more exchanges: {max(sent_tokens)} tokens per request at most "
+          f"(budget {args.budget}, about {unbounded} without a budget); "
+          f"{context.summarized} exchanges summarized, {context.evicted} dropped")
+    results.append(("requests stay within the token budget", max(sent_tokens) <= args.budget + 20))
+    server.shutdown()
+
+    print()
+    for name, ok in results:
+        print(f"{'✓' if ok else '✗'} {name}")
+    return 0 if all(ok for _, ok in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# chatContext.py
+
+import threading
+import time
+from collections import OrderedDict
+from commandRouter import normalize
+
+CHARS_PER_TOKEN = 4  # Rough size of a Gemini token in English text
+COMPACT_TO = 0.75  # Compaction brings the context down to this share of the budget
+# Questions with these words depend on what was said before, so their answers are never cached
+CONTEXT_WORDS = {'that', 'this', 'these', 'those', 'more', 'again', 'another', 'he', 'she', 'him', 'her',
+                 'they', 'them', 'previous'}
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def message(role, text):
+    return {'role': role, 'parts': [text]}
+
+class ChatContext:
+    # The conversation sent with every request. The persona exchange is pinned
+    # at the start and the newest keep_turns exchanges are always sent whole.
+    # When the total passes budget_tokens, the oldest exchanges are folded into
+    # a running summary by summarize() on a background thread, or dropped when
+    # there is no summarizer or it fails.
+
+    def __init__(self, persona, persona_reply, budget_tokens, keep_turns=4, summarize=None):
+        self.pinned = [message('user', persona), message('model', persona_reply)]
+        self.budget_tokens = budget_tokens
+        self.keep_turns = keep_turns
+        self.summarize = summarize
+        self.summary = ''
+        self.turns = []  # (user, reply) pairs, oldest first
+        self.summarized = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        self._compacting = None
+
+    def tokens(self):
+        with self._lock:
+            return self._tokens(self.turns)
+
+    def _tokens(self, turns):
+        pinned = estimate_tokens(self.pinned[0]['parts'][0]) + estimate_tokens(self.pinned[1]['parts'][0])
+        summary = estimate_tokens(self.summary) if self.summary else 0
+        return pinned + summary + sum(estimate_tokens(user) + estimate_tokens(reply) for user, reply in turns)
+
+    def contents(self, user_input):
+        # Gemini contents for a request: persona, summary, kept exchanges, then the new message
+        with self._lock:
+            contents = list(self.pinned)
+            if self.summary:
+                contents += [message('user', f"Summary of our conversation so far: {self.summary}"),
+                             message('model', 'Noted.')]
+            for user, reply in self.turns:
+                contents += [message('user', user), message('model', reply)]
+        contents.append(message('user', user_input))
+        return contents
+
+    def add(self, user_input, reply):
+        with self._lock:
+            self.turns.append((user_input, reply))
+            if self._tokens(self.turns) <= self.budget_tokens:
+                return
+            if self._compacting is not None and self._compacting.is_alive():
+                return  # Caught up by the next exchange
+            # Oldest exchanges to fold away, never touching the newest keep_turns
+            count, target = 0, self.budget_tokens * COMPACT_TO
+            while count < len(self.turns) - self.keep_turns and self._tokens(self.turns[count:]) > target:
+                count += 1
+            if not count:
+                return
+            if self.summarize is None:
+                del self.turns[:count]
+                self.evicted += count
+                return
+            old, summary = self.turns[:count], self.summary
+            self._compacting = threading.Thread(target=self._fold, args=(old, summary),
+                                                name='jarvis-context', daemon=True)
+            self._compacting.start()
+
+    def wait(self, timeout=None):
+        # Blocks until a running compaction has finished
+        thread = self._compacting
+        if thread is not None:
+            thread.join(timeout)
+
+    def _fold(self, old, summary):
+        transcript = '\n'.join(f"User: {user}\nAssistant: {reply}" for user, reply in old)
+        if summary:
+            transcript = f"Earlier summary: {summary}\n{transcript}"
+        try:
+            summary = self.summarize(transcript).strip()
+        except Exception as e:
+            print("Chat summary error; {0}".format(e))
+            summary = None
+        with self._lock:
+            del self.turns[:len(old)]  # Only add() changes turns, and only by appending
+            if summary:
+                self.summary = summary
+                self.summarized += len(old)
+            else:
+                self.evicted += len(old)
+
+class ResponseCache:
+    # Whole replies to repeated questions ("what is the capital of Japan"),
+    # keyed by the normalized question and kept for ttl seconds. The least
+    # recently used entries go first once there are max_entries.
+
+    def __init__(self, ttl, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires, reply)
+        self._lock = threading.Lock()
+
+    def key(self, question):
+        words = normalize(question).split()
+        if not words or CONTEXT_WORDS.intersection(words):
+            return None
+        return ' '.join(words)
+
+    def get(self, question):
+        key = self.key(question)
+        with self._lock:
+            entry = self._entries.get(key) if key else None
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, question, reply):
+        key = self.key(question)
+        if key is None or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, reply)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
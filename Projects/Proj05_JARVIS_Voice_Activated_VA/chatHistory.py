@@ -0,0 +1,151 @@
+# chatHistory.py
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+import config
+
+MAX_BATCH = 256  # Records written in one go before the interval is up
+TAIL_BLOCK = 8192
+
+class HistoryWriter:
+    # Chat exchanges are appended to a JSONL file by a background thread, so a
+    # request only puts a record on a queue. Records are written in batches,
+    # flushed every flush_seconds and on close, and the file is rotated to
+    # .1, .2, ... (newest first) when it would grow past max_bytes.
+
+    def __init__(self, path=config.CHAT_HISTORY_PATH, max_bytes=config.CHAT_HISTORY_MAX_BYTES,
+                 backups=config.CHAT_HISTORY_BACKUPS, flush_seconds=config.CHAT_HISTORY_FLUSH_SECONDS):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_seconds = flush_seconds
+        self.batches = 0
+        self.rotations = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='jarvis-history', daemon=True)
+        self._thread.start()
+
+    def append(self, user, assistant):
+        self._queue.put({'ts': round(time.time(), 3), 'user': user, 'assistant': assistant})
+
+    def flush(self, timeout=5):
+        # Blocks until everything appended so far is on disk
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def tail(self, count=10):
+        self.flush()
+        return tail(self.path, count)
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._size = self.path.stat().st_size if self.path.exists() else 0
+        running = True
+        while running:
+            item = self._queue.get()
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_seconds
+            # Collect until the interval is up, the batch is full, or a flush/close arrives
+            while True:
+                if item is None:
+                    running = False
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= MAX_BATCH:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    print("Chat history error; {0}".format(e))
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch):
+        data = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                       for record in batch).encode('utf-8')
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(self.path, 'ab') as f:
+            f.write(data)
+        self._size += len(data)
+        self.batches += 1
+
+    def _rotate(self):
+        if self.backups < 1:
+            self.path.unlink()
+        else:
+            backup = lambda i: self.path.with_name(f"{self.path.name}.{i}")
+            last = 0
+            while last < self.backups - 1 and backup(last + 1).exists():
+                last += 1
+            for i in range(last, 0, -1):
+                os.replace(backup(i), backup(i + 1))  # The oldest one past backups is overwritten
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        self._size = 0
+        self.rotations += 1
+
+def _tail_lines(path, count):
+    # Last count lines of one file, read backwards in blocks (the rest of the file is never read)
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= count:
+            step = min(TAIL_BLOCK, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.splitlines()
+    if position > 0:
+        lines = lines[1:]  # Cut mid-line
+    return lines[-count:] if count else []
+
+def tail(path=config.CHAT_HISTORY_PATH, count=10):
+    # The last count exchanges, oldest first, continuing into rotated files if needed
+    path = Path(path)
+    records = []
+    files = [path] + [path.with_name(f"{path.name}.{i}") for i in range(1, 100)]
+    for file in files:
+        if len(records) >= count:
+            break
+        if not file.exists():
+            if file is path:
+                continue
+            break
+        for line in reversed(_tail_lines(file, count - len(records))):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # A line cut short by a crash
+    return records[::-1]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show recent JARVIS conversations")
+    parser.add_argument('--tail', type=int, default=10, metavar='N', help="Exchanges to show (default: 10)")
+    parser.add_argument('--path', type=Path, default=config.CHAT_HISTORY_PATH, help="History file")
+    args = parser.parse_args()
+    for record in tail(args.path, args.tail):
+        print(f"[{time.strftime('%Y-%m-%d %H:%M', time.localtime(record['ts']))}]")
+        print(f"User: {record['user']}")
+        print(f"Assistant: {record['assistant']}\n")
@@ -1,41 +1,162 @@
 # client.py
 
-import google.generativeai as genai
-import os
+import atexit
+import re
+import threading
+import config
+from chatContext import ChatContext, ResponseCache
+from chatHistory import HistoryWriter
 
-API_KEY = "#ADD YOUR GeminiApi key#"
-
-# Configure the Gemini API client with the API key
-genai.configure(api_key=API_KEY)
-
-# Initialize a chat session for the Gemini model.
-chat = genai.GenerativeModel("gemini-2.5-flash-preview-05-20").start_chat(history=[])
+API_KEY = config.GEMINI_API_KEY
 
 # The persona prompt is sent first, followed by the user's message.
 messages = [
     {
-        "role": "user", 
+        "role": "user",
         "parts": ["A virtual assistant like Alexa and Google Cloud. This assistant obtains data via searching and is an expert in coding, math, and other subjects. Also make responses shorter and brief whenever explanation is not necessary"]
     }
 ]
 
-# Send the persona to initialize the assistant
-chat.send_message(messages[0]["parts"][0])
+model = None
+context = None  # Both set by connect()
+_connecting = threading.Lock()
 
-# Function to send a message to Gemini and save response to file
-def send_and_save(user_input):
-    try:
-        response = chat.send_message(user_input)
+def connect():
+    # Imports and configures the Gemini client and sends the persona. Runs once,
+    # from warm_up() at startup or on the first question; importing
+    # google.generativeai alone takes about half a second.
+    global model, context
+    with _connecting:
+        if context is not None:
+            return
+        import google.generativeai as genai
+
+        # Configure the Gemini API client with the API key
+        # (an endpoint override talks REST to it, e.g. a local fake server)
+        if config.GEMINI_API_ENDPOINT:
+            genai.configure(api_key=API_KEY, transport='rest',
+                            client_options={'api_endpoint': config.GEMINI_API_ENDPOINT})
+        else:
+            genai.configure(api_key=API_KEY)
+        model = genai.GenerativeModel(config.GEMINI_MODEL)
+
+        # Send the persona to initialize the assistant; that exchange is pinned at the
+        # start of every request, and older turns are summarized to stay in budget
+        persona = messages[0]["parts"][0]
+        context = ChatContext(persona, model.generate_content(persona).text,
+                              budget_tokens=config.CHAT_CONTEXT_TOKENS, keep_turns=config.CHAT_KEEP_TURNS,
+                              summarize=summarize)
+
+def warm_up():
+    # connect() on a background thread, so the first question does not wait for it
+    def run():
+        try:
+            connect()
+        except Exception as e:
+            print(f"Gemini API Error: {e}")  # The first question tries again
+    thread = threading.Thread(target=run, name='jarvis-chat-warmup', daemon=True)
+    thread.start()
+    return thread
+
+def summarize(transcript):
+    prompt = (f"Summarize this conversation in at most {config.CHAT_SUMMARY_WORDS} words. "
+              f"Keep names, facts and unanswered questions.\n\n{transcript}")
+    return model.generate_content(prompt).text
 
-        file_path = r"C:\\DevField\\Python\\Py.revival\\Projects\\Proj05_JARVIS_Voice_Activated_VA\\Chat_Hist.txt"
+responses = ResponseCache(config.RESPONSE_CACHE_SECONDS, config.RESPONSE_CACHE_SIZE)
 
-        with open(file_path, "a") as f:
-            f.write(f"User: {user_input}\n")
-            f.write(f"Assistant: {response.text}\n\n")
+# Conversations are saved as JSONL at config.CHAT_HISTORY_PATH (python chatHistory.py --tail 10 shows them)
+history = HistoryWriter()
+atexit.register(history.close)
 
-        print(f"\nConversation appended to {file_path}")
+ERROR_REPLY = "Sorry, I am having trouble connecting to my service. Please try again later."
 
-        return response.text
+# Closing punctuation followed by whitespace, or a line break
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+ABBREVIATIONS = {'mr', 'mrs', 'ms', 'dr', 'prof', 'st', 'vs', 'e.g', 'i.e', 'approx'}
+MIN_SENTENCE_CHARS = 16  # Shorter sentences ("Sure.") are spoken together with the next one
+
+class SentenceSplitter:
+    # Cuts streamed text into sentences for TTS. A sentence is only complete
+    # once the whitespace after its punctuation has arrived, so "3.14" or "Dr."
+    # split across two chunks are never cut early.
+    def __init__(self):
+        self.buffer = ''
+
+    def feed(self, text):
+        # Complete sentences found so far; the rest waits for more text
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            words = self.buffer[start:match.start()].split()
+            last_word = words[-1].lower().rstrip('.') if words else ''
+            if last_word in ABBREVIATIONS or (len(last_word) == 1 and last_word.isalpha()):
+                continue  # "Dr. Strange", "J. R. R. Tolkien"
+            sentence = self.buffer[start:match.end()].strip()
+            if len(sentence) < MIN_SENTENCE_CHARS and '\n' not in match.group():
+                continue
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self):
+        rest, self.buffer = self.buffer.strip(), ''
+        return [rest] if rest else []
+
+# Function to send a message to Gemini and save the exchange to the history
+def send_and_save(user_input, on_sentence=None, cancelled=None):
+    # The reply is streamed (or replayed from the response cache for a repeated
+    # question); with on_sentence, each sentence is handed over as soon as it
+    # is complete instead of after the whole reply has arrived. Setting the
+    # cancelled Event (a barge-in) stops reading the stream at the next chunk;
+    # a cut-off reply is returned but not remembered, cached or saved.
+    splitter = SentenceSplitter()
+    stopped = cancelled.is_set if cancelled is not None else lambda: False
+    cached = responses.get(user_input)
+    if cached is not None:
+        chunks = [cached]
+    else:
+        try:
+            connect()
+            chunks = model.generate_content(context.contents(user_input), stream=True)
+        except Exception as e:
+            return error_reply(e, None if stopped() else on_sentence)
+    try:
+        parts = []
+        for chunk in chunks:
+            if stopped():
+                print("Gemini reply interrupted")
+                return ''.join(parts)
+            try:
+                text = chunk if isinstance(chunk, str) else chunk.text
+            except ValueError:
+                continue  # A chunk without text (e.g. only safety ratings)
+            parts.append(text)
+            if on_sentence is not None:
+                for sentence in splitter.feed(text):
+                    on_sentence(sentence)
+        if stopped():
+            print("Gemini reply interrupted")
+            return ''.join(parts)
+        if on_sentence is not None:
+            for sentence in splitter.flush():
+                on_sentence(sentence)
     except Exception as e:
-        print(f"Gemini API Error: {e}")
-        return "Sorry, I am having trouble connecting to my service. Please try again later."
+        # A broken stream is never added to the context (nor spoken about once cancelled)
+        return error_reply(e, None if stopped() else on_sentence)
+    reply = ''.join(parts)
+    if reply:
+        context.add(user_input, reply)
+        if cached is None:
+            responses.put(user_input, reply)
+    history.append(user_input, reply)  # Written by a background thread
+    return reply
+
+def error_reply(e, on_sentence):
+    print(f"Gemini API Error: {e}")
+    if on_sentence is not None:
+        on_sentence(ERROR_REPLY)
+    return ERROR_REPLY
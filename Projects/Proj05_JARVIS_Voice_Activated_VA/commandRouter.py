@@ -0,0 +1,148 @@
+# commandRouter.py
+
+import math
+import re
+from collections import Counter
+
+MIN_SONG_SCORE = 0.45  # Smallest trigram similarity (Dice coefficient) accepted as a song match
+STOP_GRAM_SHARE = 0.05  # Trigrams in more than this share of titles are not indexed...
+STOP_GRAM_MIN_TITLES = 64  # ...unless they are in at most this many (small libraries keep them all)
+MIN_SHARED_GRAMS = 0.5  # Share of the query's indexed trigrams a title must contain to be scored
+
+def normalize(text):
+    # Lowercase words without punctuation: "We do'nt talk anymore!" -> "we dont talk anymore"
+    return ' '.join(re.sub(r"[^\w\s]", '', text.lower()).split())
+
+class Route:
+    def __init__(self, name, handler, argument):
+        self.name = name
+        self.handler = handler
+        self.argument = argument  # Words after a prefix command, otherwise the whole command
+
+class CommandRegistry:
+    # Dispatch index for spoken commands, built once at startup.
+    #   Prefix commands ("play song ...") live in a word trie, so the longest
+    #   registered prefix is found in one walk over the first few words.
+    #   Keyword commands ("open google", "news") are posted in an inverted index
+    #   under their rarest word only ("google", not "open"), and the rest of
+    #   their words are checked on each candidate. A command matches when all of
+    #   its words are present, and the one with the most words wins (ties go to
+    #   the first registered).
+    # Routing costs about one dictionary lookup per spoken word plus the few
+    # candidates posted under those words, however many commands share a word.
+    # Anything else goes to the fallback handler.
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback
+        self.trie = {}
+        self.keywords = {}  # rarest word -> [(command index, keywords)], rebuilt after registering
+        self.keyword_commands = []  # (command index, keywords) in registration order
+        self.word_counts = Counter()  # Keyword commands using each word
+        self.commands = []  # index -> (name, handler, number of keywords)
+
+    def register_prefix(self, prefix, handler, name=None):
+        node = self.trie
+        for word in normalize(prefix).split():
+            node = node.setdefault(word, {})
+        node[None] = len(self.commands)  # None marks the end of a registered prefix
+        self.commands.append((name or prefix, handler, 0))
+
+    def register_keywords(self, keywords, handler, name=None):
+        words = frozenset(normalize(keywords).split())
+        self.keyword_commands.append((len(self.commands), words))
+        self.word_counts.update(words)
+        self.keywords = None  # Which word is rarest can change with every registration
+        self.commands.append((name or keywords, handler, len(words)))
+
+    def _index_keywords(self):
+        self.keywords = {}
+        for index, words in self.keyword_commands:
+            if not words:
+                continue
+            rarest = min(words, key=lambda word: (self.word_counts[word], word))
+            self.keywords.setdefault(rarest, []).append((index, words))
+
+    def route(self, text):
+        words = normalize(text).split()
+
+        node, match, matched = self.trie, None, 0
+        for depth, word in enumerate(words):
+            node = node.get(word)
+            if node is None:
+                break
+            if None in node:
+                match, matched = node[None], depth + 1
+        if match is not None:
+            name, handler, _ = self.commands[match]
+            return Route(name, handler, ' '.join(words[matched:]))
+
+        if self.keywords is None:
+            self._index_keywords()
+        spoken = set(words)
+        best, best_words = None, 0
+        for word in spoken:
+            for index, needed in self.keywords.get(word, ()):
+                if len(needed) < best_words or (len(needed) == best_words and index > best):
+                    continue
+                if needed <= spoken:
+                    best, best_words = index, len(needed)
+        if best is not None:
+            name, handler, _ = self.commands[best]
+            return Route(name, handler, text)
+
+        return Route('chat', self.fallback, text)
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SongIndex:
+    # Fuzzy title lookup: an inverted index from character trigram to titles.
+    # Trigrams found in most titles (padding, common syllables) say little about
+    # which title was meant, so they are left out of the index. A title is
+    # scored only if it holds at least MIN_SHARED_GRAMS of the query's indexed
+    # trigrams and its length could reach min_score at all, so "shape of u"
+    # finds "shape of you" after scoring a handful of titles, not the library.
+
+    def __init__(self, library):
+        self.library = library  # title -> url
+        self.exact = {}  # normalized title -> title
+        self.titles = []
+        self.grams = []  # Trigram set per title
+        self.postings = {}  # trigram -> [title index]
+        for title in library:
+            key = normalize(title)
+            self.exact[key] = title
+            grams = trigrams(key)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(len(self.titles))
+            self.titles.append(title)
+            self.grams.append(grams)
+        cutoff = max(STOP_GRAM_MIN_TITLES, STOP_GRAM_SHARE * len(self.titles))
+        self.postings = {gram: titles for gram, titles in self.postings.items() if len(titles) <= cutoff}
+
+    def match(self, query, min_score=MIN_SONG_SCORE):
+        # Best (title, score) for query, or (None, 0.0) when nothing is close enough
+        key = normalize(query)
+        if key in self.exact:
+            return self.exact[key], 1.0
+        grams = trigrams(key)
+        indexed = [gram for gram in grams if gram in self.postings]
+        shared = Counter()
+        for gram in indexed:
+            shared.update(self.postings[gram])
+        # Dice can only reach min_score when the sizes are within this ratio of each other
+        shortest = len(grams) * min_score / (2 - min_score)
+        longest = len(grams) * (2 - min_score) / min_score
+        needed = max(1, math.ceil(len(indexed) * MIN_SHARED_GRAMS))
+        best, best_score = None, 0.0
+        for index, count in shared.items():
+            size = len(self.grams[index])
+            if count < needed or not shortest <= size <= longest:
+                continue
+            score = 2 * len(grams & self.grams[index]) / (len(grams) + size)
+            if score > best_score:
+                best, best_score = index, score
+        if best is None or best_score < min_score:
+            return None, best_score
+        return self.titles[best], best_score
@@ -0,0 +1,44 @@
+# config.py
+# JARVIS settings. Each one can be overridden with an environment variable of the same name.
+
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    return default if value is None or value == '' else cast(value)
+
+# HTTP
+HTTP_CONNECT_TIMEOUT = _env('HTTP_CONNECT_TIMEOUT', 3.05, float)
+HTTP_READ_TIMEOUT = _env('HTTP_READ_TIMEOUT', 8.0, float)
+HTTP_RETRIES = _env('HTTP_RETRIES', 2, int)  # Retries on connection errors and 429/5xx responses
+
+# News
+NEWS_API_KEY = _env('NEWS_API_KEY', '#ADD YOUR NewsApi key#')  # Do not Redeem(any one else)!!!!!
+NEWS_API_URL = _env('NEWS_API_URL', 'https://newsapi.org/v2')
+NEWS_COUNTRY = _env('NEWS_COUNTRY', 'us')
+NEWS_CACHE_SECONDS = _env('NEWS_CACHE_SECONDS', 600.0, float)  # Headlines are reused for 10 minutes
+NEWS_TOP_N = _env('NEWS_TOP_N', 5, int)  # Headlines read aloud per request
+
+# Gemini
+GEMINI_API_KEY = _env('GEMINI_API_KEY', '#ADD YOUR GeminiApi key#')
+GEMINI_MODEL = _env('GEMINI_MODEL', 'gemini-2.5-flash-preview-05-20')
+GEMINI_API_ENDPOINT = _env('GEMINI_API_ENDPOINT', '')  # e.g. http://127.0.0.1:8080 for a local fake server
+
+# Chat history
+CHAT_HISTORY_PATH = _env('CHAT_HISTORY_PATH', BASE_DIR / 'chat_history.jsonl', Path)
+CHAT_HISTORY_MAX_BYTES = _env('CHAT_HISTORY_MAX_BYTES', 1024 * 1024, int)  # Rotate past 1 MB
+CHAT_HISTORY_BACKUPS = _env('CHAT_HISTORY_BACKUPS', 3, int)  # Rotated files kept (.1 is the newest)
+CHAT_HISTORY_FLUSH_SECONDS = _env('CHAT_HISTORY_FLUSH_SECONDS', 2.0, float)
+
+# Chat context
+CHAT_CONTEXT_TOKENS = _env('CHAT_CONTEXT_TOKENS', 2000, int)  # Persona, summary and turns sent per request
+CHAT_KEEP_TURNS = _env('CHAT_KEEP_TURNS', 4, int)  # Newest exchanges always sent word for word
+CHAT_SUMMARY_WORDS = _env('CHAT_SUMMARY_WORDS', 80, int)
+RESPONSE_CACHE_SECONDS = _env('RESPONSE_CACHE_SECONDS', 600.0, float)  # Repeated questions are answered from memory
+RESPONSE_CACHE_SIZE = _env('RESPONSE_CACHE_SIZE', 256, int)
+
+# Speech
+TTS_CACHE_DIR = _env('TTS_CACHE_DIR', BASE_DIR / 'tts_cache', Path)  # Pre-rendered phrases, kept between runs
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+History benchmark - request-path cost, rotation and tail reads of chatHistory
+Appends synthetic exchanges through HistoryWriter and through the old
+open-append-close per exchange, and compares the time the caller is blocked.
+Then checks that rotation lost nothing and that tail() on a large history
+only reads the end of the file. Everything goes to a temporary directory.
+
+Usage:
+    python historyBench.py
+    python historyBench.py --exchanges 20000 --max-bytes 262144
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+import chatHistory
+
+def make_exchanges(count: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """
+    (user, assistant) pairs with replies of a few sentences
+    """
+    words = "the suit reactor stark arc power flight jarvis friday armor repulsor mark energy".split()
+    sentence = lambda: ' '.join(rng.choice(words) for _ in range(rng.randint(5, 14))).capitalize() + '.'
+    return [(f"question {i}: {sentence()}", ' '.join(sentence() for _ in range(rng.randint(1, 6))))
+            for i in range(count)]
+
+def sync_append(path: Path, user: str, assistant: str):
+    """
+    The previous send_and_save approach
+    """
+    with open(path, "a") as f:
+        f.write(f"User: {user}\n")
+        f.write(f"Assistant: {assistant}\n\n")
+
+def percentiles(values: List[float]) -> Tuple[float, float]:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2], ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="JARVIS chat history writer benchmark")
+    parser.add_argument('--exchanges', type=int, default=5000, help="Exchanges to append")
+    parser.add_argument('--max-bytes', type=int, default=256 * 1024, help="Rotation size")
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - appends, rotates, tails and prints the results
+    Exit code is 1 when any check fails
+    """
+    args = parse_arguments()
+    exchanges = make_exchanges(args.exchanges, random.Random(66))
+    directory = Path(tempfile.mkdtemp(prefix='jarvis-history-'))
+
+    sync_path = directory / 'Chat_Hist.txt'
+    sync_times = []
+    for user, assistant in exchanges:
+        start = time.perf_counter()
+        sync_append(sync_path, user, assistant)
+        sync_times.append((time.perf_counter() - start) * 1e6)
+
+    path = directory / 'chat_history.jsonl'
+    backups = args.exchanges  # Enough that rotation never drops anything here
+    writer = chatHistory.HistoryWriter(path, max_bytes=args.max_bytes, backups=backups, flush_seconds=0.5)
+    queued_times = []
+    for user, assistant in exchanges:
+        start = time.perf_counter()
+        writer.append(user, assistant)
+        queued_times.append((time.perf_counter() - start) * 1e6)
+    start = time.perf_counter()
+    writer.close()
+    drain_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'writer':<16}{'p50 us':>10}{'p99 us':>10}")
+    for name, times in (('open per write', sync_times), ('queued', queued_times)):
+        p50, p99 = percentiles(times)
+        print(f"{name:<16}{p50:>10.1f}{p99:>10.1f}")
+    files = sorted(directory.glob('chat_history.jsonl*'))
+    print(f"\n{writer.batches} batches, {writer.rotations} rotations into {len(files)} files, "
+          f"drained in {drain_ms:.0f} ms on close")
+
+    start = time.perf_counter()
+    last = chatHistory.tail(path, 20)
+    tail_ms = (time.perf_counter() - start) * 1000
+    rotated = sorted(files[1:], key=lambda f: int(f.suffix[1:]), reverse=True)  # Oldest first
+    records = [json.loads(line) for file in rotated + files[:1] for line in file.read_text('utf-8').splitlines()]
+    print(f"tail(20) in {tail_ms:.2f} ms")
+
+    results = [
+        ("every exchange is on disk, in order", [(r['user'], r['assistant']) for r in records] == exchanges),
+        ("no file is larger than the rotation size", all(f.stat().st_size <= args.max_bytes for f in files)),
+        ("tail returns the newest exchanges, oldest first",
+         [(r['user'], r['assistant']) for r in last] == exchanges[-20:]),
+        ("tail spans rotated files", [(r['user'], r['assistant'])
+                                      for r in chatHistory.tail(path, len(exchanges))] == exchanges),
+    ]
+    print()
+    for name, ok in results:
+        print(f"{'✓' if ok else '✗'} {name}")
+    return 0 if all(ok for _, ok in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,74 +1,301 @@
 # main.py
 
-import speech_recognition as sr
-import pyttsx3
+import time
+STARTED = time.perf_counter()
+
+import asyncio
+import threading
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import speech_recognition as sr
 import musicLibrary
-import requests
-from client import send_and_save
+from audioInput import CALIBRATION_SECONDS, LatencyReport, MicrophoneStream
+from commandRouter import CommandRegistry, SongIndex
+from news import NewsClient, NewsUnavailable
+from client import ERROR_REPLY, send_and_save, warm_up
+from tts import TTSWorker
+
+# Slow imports and setup (pyttsx3, pygame, wakeWord with numpy, requests,
+# google.generativeai and the Gemini persona request) wait for first use or run in the background once
+# the microphone is open, so JARVIS starts listening right away.
+# python startupBench.py checks this with -X importtime.
 
 recognizer = sr.Recognizer()
-engine = pyttsx3.init()
-newsapi = '#ADD YOUR NewsApi key#' # Do not Redeem(any one else)!!!!!
+news = NewsClient()
+
+WAKE_WORD = 'jarvis'
+GREETING = 'Iniatializing JARVIS'
+ACKNOWLEDGEMENT = 'Yes sir, how can I help you?'
+NO_SONG = 'Sorry, I could not find that song in the library.'
+NO_NEWS = 'Sorry, I could not get the news right now.'
+
+# Fixed phrases are pre-rendered by the TTS worker, so they play without synthesis
+# (song announcements are rendered later, while JARVIS is idle)
+tts = TTSWorker([ACKNOWLEDGEMENT, GREETING, NO_SONG, NO_NEWS, ERROR_REPLY],
+                [f'Playing {title}' for title in musicLibrary.music_])
+
+# Blocking libraries run in executors so the event loop never waits on them
+# (speech has its own thread in the TTS worker). Commands get their own threads,
+# so a command still winding down after a barge-in never holds up recognition.
+work_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='jarvis-work')
+command_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='jarvis-command')
 
 def speak(text):
-    engine.say(text)
-    engine.runAndWait()
-
-def processCommand(c):
-    if 'open google' in c.lower():
-        webbrowser.open('https://www.google.com')
-    elif 'open youtube' in c.lower():
-        webbrowser.open('https://www.youtube.com')
-    elif 'open linkedin' in c.lower():
-        webbrowser.open('https://www.linkedin.com')
-    elif 'open facebook' in c.lower():
-        webbrowser.open('https://www.facebook.com')
-    elif 'open pinterest' in c.lower():
-        webbrowser.open('https://www.pinterest.com')
-    elif c.lower().startswith('play song'):
-        song_name = c.lower().replace('play song', '').strip()
-        if song_name in musicLibrary.music_:
-            webbrowser.open(musicLibrary.music_[song_name])
-            speak(f'Playing {song_name}')
-        else:
-            speak('Sorry, I could not find that song in the library.')
-    elif 'news' in c.lower():
-        r = requests.get(f'https://newsapi.org/v2/top-headlines?country=us&apiKey={newsapi}')
-        if r.status_code == 200:
-            data = r.json()
-            articles = data.get('articles', [])
-            for article in articles:
-                speak(article['title'])
-        else:
-            pass
+    tts.say(text).result()
+
+def load_detector():
+    from wakeWord import WakeWordDetector
+    return WakeWordDetector()
+
+SITES = {
+    'google': 'https://www.google.com',
+    'youtube': 'https://www.youtube.com',
+    'linkedin': 'https://www.linkedin.com',
+    'facebook': 'https://www.facebook.com',
+    'pinterest': 'https://www.pinterest.com',
+}
+
+songs = SongIndex(musicLibrary.music_)
+
+# Command handlers take (argument, say, cancelled); cancelled is set on a barge-in
+def open_site(url, command, say, cancelled):
+    webbrowser.open(url)
+
+def play_song(song_name, say, cancelled):
+    title, _ = songs.match(song_name)
+    if title is not None:
+        webbrowser.open(musicLibrary.music_[title])
+        say(f'Playing {title}')
     else:
-        response_text = send_and_save(c)
-        speak(response_text)
+        say(NO_SONG)
 
-if __name__ == '__main__':
-    speak("Iniatializing JARVIS")
+def read_news(command, say, cancelled):
+    try:
+        headlines = news.headlines()
+    except NewsUnavailable as e:
+        print("News error; {0}".format(e))
+        if not cancelled.is_set():
+            say(NO_NEWS)
+        return
+    for title in headlines:
+        if cancelled.is_set():
+            return
+        say(title)
 
-    while True:
-        r = sr.Recognizer()
-        print('recognising....')
-        try:
-            with sr.Microphone() as source:
-                print("Listening....")
-                recognizer.adjust_for_ambient_noise(source, duration=1)
-                audio = r.listen(source, timeout=5, phrase_time_limit=7)
-            word = r.recognize_google(audio)
-
-            if (word.lower() == 'jarvis'):
-                speak('Yes sir, how can I help you?')
-           
-                with sr.Microphone() as source:
-                    print("Jarvis Active.....")
-                    recognizer.adjust_for_ambient_noise(source, duration=1)
-                    audio = r.listen(source, timeout=5, phrase_time_limit=7)
-                    command = r.recognize_google(audio)
-
-                    processCommand(command)
+def chat(command, say, cancelled):
+    # Sentences are queued for speech as the reply streams in
+    send_and_save(command, on_sentence=say, cancelled=cancelled)
+
+def build_router():
+    router = CommandRegistry(fallback=chat)
+    for site, url in SITES.items():
+        router.register_keywords(f'open {site}', partial(open_site, url))
+    router.register_prefix('play song', play_song)
+    router.register_keywords('news', read_news)
+    return router
+
+router = build_router()
+
+def processCommand(c, say=speak, cancelled=None):
+    # say() queues speech; it is called from a command thread when run by Jarvis
+    route = router.route(c)
+    route.handler(route.argument, say, cancelled or threading.Event())
+
+class Turn:
+    # One wake-word activation; everything it queued is dropped once it is cancelled
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self.dispatched = None  # When its command started running
+        self.spoken = False
+
+class Jarvis:
+    # The microphone thread and three tasks joined by queues:
+    #   microphone -> audio_queue -> recognize -> command_queue -> dispatch -> speech_queue -> talk
+    # The microphone keeps listening while JARVIS thinks or talks, so saying the
+    # wake word again barges in: speech stops and the running command is abandoned.
 
+    def __init__(self):
+        self.loop = None
+        self.audio_queue = asyncio.Queue()
+        self.microphone = MicrophoneStream(self.on_phrase)
+        self.detector = None  # Loaded in the background by run()
+        self.latency = LatencyReport()
+        self.wake_phrase = None  # Phrase that held the wake word of the current activation
+        self.command_queue = asyncio.Queue()
+        self.speech_queue = asyncio.Queue()
+        self.turn = Turn()
+        self.awake = False  # Wake word heard, the next utterance is the command
+        self.speaking = False
+        self.last_spoken = 0.0  # When the last utterance finished playing
+        self.running_command = None
+
+    def say(self, text, turn=None):
+        # Thread-safe: queue text for the talk task
+        turn = turn or self.turn
+        self.loop.call_soon_threadsafe(self.speech_queue.put_nowait, (turn, text))
+
+    def barge_in(self):
+        self.turn.cancelled.set()
+        self.turn = Turn()
+        while not self.speech_queue.empty():
+            self.speech_queue.get_nowait()
+        if self.running_command is not None:
+            self.running_command.cancel()  # Its thread stops at the next check of the old turn's cancelled
+        tts.interrupt()
+
+    def busy(self):
+        return self.speaking or not self.speech_queue.empty() or (
+            self.running_command is not None and not self.running_command.done())
+
+    def on_phrase(self, phrase):
+        # Called on the microphone thread; remember whether the phrase may contain our own voice
+        overlapped = self.speaking or phrase.started < self.last_spoken
+        self.loop.call_soon_threadsafe(self.audio_queue.put_nowait, (phrase, overlapped))
+
+    async def transcribe(self, audio):
+        try:
+            word = await self.loop.run_in_executor(work_executor, recognizer.recognize_google, audio)
+        except sr.UnknownValueError:
+            return None
         except Exception as e:
             print("Error; {0}".format(e))
+            return None
+        print('recognising....', word)
+        return word
+
+    def wake(self, phrase):
+        if self.busy():
+            self.barge_in()
+        self.wake_phrase = phrase
+        self.latency.record('wake word recognized', time.monotonic() - phrase.ended)
+
+    def listen_for_command(self):
+        self.awake = True
+        self.say(ACKNOWLEDGEMENT)
+        print("Jarvis Active.....")
+
+    def command_heard(self, phrase):
+        self.awake = False
+        to_command = phrase.started - self.wake_phrase.ended
+        self.latency.record('wake word to command', to_command)
+        print(f"Latency: wake word to command start {to_command:.2f}s")
+
+    async def recognize(self):
+        while True:
+            phrase, overlapped = await self.audio_queue.get()
+            if self.detector.templates:
+                await self.recognize_local(phrase, overlapped)
+            else:
+                await self.recognize_cloud(phrase, overlapped)
+
+    async def recognize_local(self, phrase, overlapped):
+        # The wake word is matched on this machine; only what follows it is sent to Google
+        detection = await self.loop.run_in_executor(work_executor, self.detector.detect, phrase.audio)
+        if detection is not None:
+            self.wake(phrase)
+            print(f"Wake word (distance {detection.score:.2f})")
+            if detection.after is None:
+                self.listen_for_command()
+                return
+            self.awake = False
+            audio = detection.after  # "jarvis open google" in one phrase
+        elif self.awake and not overlapped:
+            self.command_heard(phrase)
+            audio = phrase.audio
+        else:
+            return  # Background speech never leaves the machine
+
+        turn = self.turn
+        word = await self.transcribe(audio)
+        if word:
+            self.latency.record('command recognized', time.monotonic() - phrase.ended)
+            await self.command_queue.put((turn, word))
+
+    async def recognize_cloud(self, phrase, overlapped):
+        # Without wake word templates every phrase is sent to Google to look for the wake word
+        word = await self.transcribe(phrase.audio)
+        if not word:
+            return
+        words = word.lower().split()
+        if words and words[0] == WAKE_WORD:
+            self.wake(phrase)
+            command = ' '.join(word.split()[1:])
+            if command:
+                self.awake = False
+                await self.command_queue.put((self.turn, command))
+            else:
+                self.listen_for_command()
+        elif self.awake and not overlapped:
+            self.command_heard(phrase)
+            self.latency.record('command recognized', time.monotonic() - phrase.ended)
+            await self.command_queue.put((self.turn, word))
+
+    async def dispatch(self):
+        while True:
+            turn, command = await self.command_queue.get()
+            if turn.cancelled.is_set():
+                continue
+            say = partial(self.say, turn=turn)  # Bound now: dispatch rebinds turn for the next command
+            turn.dispatched = time.monotonic()
+            self.running_command = self.loop.run_in_executor(command_executor, processCommand, command, say,
+                                                             turn.cancelled)
+            try:
+                await self.running_command
+            except asyncio.CancelledError:
+                if not turn.cancelled.is_set():
+                    raise
+                print("Command interrupted")
+            except Exception as e:
+                print("Error; {0}".format(e))
+
+    async def talk(self):
+        while True:
+            turn, text = await self.speech_queue.get()
+            if turn.cancelled.is_set():
+                continue
+            self.speaking = True
+            if turn.dispatched is not None and not turn.spoken:
+                turn.spoken = True
+                self.latency.record('command to first speech', time.monotonic() - turn.dispatched)
+            try:
+                await asyncio.wrap_future(tts.say(text))
+            except Exception as e:
+                print("Speech error; {0}".format(e))
+            finally:
+                self.speaking = False
+                self.last_spoken = time.monotonic()
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        # Everything slow is set up while the microphone calibrates
+        detector = self.loop.run_in_executor(work_executor, load_detector)
+        tts.start()  # Engine start-up and rendering of the short phrases (first run only), before any speech
+        warm_up()  # Gemini import and persona request
+        # The stream is opened and calibrated once, before JARVIS makes any sound
+        await self.loop.run_in_executor(None, self.microphone.start)
+        self.latency.record('startup to listening', time.perf_counter() - STARTED)
+        print(f"Listening.... (after {(time.perf_counter() - STARTED) * 1000:.0f} ms, "
+              f"{CALIBRATION_SECONDS * 1000:.0f} ms of it calibrating)")
+        self.detector = await detector
+        if not self.detector.templates:
+            print("No wake word templates - the wake word is checked by Google "
+                  "(record templates with: python wakeWord.py --enroll 5)")
+        self.say(GREETING)
+        try:
+            await asyncio.gather(self.recognize(), self.dispatch(), self.talk())
+        finally:
+            self.microphone.stop()
+
+if __name__ == '__main__':
+    jarvis = Jarvis()
+    try:
+        asyncio.run(jarvis.run())
+    except KeyboardInterrupt:
+        pass
+    for kind, delays in tts.start_delays.items():
+        for delay in delays:
+            jarvis.latency.record(f'speech start ({kind})', delay)
+    if jarvis.latency.samples:
+        print(f"\nLatency report ({jarvis.microphone.recalibrations} recalibrations)")
+        print(jarvis.latency.summary())
@@ -0,0 +1,74 @@
+# news.py
+
+import threading
+import time
+import config
+
+class NewsUnavailable(Exception):
+    pass
+
+def make_session(retries=config.HTTP_RETRIES):
+    # One pooled session for the whole run: connections are kept alive between
+    # requests, and failed GETs are retried with backoff (honouring Retry-After)
+    import requests  # Imported on first use; it is slow enough to delay startup
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset({'GET'}), raise_on_status=False)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=2, pool_maxsize=4)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+class NewsClient:
+    # Top headlines from NewsAPI. The articles payload is cached for
+    # cache_seconds, so asking for the news again within that window does not
+    # touch the network. If a refresh fails, the last payload is served instead.
+
+    def __init__(self, api_key=config.NEWS_API_KEY, base_url=config.NEWS_API_URL, country=config.NEWS_COUNTRY,
+                 cache_seconds=config.NEWS_CACHE_SECONDS, top_n=config.NEWS_TOP_N,
+                 timeout=(config.HTTP_CONNECT_TIMEOUT, config.HTTP_READ_TIMEOUT), session=None):
+        self.api_key = api_key
+        self.url = f"{base_url.rstrip('/')}/top-headlines"
+        self.country = country
+        self.cache_seconds = cache_seconds
+        self.top_n = top_n
+        self.timeout = timeout
+        self.session = session  # Created on the first fetch
+        self.fetches = 0  # Requests that went to the network
+        self._articles = None
+        self._fetched = 0.0
+        self._lock = threading.Lock()  # Concurrent callers share one fetch
+
+    def articles(self):
+        import requests
+        with self._lock:
+            if self._articles is not None and time.monotonic() - self._fetched < self.cache_seconds:
+                return self._articles
+            try:
+                articles = self._fetch()
+            except (requests.RequestException, ValueError) as e:
+                if self._articles is None:
+                    raise NewsUnavailable(str(e)) from e
+                print("News refresh failed, using cached headlines; {0}".format(e))
+                return self._articles
+            self._articles, self._fetched = articles, time.monotonic()
+            return articles
+
+    def _fetch(self):
+        if self.session is None:
+            self.session = make_session()
+        self.fetches += 1
+        # The key goes in a header so it never shows up in logged URLs
+        response = self.session.get(self.url, params={'country': self.country},
+                                    headers={'X-Api-Key': self.api_key}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get('articles', [])
+
+    def headlines(self, limit=None):
+        # Titles of the top articles, at most limit (default top_n)
+        limit = self.top_n if limit is None else limit
+        titles = [article['title'] for article in self.articles() if article.get('title')]
+        return titles[:limit]
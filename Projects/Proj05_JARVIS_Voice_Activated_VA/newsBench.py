@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+News harness - checks news.NewsClient against a local stub NewsAPI server
+Starts an HTTP server on localhost that serves canned headlines (and can fail
+or stall on request), points a NewsClient at it and checks the cache, the
+top-N cap, retries, timeouts, connection reuse and the stale-cache fallback.
+Prints the latency of network and cached lookups. Nothing leaves the machine.
+
+Usage:
+    python newsBench.py
+    python newsBench.py --articles 50 --top 3
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Tuple
+
+from news import NewsClient, NewsUnavailable, make_session
+
+class StubState:
+    def __init__(self, articles: int):
+        self.articles = [{'title': f"Headline {i + 1}", 'url': f"https://example.com/{i + 1}"}
+                         for i in range(articles)]
+        self.requests = 0
+        self.connections = set()  # Client (host, port) pairs seen
+        self.fail_next = 0  # Answer this many requests with 503
+        self.delay = 0.0  # Seconds to stall before answering
+        self.last_api_key = None
+        self.lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, so connection reuse is visible
+
+    def do_GET(self):
+        state = self.server.state
+        with state.lock:
+            state.requests += 1
+            state.connections.add(self.client_address)
+            state.last_api_key = self.headers.get('X-Api-Key')
+            failing = state.fail_next > 0
+            state.fail_next -= failing
+        time.sleep(state.delay)
+        if failing:
+            body, status = b'{"status": "error"}', 503
+        else:
+            body, status = json.dumps({'status': 'ok', 'articles': state.articles}).encode(), 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # The client hanging up on a stalled request is expected
+
+def start_stub(articles: int) -> Tuple[StubServer, str]:
+    """
+    Start the stub server on a free port
+    Returns: (server, base URL)
+    """
+    server = StubServer(('127.0.0.1', 0), StubHandler)
+    server.state = StubState(articles)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v2"
+
+def timed(call: Callable) -> Tuple[object, float]:
+    """
+    Run call, returning (result, milliseconds)
+    """
+    start = time.perf_counter()
+    result = call()
+    return result, (time.perf_counter() - start) * 1000
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="JARVIS news client harness (local stub server)")
+    parser.add_argument('--articles', type=int, default=20, help="Articles served by the stub")
+    parser.add_argument('--top', type=int, default=5, help="Headlines to read aloud")
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - runs the checks and prints one line per check
+    Exit code is 1 when any check fails
+    """
+    args = parse_arguments()
+    server, url = start_stub(args.articles)
+    state = server.state
+    results: List[Tuple[str, bool]] = []
+    check = lambda name, ok: results.append((name, bool(ok)))
+
+    news = NewsClient(api_key='stub-key', base_url=url, top_n=args.top, cache_seconds=600,
+                      timeout=(1.0, 0.5), session=make_session(retries=2))
+    headlines, network_ms = timed(news.headlines)
+    check(f"top-{args.top} cap ({len(headlines)} of {args.articles} headlines)",
+          len(headlines) == min(args.top, args.articles))
+    check("API key sent as a header", state.last_api_key == 'stub-key')
+    _, cached_ms = timed(news.headlines)
+    check("second request within the TTL is served from cache", state.requests == 1 and news.fetches == 1)
+
+    news.cache_seconds = 0  # Every lookup goes to the server from here on
+    for _ in range(5):
+        news.headlines()
+    check(f"pooled session reuses connections ({len(state.connections)} for {state.requests} requests)",
+          len(state.connections) == 1)
+
+    state.fail_next = 2
+    before = state.requests
+    check("two 503s are retried", news.headlines() and state.requests - before == 3)
+
+    state.delay = 1.0
+    _, stale_ms = timed(news.headlines)
+    check(f"stalled server times out and cached headlines are served ({stale_ms:.0f} ms)", stale_ms < 3500)
+    fresh = NewsClient(api_key='stub-key', base_url=url, timeout=(1.0, 0.5), session=make_session(retries=0))
+    try:
+        fresh.headlines()
+        check("stalled server without a cache raises NewsUnavailable", False)
+    except NewsUnavailable:
+        check("stalled server without a cache raises NewsUnavailable", True)
+    state.delay = 0.0
+    server.shutdown()
+
+    print(f"Network lookup {network_ms:.1f} ms, cached lookup {cached_ms * 1000:.0f} us\n")
+    for name, ok in results:
+        print(f"{'✓' if ok else '✗'} {name}")
+    return 0 if all(ok for _, ok in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Router benchmark - routing latency and fuzzy song accuracy of commandRouter
+Registers thousands of synthetic commands and songs next to the real ones,
+routes a mix of spoken-style queries (site commands, exact and misheard song
+titles, chat questions) and reports latency percentiles, song match accuracy,
+and the same queries through a linear if/elif-style scan for comparison.
+
+Usage:
+    python routerBench.py                              # 5,000 commands, 5,000 songs
+    python routerBench.py --commands 20000 --songs 50000
+    python routerBench.py --max-p99-us 500             # exit code 1 when p99 is above 500 us (default 1000)
+"""
+
+import sys
+import time
+import random
+import argparse
+import difflib
+from typing import Callable, Dict, List, Tuple
+
+import musicLibrary
+from commandRouter import CommandRegistry, SongIndex, normalize
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ne', 'to', 'su', 'vi', 'da', 'yo', 'shi', 'an', 'el', 'or', 'um', 'be']
+
+def make_word(rng: random.Random) -> str:
+    """
+    A pronounceable made-up word
+    """
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+
+def mishear(title: str, rng: random.Random) -> str:
+    """
+    Distort a title the way speech recognition does: a dropped, swapped or shortened word
+    """
+    words = title.split()
+    i = rng.randrange(len(words))
+    word = words[i]
+    choice = rng.randrange(3)
+    if choice == 0 and len(word) > 3:
+        words[i] = word[:-1]  # Clipped ending
+    elif choice == 1 and len(word) > 2:
+        j = rng.randrange(len(word) - 1)
+        words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]  # Swapped letters
+    elif len(words) > 2:
+        del words[i]  # Dropped word
+    else:
+        words[i] = word[0] + word  # Stutter
+    return ' '.join(words)
+
+def build(commands: int, songs: int, rng: random.Random) -> Tuple[CommandRegistry, SongIndex, Dict[str, str], List[str]]:
+    """
+    Registry and song index with the real commands plus synthetic ones
+    Returns: (registry, song index, library, synthetic site names)
+    """
+    noop = lambda *args: None
+    registry = CommandRegistry(fallback=noop)
+    sites = ['google', 'youtube', 'linkedin', 'facebook', 'pinterest']
+    sites += [f"{make_word(rng)}{i}" for i in range(commands)]
+    for site in sites:
+        registry.register_keywords(f'open {site}', noop)
+    registry.register_prefix('play song', noop)
+    registry.register_keywords('news', noop)
+
+    library = dict(musicLibrary.music_)
+    while len(library) < len(musicLibrary.music_) + songs:
+        library[' '.join(make_word(rng) for _ in range(rng.randint(2, 4)))] = 'https://example.com'
+    return registry, SongIndex(library), library, sites
+
+def make_queries(sites: List[str], library: Dict[str, str], count: int,
+                 rng: random.Random) -> List[Tuple[str, str, str]]:
+    """
+    (spoken text, expected command, expected song or '') tuples
+    """
+    titles = list(library)
+    queries = [('play song shape of u', 'play song', 'shape of you')]
+    while len(queries) < count:
+        kind = rng.randrange(4)
+        if kind == 0:
+            site = rng.choice(sites)
+            queries.append((f"please open {site} for me", f"open {site}", ''))
+        elif kind == 1:
+            title = rng.choice(titles)
+            queries.append((f"play song {title}", 'play song', title))
+        elif kind == 2:
+            title = rng.choice(titles)
+            queries.append((f"play song {mishear(normalize(title), rng)}", 'play song', title))
+        else:
+            queries.append((f"what is the {make_word(rng)} of {make_word(rng)}", 'chat', ''))
+    return queries
+
+def route_indexed(registry: CommandRegistry, songs: SongIndex) -> Callable[[str], Tuple[str, str]]:
+    def route(text: str) -> Tuple[str, str]:
+        found = registry.route(text)
+        if found.name == 'play song':
+            return found.name, songs.match(found.argument)[0] or ''
+        return found.name, ''
+    return route
+
+def route_linear(sites: List[str], library: Dict[str, str]) -> Callable[[str], Tuple[str, str]]:
+    """
+    The old processCommand approach: a substring scan per command, fuzzy titles via difflib
+    """
+    titles = list(library)
+    def route(text: str) -> Tuple[str, str]:
+        command = text.lower()
+        for site in sites:
+            if f'open {site}' in command:
+                return f'open {site}', ''
+        if command.startswith('play song'):
+            name = command.replace('play song', '').strip()
+            if name in library:
+                return 'play song', name
+            close = difflib.get_close_matches(name, titles, n=1, cutoff=0.6)
+            return 'play song', close[0] if close else ''
+        if 'news' in command:
+            return 'news', ''
+        return 'chat', ''
+    return route
+
+def measure(route: Callable[[str], Tuple[str, str]],
+            queries: List[Tuple[str, str, str]]) -> Tuple[List[float], int, int, int]:
+    """
+    Route every query
+    Returns: (latencies in microseconds, correct commands, correct songs, song queries)
+    """
+    latencies = []
+    commands_ok = songs_ok = song_queries = 0
+    for text, expected_command, expected_song in queries:
+        start = time.perf_counter()
+        command, song = route(text)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        commands_ok += command == expected_command
+        if expected_song:
+            song_queries += 1
+            songs_ok += song == expected_song
+    return latencies, commands_ok, songs_ok, song_queries
+
+def report(name: str, queries: int, result: Tuple[List[float], int, int, int]) -> float:
+    """
+    Print one result row, returning the p99 latency
+    """
+    latencies, commands_ok, songs_ok, song_queries = result
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{name:<10}{queries:>8}{p50:>10.1f}{p99:>10.1f}{ordered[-1]:>11.1f}"
+          f"{commands_ok / queries:>10.1%}{songs_ok / max(song_queries, 1):>9.1%}")
+    return p99
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="JARVIS command router benchmark")
+    parser.add_argument('--commands', type=int, default=5000, help="Synthetic 'open ...' commands")
+    parser.add_argument('--songs', type=int, default=5000, help="Synthetic songs added to the library")
+    parser.add_argument('--queries', type=int, default=5000, help="Queries to route")
+    parser.add_argument('--linear-queries', type=int, default=300,
+                        help="Queries for the linear baseline (it is slow)")
+    parser.add_argument('--max-p99-us', type=float, default=1000,
+                        help="Fail when indexed p99 latency is higher (default: 1000)")
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - builds the index, routes the queries and prints a table
+    """
+    args = parse_arguments()
+    rng = random.Random(66)
+
+    start = time.perf_counter()
+    registry, songs, library, sites = build(args.commands, args.songs, rng)
+    build_ms = (time.perf_counter() - start) * 1000
+    queries = make_queries(sites, library, args.queries, rng)
+    print(f"{len(registry.commands)} commands, {len(library)} songs, index built in {build_ms:.0f} ms")
+
+    print(f"\n{'router':<10}{'queries':>8}{'p50 us':>10}{'p99 us':>10}{'max us':>11}{'commands':>10}{'songs':>9}")
+    p99 = report('indexed', len(queries), measure(route_indexed(registry, songs), queries))
+    linear = queries[:args.linear_queries]
+    if linear:
+        report('linear', len(linear), measure(route_linear(sites, library), linear))
+
+    ok = p99 <= args.max_p99_us
+    print(f"\n{'✓' if ok else '✗'} indexed p99 {p99:.1f} us (at most {args.max_p99_us:.0f} us)")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
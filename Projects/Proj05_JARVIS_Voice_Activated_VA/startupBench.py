@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark - how long importing main.py takes, measured with -X importtime
+Imports main in a fresh interpreter a few times, parses the -X importtime
+report and prints the cost of each module main imports. Fails when the import
+is over budget or when one of the slow libraries that should wait for first
+use (pyttsx3, pygame, numpy, requests, google.generativeai) is imported up front.
+
+Usage:
+    python startupBench.py
+    python startupBench.py --runs 5 --max-ms 200
+    python startupBench.py --module client                 # another module's import cost
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+DEFERRED = ('pyttsx3', 'pygame', 'numpy', 'requests', 'google.generativeai')
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def import_times(module: str) -> Tuple[List[Tuple[int, int, int, str]], float]:
+    """
+    Import module in a fresh interpreter
+    Returns: ((self us, cumulative us, nesting level, name) per import, wall seconds)
+    """
+    command = [sys.executable, '-X', 'importtime', '-c', f"import time; t = time.perf_counter(); "
+               f"import {module}; print(time.perf_counter() - t)"]
+    result = subprocess.run(command, cwd=Path(__file__).resolve().parent, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed')
+    imports = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            imports.append((int(match[1]), int(match[2]), len(match[3]) // 2, match[4]))
+    return imports, float(result.stdout.strip().splitlines()[-1])
+
+def direct_imports(imports: List[Tuple[int, int, int, str]], module: str) -> Dict[str, int]:
+    """
+    Cumulative microseconds of each module imported directly by module
+    (importtime prints children before their parent, one level deeper)
+    """
+    for index, (_, _, level, name) in enumerate(imports):
+        if name == module:
+            children = {}
+            for _, cumulative, child_level, child in reversed(imports[:index]):
+                if child_level <= level:
+                    break
+                if child_level == level + 1:
+                    children[child] = cumulative
+            return children
+    return {}
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="JARVIS startup import time benchmark")
+    parser.add_argument('--module', default='main', help="Module to import (default: main)")
+    parser.add_argument('--runs', type=int, default=3, help="Fresh interpreters to time (the best is kept)")
+    parser.add_argument('--max-ms', type=float, default=300, help="Fail when the import takes longer")
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - imports the module, prints the breakdown and checks the budget
+    Exit code is 1 when a check fails, 2 when the module cannot be imported
+    """
+    args = parse_arguments()
+    runs = []
+    for _ in range(max(1, args.runs)):
+        try:
+            runs.append(import_times(args.module))
+        except RuntimeError as e:
+            print(f"Could not import {args.module}: {e}")
+            return 2
+    imports, wall = min(runs, key=lambda run: run[1])
+    loaded = {name for _, _, _, name in imports}
+    cumulative = next((c for _, c, _, name in imports if name == args.module), 0)
+
+    print(f"import {args.module}: {wall * 1000:.0f} ms wall, {cumulative / 1000:.0f} ms in imports "
+          f"(best of {len(runs)})\n")
+    print(f"{'module':<28}{'ms':>8}")
+    for name, micros in sorted(direct_imports(imports, args.module).items(), key=lambda item: -item[1]):
+        print(f"{name:<28}{micros / 1000:>8.1f}")
+
+    results = [(f"import takes at most {args.max_ms:.0f} ms", wall * 1000 <= args.max_ms)]
+    for name in DEFERRED:
+        results.append((f"{name} is not imported at startup", name not in loaded))
+    print()
+    for name, ok in results:
+        print(f"{'✓' if ok else '✗'} {name}")
+    return 0 if all(ok for _, ok in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
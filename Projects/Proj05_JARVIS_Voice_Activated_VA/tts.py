@@ -0,0 +1,158 @@
+# tts.py
+
+import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+import config
+
+class TTSWorker:
+    # Speech runs on one thread that owns the pyttsx3 engine for the whole
+    # session (pyttsx3 must always be driven from the thread that created it).
+    # say() queues an utterance and returns a Future that completes with True
+    # once it has been spoken, or False if it was interrupted first.
+    # Fixed phrases are rendered to WAV files (kept in cache_dir between runs) and
+    # loaded into memory as pygame sounds, so they play at once instead of being
+    # synthesized. The few short phrases are rendered before the worker takes any
+    # speech; idle_phrases (one per song, say) follow one at a time, only while
+    # nothing is waiting to be said. Without pygame, or for any other text, the
+    # engine speaks directly.
+    # interrupt() only bumps a generation counter; the worker notices it between
+    # words (the engine's started-word callback) and stops the engine itself.
+
+    def __init__(self, phrases=(), idle_phrases=(), cache_dir=config.TTS_CACHE_DIR):
+        self.phrases = list(dict.fromkeys(phrases))
+        self.idle_phrases = [p for p in dict.fromkeys(idle_phrases) if p not in self.phrases]
+        self.cache_dir = Path(cache_dir)
+        self.engine = None
+        self.sounds = {}  # text -> pygame Sound
+        self.start_delays = {'cached': [], 'synthesized': []}  # Seconds from say() to sound
+        self.rendered = threading.Event()  # Set once every phrase, idle ones included, is cached (or can't be)
+        self._pygame = None
+        self._queue = queue.Queue()
+        self._generation = 0  # Bumped by interrupt(); older utterances are dropped
+        self._speaking = None  # Generation of the utterance the engine is speaking
+        self._utterance_started = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='jarvis-tts', daemon=True)
+                self._thread.start()
+
+    def say(self, text):
+        self.start()
+        future = Future()
+        self._queue.put((text, future, self._generation, time.monotonic()))
+        return future
+
+    def interrupt(self):
+        # Stops the current utterance and drops everything queued before this call
+        with self._lock:
+            self._generation += 1
+
+    def _run(self):
+        try:
+            import pyttsx3
+            self.engine = pyttsx3.init()
+            self.engine.connect('started-utterance', self._on_started)
+            self.engine.connect('started-word', self._on_word)
+        except Exception as e:
+            print("TTS error; {0}".format(e))
+        pending = []
+        if self.engine is not None:
+            # Short phrases first, so an acknowledgement never waits behind a render
+            for phrase in self.phrases:
+                self._cache_phrase(phrase)
+            pending = list(self.idle_phrases)
+        if not pending:
+            self.rendered.set()
+        while True:
+            try:
+                item = self._queue.get(block=not pending)
+            except queue.Empty:
+                self._cache_phrase(pending.pop(0))  # One render, then the queue is checked again
+                if not pending:
+                    self.rendered.set()
+                continue
+            text, future, generation, queued = item
+            if generation != self._generation:
+                future.set_result(False)
+                continue
+            try:
+                future.set_result(self._speak(text, generation, queued))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _on_started(self, name):
+        self._utterance_started = time.monotonic()
+
+    def _on_word(self, name, location, length):
+        # Runs on the worker thread inside runAndWait, so the engine is only
+        # ever driven from the thread that created it
+        if self._speaking is not None and self._speaking != self._generation:
+            self.engine.stop()
+
+    def _speak(self, text, generation, queued):
+        sound = self.sounds.get(text)
+        channel = sound.play() if sound is not None else None  # None when every mixer channel is busy
+        if channel is not None:
+            self.start_delays['cached'].append(time.monotonic() - queued)
+            while channel.get_busy():
+                if generation != self._generation:
+                    channel.stop()
+                    return False
+                time.sleep(0.01)
+            return True
+
+        if self.engine is None:
+            raise RuntimeError('no speech engine')
+        if generation != self._generation:
+            return False
+        self._speaking, self._utterance_started = generation, None
+        try:
+            self.engine.say(text)
+            self.engine.runAndWait()
+        finally:
+            self._speaking = None
+        if self._utterance_started is not None:
+            self.start_delays['synthesized'].append(self._utterance_started - queued)
+        return generation == self._generation
+
+    def _mixer(self):
+        if self._pygame is None:
+            try:
+                os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+                import pygame
+                pygame.mixer.init()
+                self._pygame = pygame
+            except Exception as e:
+                print("TTS cache disabled (pygame mixer unavailable); {0}".format(e))
+                self._pygame = False
+        return self._pygame or None
+
+    def cache_path(self, text):
+        # One file per phrase, voice and rate, so changing the voice renders again
+        key = f"{self.engine.getProperty('voice')}|{self.engine.getProperty('rate')}|{text}"
+        return self.cache_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.wav"
+
+    def _cache_phrase(self, text):
+        pygame = self._mixer()
+        if pygame is None:
+            return
+        try:
+            path = self.cache_path(text)
+            if not path.exists():
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                rendering = path.with_suffix('.part.wav')
+                self.engine.save_to_file(text, str(rendering))
+                self.engine.runAndWait()
+                os.replace(rendering, path)
+            self.sounds[text] = pygame.mixer.Sound(str(path))
+        except Exception as e:
+            print("TTS cache error for {0!r}; {1}".format(text, e))
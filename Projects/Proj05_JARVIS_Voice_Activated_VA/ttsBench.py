@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+TTS benchmark - time to first sound for cached and synthesized phrases in tts
+Starts a TTSWorker on this machine's speech engine, renders a set of fixed
+phrases and song announcements into a fresh cache, then speaks each phrase
+(played from the cache) and a variant of it (synthesized by the engine) and
+reports how long each took to start sounding. Also checks that an
+acknowledgement does not wait for the song announcements to be rendered and
+that interrupt() cuts an utterance short.
+This plays audio through the speakers.
+
+Usage:
+    python ttsBench.py
+    python ttsBench.py --cache-dir tts_cache           # reuse (and fill) the real cache
+    python ttsBench.py --max-cached-ms 50              # exit code 1 when cached phrases start slower
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List
+
+from tts import TTSWorker
+
+PHRASES = [
+    'Yes sir, how can I help you?',
+    'Iniatializing JARVIS',
+    'Sorry, I could not get the news right now.',
+]
+SONG_PHRASES = [f'Playing {title}' for title in ('shape of you', 'despacito', 'faded', 'believer', 'perfect',
+                                                  'closer', 'stay', 'alone')]
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="JARVIS TTS phrase cache benchmark")
+    parser.add_argument('--cache-dir', type=Path, help="Phrase cache (default: a new temporary directory)")
+    parser.add_argument('--max-cached-ms', type=float, help="Fail when cached phrases take longer to start")
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - renders, speaks and prints the start delays
+    Exit code is 1 when a check fails, 2 when phrases cannot be cached here
+    """
+    args = parse_arguments()
+    worker = TTSWorker(PHRASES, SONG_PHRASES, args.cache_dir or Path(tempfile.mkdtemp(prefix='jarvis-tts-')))
+    start = time.perf_counter()
+    worker.start()
+    acknowledged = worker.say(PHRASES[0])  # Queued at once, like the first wake word of a session
+    acknowledged.result()
+    acknowledgement_s = time.perf_counter() - start
+    early = not worker.rendered.is_set()
+    worker.rendered.wait()
+    render_s = time.perf_counter() - start
+    if not worker.sounds:
+        print("No phrases were cached (is pygame installed and is there an audio device?)")
+        return 2
+    phrases = PHRASES + SONG_PHRASES
+    print(f"Acknowledgement after {acknowledgement_s:.2f}s; engine start and "
+          f"{len(worker.sounds)}/{len(phrases)} phrases cached in {render_s:.2f}s")
+
+    for phrase in phrases:
+        worker.say(phrase).result()
+        worker.say(f"{phrase} Right away.").result()
+
+    interrupted = worker.say("This is a much longer sentence that keeps going so that it can be cut off "
+                             "by a barge in before it has finished playing.")
+    time.sleep(0.5)
+    start = time.perf_counter()
+    worker.interrupt()
+    finished = interrupted.result(timeout=5)
+    stop_ms = (time.perf_counter() - start) * 1000
+
+    print(f"\n{'phrase':<14}{'n':>4}{'p50 ms':>10}{'p95 ms':>10}")
+    for kind, delays in worker.start_delays.items():
+        if delays:
+            print(f"{kind:<14}{len(delays):>4}{percentile(delays, 0.5) * 1000:>10.1f}"
+                  f"{percentile(delays, 0.95) * 1000:>10.1f}")
+
+    cached = worker.start_delays['cached']
+    results = [
+        ("every fixed phrase played from the cache", len(cached) == len(phrases) + 1),
+        ("the acknowledgement played before the song announcements were rendered",
+         early or args.cache_dir is not None),
+        (f"interrupt stops speech ({stop_ms:.0f} ms)", finished is False),
+    ]
+    if args.max_cached_ms is not None:
+        results.append((f"cached phrases start within {args.max_cached_ms:.0f} ms",
+                        cached and percentile(cached, 0.95) * 1000 <= args.max_cached_ms))
+    print()
+    for name, ok in results:
+        print(f"{'✓' if ok else '✗'} {name}")
+    return 0 if all(ok for _, ok in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
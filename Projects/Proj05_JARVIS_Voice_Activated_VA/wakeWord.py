@@ -0,0 +1,235 @@
+# wakeWord.py
+
+import argparse
+import cmath
+import math
+import wave
+from array import array
+from pathlib import Path
+import speech_recognition as sr
+
+try:
+    import numpy as np  # Optional - makes feature extraction and matching several times faster
+except ImportError:
+    np = None
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'wake_templates'
+
+# Features: log mel band energies of 32 ms windows every 20 ms, on 8 kHz audio
+FEATURE_RATE = 8000
+WINDOW = 256
+HOP = 160
+BANDS = 16
+LOW_HZ = 100
+HIGH_HZ = 3800
+
+WAKE_THRESHOLD = 4.0  # Largest normalized DTW distance still accepted as the wake word
+MIN_WAKE_SECONDS = 0.25
+MIN_COMMAND_SECONDS = 0.4  # Shorter audio after the wake word is not treated as a command
+MAX_STRETCH = 1.8  # The spoken wake word may be this much longer or shorter than a template
+SILENCE_RATIO = 0.1  # 10 ms blocks quieter than this share of the loudest block are silence
+
+def _mel(hz):
+    return 2595 * math.log10(1 + hz / 700)
+
+def _mel_filters():
+    # Triangular filters as (first bin, weights) pairs over the WINDOW // 2 + 1 FFT bins
+    low, high = _mel(LOW_HZ), _mel(HIGH_HZ)
+    points = [700 * (10 ** ((low + (high - low) * i / (BANDS + 1)) / 2595) - 1) for i in range(BANDS + 2)]
+    bins = [hz * WINDOW / FEATURE_RATE for hz in points]
+    filters = []
+    for band in range(BANDS):
+        left, center, right = bins[band], bins[band + 1], bins[band + 2]
+        first = int(math.ceil(left))
+        weights = []
+        for b in range(first, int(right) + 1):
+            weight = (b - left) / (center - left) if b <= center else (right - b) / (right - center)
+            weights.append(max(weight, 0.0))
+        filters.append((first, weights))
+    return filters
+
+_FILTERS = _mel_filters()
+_HAMMING = [0.54 - 0.46 * math.cos(2 * math.pi * n / (WINDOW - 1)) for n in range(WINDOW)]
+_BIT_REVERSE = [int(format(n, f'0{WINDOW.bit_length() - 1}b')[::-1], 2) for n in range(WINDOW)]
+_TWIDDLES = [cmath.exp(-2j * math.pi * k / WINDOW) for k in range(WINDOW // 2)]
+
+def _fft(values):
+    # Iterative radix-2 FFT of WINDOW real values (used when numpy is missing)
+    out = [complex(values[i]) for i in _BIT_REVERSE]
+    size = 2
+    while size <= WINDOW:
+        half, step = size // 2, WINDOW // size
+        for start in range(0, WINDOW, size):
+            for k in range(half):
+                t = _TWIDDLES[k * step] * out[start + k + half]
+                u = out[start + k]
+                out[start + k] = u + t
+                out[start + k + half] = u - t
+        size *= 2
+    return out
+
+def audio_samples(audio):
+    # Mono 16-bit samples of an sr.AudioData, resampled to FEATURE_RATE
+    return array('h', audio.get_raw_data(convert_rate=FEATURE_RATE, convert_width=2))
+
+def trim_silence(samples, trailing=True):
+    # (start, end) sample range without the quiet lead-in (and tail) around the speech
+    block = FEATURE_RATE // 100
+    levels = [max(map(abs, samples[i:i + block]), default=0) for i in range(0, len(samples), block)]
+    loud = [i for i, level in enumerate(levels) if level >= max(levels, default=0) * SILENCE_RATIO]
+    if not loud:
+        return 0, 0
+    start = max(0, loud[0] - 1) * block
+    end = min(len(samples), (loud[-1] + 2) * block) if trailing else len(samples)
+    return start, end
+
+def extract_features(samples):
+    # One row of BANDS log energies per frame, with the per-band mean removed
+    # (cancels microphone and distance differences between recordings)
+    frames = (len(samples) - WINDOW) // HOP + 1
+    if frames < 1:
+        return []
+
+    if np is not None:
+        signal = np.asarray(samples, dtype=np.float64)
+        windows = np.lib.stride_tricks.sliding_window_view(signal, WINDOW)[::HOP][:frames] * np.array(_HAMMING)
+        power = np.abs(np.fft.rfft(windows, WINDOW)) ** 2
+        bank = np.zeros((BANDS, WINDOW // 2 + 1))
+        for band, (first, weights) in enumerate(_FILTERS):
+            bank[band, first:first + len(weights)] = weights
+        energies = np.log(power @ bank.T + 1e-10)
+        return energies - energies.mean(axis=0)
+
+    rows = []
+    for frame in range(frames):
+        start = frame * HOP
+        spectrum = _fft([samples[start + n] * _HAMMING[n] for n in range(WINDOW)])
+        power = [abs(value) ** 2 for value in spectrum[:WINDOW // 2 + 1]]
+        rows.append([math.log(sum(w * power[first + i] for i, w in enumerate(weights)) + 1e-10)
+                     for first, weights in _FILTERS])
+    means = [sum(row[band] for row in rows) / len(rows) for band in range(BANDS)]
+    return [[value - mean for value, mean in zip(row, means)] for row in rows]
+
+def prefix_distance(template, features):
+    # DTW of the whole template against the start of features, with a free end.
+    # Returns (distance normalized by path length, frames of features matched).
+    n, m = len(template), len(features)
+    if np is not None:
+        cost = np.sqrt(((np.asarray(template)[:, None, :] - np.asarray(features)[None, :, :]) ** 2).sum(axis=2))
+        cost = cost.tolist()
+    else:
+        cost = [[math.sqrt(sum((a - b) ** 2 for a, b in zip(t_row, f_row))) for f_row in features]
+                for t_row in template]
+
+    inf = float('inf')
+    previous = [inf] * m
+    for i in range(n):
+        current = [inf] * m
+        # Slope limits keep the match within MAX_STRETCH of the template length
+        low = int(i / MAX_STRETCH)
+        high = min(m - 1, int((i + 1) * MAX_STRETCH))
+        row = cost[i]
+        for j in range(low, high + 1):
+            if i == 0 and j == 0:
+                best = 0.0
+            else:
+                best = min(previous[j], current[j - 1] if j else inf, previous[j - 1] if j else inf)
+            current[j] = row[j] + best
+        previous = current
+
+    best_j = min(range(m), key=lambda j: previous[j] / (n + j + 1))
+    return previous[best_j] / (n + best_j + 1), best_j + 1
+
+class Detection:
+    def __init__(self, score, end_seconds, after):
+        self.score = score
+        self.end_seconds = end_seconds  # Where the wake word ends in the phrase
+        self.after = after  # sr.AudioData of the rest of the phrase, or None
+
+class WakeWordDetector:
+    # Template matcher for the wake word, run on phrases cut by the energy
+    # detector in audioInput. Each enrolled recording of the wake word is a
+    # template; a phrase is accepted when its start is close enough to one of
+    # them. Only the audio after the wake word is sent on to cloud recognition.
+
+    def __init__(self, template_dir=TEMPLATE_DIR, threshold=WAKE_THRESHOLD):
+        self.threshold = threshold
+        self.templates = []
+        for path in sorted(Path(template_dir).glob('*.wav')):
+            samples = audio_samples(load_wav(path))
+            start, end = trim_silence(samples)
+            features = extract_features(samples[start:end])
+            if len(features):
+                self.templates.append(features)
+        self.longest = max((len(t) for t in self.templates), default=0)
+
+    def score(self, audio):
+        # (best distance, seconds into the phrase where the match ends), or None when nothing can match
+        samples = audio_samples(audio)
+        start, _ = trim_silence(samples, trailing=False)
+        # Only the start of the speech can hold the wake word
+        samples = samples[start:start + int(self.longest * MAX_STRETCH * HOP) + WINDOW]
+        if len(samples) < MIN_WAKE_SECONDS * FEATURE_RATE or not self.templates:
+            return None
+        features = extract_features(samples)
+        if not len(features):
+            return None
+        distance, frames = min(prefix_distance(template, features) for template in self.templates)
+        return distance, (start + frames * HOP + WINDOW) / FEATURE_RATE
+
+    def detect(self, audio):
+        result = self.score(audio)
+        if result is None or result[0] > self.threshold:
+            return None
+        distance, end_seconds = result
+        return Detection(distance, end_seconds, audio_after(audio, end_seconds))
+
+def audio_after(audio, seconds):
+    # The part of audio after the given offset, or None if too little is left
+    frame_bytes = audio.sample_width
+    start = int(seconds * audio.sample_rate) * frame_bytes
+    rest = audio.frame_data[start:]
+    if len(rest) < MIN_COMMAND_SECONDS * audio.sample_rate * frame_bytes:
+        return None
+    return sr.AudioData(rest, audio.sample_rate, audio.sample_width)
+
+def load_wav(path):
+    with wave.open(str(path), 'rb') as wav:
+        frames = wav.readframes(wav.getnframes())
+        width = wav.getsampwidth()
+        if wav.getnchannels() > 1:
+            # Keep the first channel
+            step = width * wav.getnchannels()
+            frames = b''.join(frames[i:i + width] for i in range(0, len(frames), step))
+        return sr.AudioData(frames, wav.getframerate(), width)
+
+def save_wav(path, audio):
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(audio.sample_width)
+        wav.setframerate(audio.sample_rate)
+        wav.writeframes(audio.frame_data)
+
+def enroll(count, template_dir=TEMPLATE_DIR):
+    # Record the wake word from the microphone as templates
+    import queue
+    from audioInput import MicrophoneStream
+
+    template_dir.mkdir(parents=True, exist_ok=True)
+    phrases = queue.Queue()
+    microphone = MicrophoneStream(phrases.put)
+    microphone.start()
+    existing = len(list(template_dir.glob('*.wav')))
+    for i in range(count):
+        print(f"Say the wake word ({i + 1}/{count})...")
+        path = template_dir / f"wake_{existing + i + 1:02d}.wav"
+        save_wav(path, phrases.get().audio)
+        print(f"Saved {path.name}")
+    microphone.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Record wake word templates for JARVIS")
+    parser.add_argument('--enroll', type=int, default=5, metavar='N', help="Recordings to make (default: 5)")
+    parser.add_argument('--dir', type=Path, default=TEMPLATE_DIR, help="Template directory")
+    args = parser.parse_args()
+    enroll(args.enroll, args.dir)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Wake word harness - false accept / false reject rates and CPU cost of wakeWord
+Feeds recorded WAV fixtures through WakeWordDetector and reports how many
+wake words were missed, how many other phrases were accepted, and the CPU
+time spent per second of audio.
+
+Fixture layout (one phrase per file, as cut by the microphone stream):
+    fixtures/positive/*.wav   phrases starting with the wake word ("jarvis", "jarvis open google")
+    fixtures/negative/*.wav   anything else (other speech, TV, music, JARVIS' own voice)
+
+--synthesize builds a reproducible set instead of using recordings: templates
+and fixtures are synthesized from a fixed seed (vowel formants over a voice
+pitch, noise for the consonants), with "jarvis" said at different speeds,
+pitches and loudness, and negatives made of other words from the same sounds,
+noise and tones. It checks the matcher end to end, not accuracy on real voices.
+
+Usage:
+    python wakeWordBench.py fixtures
+    python wakeWordBench.py synthetic --synthesize          # no microphone or recordings needed
+    python wakeWordBench.py fixtures --sweep                # FAR/FRR over a range of thresholds
+    python wakeWordBench.py fixtures --pure-python          # without numpy
+    python wakeWordBench.py fixtures --max-far 0.02 --max-frr 0.1   # exit code 1 when exceeded
+"""
+
+import sys
+import math
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import speech_recognition as sr
+import wakeWord
+
+SYNTHETIC_RATE = 8000
+SYNTHETIC_SEED = 43
+
+# Sounds as (kind, duration in seconds, formants in Hz); 'voiced' sounds are
+# harmonics of the pitch shaped by the formants, 'noise' sounds are hiss
+SOUNDS = {
+    'j': ('noise', 0.06, (2500,)),
+    'a': ('voiced', 0.20, (750, 1200, 2500)),
+    'r': ('voiced', 0.09, (500, 1350, 1700)),
+    'v': ('voiced', 0.06, (250, 1100)),
+    'i': ('voiced', 0.14, (300, 2300, 3000)),
+    's': ('noise', 0.14, (3500,)),
+    'o': ('voiced', 0.16, (450, 850, 2400)),
+    'e': ('voiced', 0.14, (550, 1800, 2500)),
+    'u': ('voiced', 0.15, (320, 900, 2300)),
+    'n': ('voiced', 0.07, (250, 1500)),
+    'h': ('noise', 0.06, (1500,)),
+    'f': ('noise', 0.08, (3000,)),
+    'p': ('noise', 0.03, (800,)),
+    't': ('noise', 0.04, (3000,)),
+}
+WAKE_WORD_SOUNDS = 'jarvis'
+# Spelled by sound, one letter per entry of SOUNDS
+COMMAND_WORDS = ['open', 'nus', 'fun', 'sun']
+OTHER_WORDS = ['servis', 'harvest', 'nervos', 'jar', 'open', 'nus', 'hiro', 'vas', 'fun', 'sun', 'avis']
+
+def score_fixtures(detector: wakeWord.WakeWordDetector,
+                   files: List[Path]) -> Tuple[List[Optional[float]], float, float]:
+    """
+    Score every fixture
+    Returns: (distance per file, None when it could not match at all; CPU seconds; audio seconds)
+    """
+    scores = []
+    cpu = audio_seconds = 0.0
+    for path in files:
+        audio = wakeWord.load_wav(path)
+        audio_seconds += len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        start = time.process_time()
+        result = detector.score(audio)
+        cpu += time.process_time() - start
+        scores.append(result[0] if result else None)
+    return scores, cpu, audio_seconds
+
+def rates(positive: List[Optional[float]], negative: List[Optional[float]], threshold: float) -> Tuple[float, float]:
+    """
+    (false accept rate, false reject rate) at threshold
+    """
+    accepted = lambda score: score is not None and score <= threshold
+    far = sum(map(accepted, negative)) / len(negative) if negative else 0.0
+    frr = sum(not accepted(score) for score in positive) / len(positive) if positive else 0.0
+    return far, frr
+
+def synthesize_word(rng: random.Random, word: str, pitch: float, speed: float) -> List[float]:
+    """
+    Samples of a word spelled with SOUNDS, with a little random variation per sound
+    """
+    samples = []
+    for letter in word:
+        kind, duration, formants = SOUNDS[letter]
+        count = int(duration * speed * SYNTHETIC_RATE)
+        formants = [f * rng.uniform(0.95, 1.05) for f in formants]
+        if kind == 'noise':
+            # Hiss: white noise through a crude band-pass around the formant
+            previous, sound = 0.0, []
+            for _ in range(count):
+                value = rng.gauss(0, 1)
+                sound.append(value - previous if formants[0] > 2000 else value + previous)
+                previous = value
+            samples.extend(0.3 * value for value in sound)
+            continue
+        harmonics = []
+        for k in range(1, int(3800 / pitch) + 1):
+            weight = sum(1 / (1 + ((k * pitch - f) / 120) ** 2) for f in formants)
+            if weight > 0.05:
+                harmonics.append((2 * math.pi * k * pitch / SYNTHETIC_RATE, weight))
+        samples.extend(sum(w * math.sin(step * n) for step, w in harmonics) / 3 for n in range(count))
+    # 10 ms fades so sounds join without clicks
+    fade = SYNTHETIC_RATE // 100
+    for n in range(min(fade, len(samples) // 2)):
+        samples[n] *= n / fade
+        samples[-n - 1] *= n / fade
+    return samples
+
+def synthesize_phrase(rng: random.Random, words: List[str]) -> sr.AudioData:
+    """
+    A phrase as the microphone stream would cut it: quiet lead-in, words, quiet tail
+    """
+    pitch, speed, level = rng.uniform(95, 170), rng.uniform(0.85, 1.2), rng.uniform(2000, 9000)
+    samples = [0.0] * int(rng.uniform(0.1, 0.3) * SYNTHETIC_RATE)
+    for word in words:
+        samples += synthesize_word(rng, word, pitch * rng.uniform(0.95, 1.05), speed)
+        samples += [0.0] * int(rng.uniform(0.05, 0.15) * SYNTHETIC_RATE)
+    samples += [0.0] * int(rng.uniform(0.1, 0.3) * SYNTHETIC_RATE)
+    peak = max(map(abs, samples)) or 1.0
+    pcm = (max(-32768, min(32767, int(value / peak * level + rng.gauss(0, level * 0.01)))) for value in samples)
+    return sr.AudioData(b''.join(value.to_bytes(2, 'little', signed=True) for value in pcm), SYNTHETIC_RATE, 2)
+
+def synthesize_tones(rng: random.Random) -> sr.AudioData:
+    """
+    A few seconds of chords, standing in for music in the background
+    """
+    samples = []
+    for _ in range(rng.randint(3, 6)):
+        chord = [rng.choice([220, 262, 330, 392, 440, 523]) * ratio for ratio in (1, 1.25, 1.5)]
+        samples += [sum(math.sin(2 * math.pi * f * n / SYNTHETIC_RATE) for f in chord) * 2000
+                    for n in range(int(0.3 * SYNTHETIC_RATE))]
+    return sr.AudioData(b''.join(int(value).to_bytes(2, 'little', signed=True) for value in samples),
+                        SYNTHETIC_RATE, 2)
+
+def synthesize_fixtures(directory: Path, templates: int = 5, positives: int = 20, negatives: int = 20,
+                        seed: int = SYNTHETIC_SEED) -> None:
+    """
+    Write synthetic templates and fixtures to directory/wake_templates, /positive and /negative
+    The same seed always gives the same files, so rates can be compared between runs.
+    """
+    rng = random.Random(seed)
+    for name in ('wake_templates', 'positive', 'negative'):
+        (directory / name).mkdir(parents=True, exist_ok=True)
+    for i in range(templates):
+        wakeWord.save_wav(directory / 'wake_templates' / f"wake_{i + 1:02d}.wav",
+                          synthesize_phrase(rng, [WAKE_WORD_SOUNDS]))
+    for i in range(positives):
+        # Half say only the wake word, half follow it with a command
+        words = [WAKE_WORD_SOUNDS] + rng.sample(COMMAND_WORDS, 2) * (i % 2)
+        wakeWord.save_wav(directory / 'positive' / f"jarvis_{i + 1:02d}.wav", synthesize_phrase(rng, words))
+    for i in range(negatives):
+        if i % 5 == 4:
+            audio, name = synthesize_tones(rng), 'tones'
+        else:
+            words = rng.sample(OTHER_WORDS, rng.randint(1, 3))
+            audio, name = synthesize_phrase(rng, words), '_'.join(words)
+        wakeWord.save_wav(directory / 'negative' / f"{i + 1:02d}_{name}.wav", audio)
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments
+    """
+    parser = argparse.ArgumentParser(description="Wake word false accept / reject harness")
+    parser.add_argument('fixtures', type=Path, help="Directory with positive/ and negative/ WAV files")
+    parser.add_argument('--templates', type=Path,
+                        help="Wake word templates (default: wake_templates, or FIXTURES/wake_templates "
+                             "with --synthesize)")
+    parser.add_argument('--threshold', type=float, default=wakeWord.WAKE_THRESHOLD, help="Acceptance threshold")
+    parser.add_argument('--sweep', action='store_true', help="Print FAR/FRR for a range of thresholds")
+    parser.add_argument('--pure-python', action='store_true', help="Run without numpy")
+    parser.add_argument('--synthesize', action='store_true',
+                        help="Write a synthetic set of templates and fixtures to FIXTURES first")
+    parser.add_argument('--max-far', type=float, help="Fail when the false accept rate is higher")
+    parser.add_argument('--max-frr', type=float, help="Fail when the false reject rate is higher")
+    return parser.parse_args()
+
+def main():
+    """
+    Main function - scores the fixtures and prints the rates
+    Exit code is 1 when --max-far or --max-frr is exceeded
+    """
+    args = parse_arguments()
+    if args.pure_python:
+        wakeWord.np = None
+    if args.synthesize:
+        synthesize_fixtures(args.fixtures)
+        print(f"Synthesized templates and fixtures in {args.fixtures}")
+    if args.templates is None:
+        args.templates = args.fixtures / 'wake_templates' if args.synthesize else wakeWord.TEMPLATE_DIR
+
+    detector = wakeWord.WakeWordDetector(args.templates, args.threshold)
+    if not detector.templates:
+        print(f"No templates in {args.templates} - record some with: python wakeWord.py --enroll 5")
+        return 2
+
+    positive_files = sorted((args.fixtures / 'positive').glob('*.wav'))
+    negative_files = sorted((args.fixtures / 'negative').glob('*.wav'))
+    if not positive_files and not negative_files:
+        print(f"No fixtures in {args.fixtures}/positive or {args.fixtures}/negative")
+        return 2
+
+    print(f"{len(detector.templates)} templates, {len(positive_files)} positive and "
+          f"{len(negative_files)} negative fixtures ({'numpy' if wakeWord.np is not None else 'pure Python'})")
+    positive, cpu_pos, audio_pos = score_fixtures(detector, positive_files)
+    negative, cpu_neg, audio_neg = score_fixtures(detector, negative_files)
+
+    if args.sweep:
+        scored = sorted(score for score in positive + negative if score is not None)
+        print(f"\n{'threshold':>10}{'FAR':>9}{'FRR':>9}")
+        for threshold in sorted({round(scored[i], 2) for i in range(0, len(scored), max(1, len(scored) // 20))}):
+            far, frr = rates(positive, negative, threshold)
+            print(f"{threshold:>10.2f}{far:>9.1%}{frr:>9.1%}")
+
+    far, frr = rates(positive, negative, args.threshold)
+    cpu, audio_seconds = cpu_pos + cpu_neg, audio_pos + audio_neg
+    phrases = len(positive_files) + len(negative_files)
+    print(f"\nThreshold {args.threshold:.2f}")
+    print(f"False accept rate: {far:.1%} ({round(far * len(negative))}/{len(negative)})")
+    print(f"False reject rate: {frr:.1%} ({round(frr * len(positive))}/{len(positive)})")
+    print(f"CPU: {cpu * 1000 / phrases:.1f} ms per phrase, "
+          f"{cpu / audio_seconds:.3f} s per second of audio" if audio_seconds else "")
+
+    for name, files, scores, wanted in (('Missed', positive_files, positive, True),
+                                        ('Accepted', negative_files, negative, False)):
+        for path, score in zip(files, scores):
+            if (score is not None and score <= args.threshold) != wanted:
+                print(f"  {name}: {path.name} (distance {score:.2f})" if score is not None
+                      else f"  {name}: {path.name} (too short)")
+
+    failed = (args.max_far is not None and far > args.max_far) or (args.max_frr is not None and frr > args.max_frr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())